@@ -1,140 +1,504 @@
 import hashlib
 import time
-import json
 import logging
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable, Tuple
 from app.core.settings import settings
+from app.core.json_codec import PreSerialized, pre_serialize
+from app.agent_services.cache_store import SQLiteCacheStore
+from app.agent_services.query_normalizer import QueryNormalizer
 
 # Initialize logger
 logger = logging.getLogger("mcp_server")
 
+# Per-tool counters reported by get_stats
+_COUNTERS = ("hits", "misses", "normalized_hits", "stale_hits", "refreshes")
+
+# Reasons an entry leaves the cache other than being replaced or cleared
+_EVICTION_REASONS = ("max_size", "max_bytes", "expired", "oversize")
+
+def _legacy_normalize(query: str) -> str:
+    """Key normalization used before canonicalization: lowercase and strip."""
+    return query.lower().strip()
+
+class _CacheEntry:
+    """A single cached result together with its expiry times."""
+
+    __slots__ = ("value", "size", "expires_at", "stale_until", "lifetime", "origin")
+
+    def __init__(self, value: PreSerialized, size: int, expires_at: float, stale_until: float,
+                 lifetime: float, origin: Optional[int] = None):
+        self.value = value  # served as is; its ``raw`` bytes go to the response unchanged
+        self.size = size  # UTF-8 bytes of the JSON-serialized value
+        self.expires_at = expires_at  # fresh until
+        self.stale_until = stale_until  # may be served stale until
+        self.lifetime = lifetime  # ttl + grace, selects the expiry queue
+        self.origin = origin  # hash of the legacy key string of the query that stored it
+
 class QueryCache:
-    """Cache for storing analysis results for queries."""
-    
-    def __init__(self, ttl=settings.CACHE_TTL, max_size=settings.MAX_CACHE_SIZE):
+    """Cache for storing analysis results for queries.
+
+    Entries live in an ``OrderedDict`` kept in least-recently-used order, so
+    lookups, inserts and evictions are all O(1). Entries with the same lifetime
+    (TTL plus grace window) share a write-ordered expiry queue: within a queue
+    the oldest write always expires first, which lets the background sweeper
+    stop at the first live entry instead of scanning the whole cache.
+    All state is guarded by a single lock since ``routes.handle_tools_call``
+    reaches the cache from ``asyncio.to_thread`` workers.
+
+    An optional ``SQLiteCacheStore`` acts as a second tier: memory misses read
+    through to it, writes are queued to it write-behind, and ``warm_start``
+    pre-loads its hottest entries after a restart.
+
+    Queries pass through a pluggable ``normalizer`` before hashing. Hit/miss
+    counters are kept per tool, and a hit whose legacy (lowercase + strip) key
+    differs from the query that stored the entry is counted as a
+    ``normalized_hit`` -- a hit the old key scheme would have missed.
+
+    TTLs and stale-while-revalidate grace windows can be set per tool. Within
+    the grace window an expired entry is still returned immediately, and the
+    ``refresh`` callback passed to ``get`` is run on a small background pool to
+    replace it.
+
+    The cache is bounded both by entry count (``max_size``) and by the
+    serialized size of its values (``max_bytes``). Each entry's size is measured
+    once on insert and kept in a running total, so ``get_stats`` is O(1).
+    Values are kept as ``PreSerialized`` dicts holding those bytes, so a hit
+    can be written to the response without encoding it again.
+    """
+
+    def __init__(self, ttl=settings.CACHE_TTL, max_size=settings.MAX_CACHE_SIZE,
+                 sweep_interval=settings.CACHE_SWEEP_INTERVAL, store: Optional[SQLiteCacheStore] = None,
+                 normalizer: Optional[Callable[[str], str]] = None, grace=settings.CACHE_GRACE,
+                 tool_ttls: Optional[Dict[str, int]] = None, tool_grace: Optional[Dict[str, int]] = None,
+                 max_bytes=settings.MAX_CACHE_BYTES):
         """
         Initialize the cache.
-        
+
         Args:
             ttl: Time-to-live for cache entries (seconds)
             max_size: Maximum number of entries in the cache
+            sweep_interval: Seconds between background expiry sweeps (0 disables the sweeper)
+            store: Optional persistent tier behind the in-memory cache
+            normalizer: Query canonicalization applied before hashing (defaults to lowercase + strip)
+            grace: Seconds an expired entry may still be served while it is refreshed
+            tool_ttls: Per-tool overrides of ``ttl``
+            tool_grace: Per-tool overrides of ``grace``
+            max_bytes: Maximum total serialized size of cached values (0 disables the limit)
         """
-        self.cache = {}
         self.ttl = ttl
         self.max_size = max_size
-        self.expiry = {}  # Expiry time for each key
-        self.access_times = {}  # Last access time for each key
-        
+        self.sweep_interval = sweep_interval
+        self.store = store
+        self.normalizer = normalizer or _legacy_normalize
+        self.grace = grace
+        self.tool_ttls = dict(tool_ttls or {})
+        self.tool_grace = dict(tool_grace or {})
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.disk_hits = 0
+        self._evictions = dict.fromkeys(_EVICTION_REASONS, 0)
+        self._tool_stats: Dict[str, Dict[str, int]] = {}
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()  # LRU order
+        self._expiry_queues: Dict[float, "OrderedDict[str, None]"] = {}  # Write order per lifetime
+        self._unordered: Dict[str, None] = {}  # Entries expiring before the tail of their queue
+        self._lock = threading.RLock()
+        self._refreshing = set()
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+        self._stop_sweeper = threading.Event()
+        self._sweeper_thread: Optional[threading.Thread] = None
+
+        if self.sweep_interval > 0:
+            self.start_sweeper()
+
     def _generate_key(self, tool_name: str, query: str) -> str:
         """Generate a cache key from tool name and query."""
         # Create a unique key by hashing the tool name and query
-        key_string = f"{tool_name}:{query.lower().strip()}"
+        key_string = f"{tool_name}:{self.normalizer(query)}"
         return hashlib.md5(key_string.encode('utf-8')).hexdigest()
-    
-    def get(self, tool_name: str, query: str) -> Optional[Dict[str, Any]]:
+
+    def _record(self, tool_name: str, counter: str) -> None:
+        """Increment a per-tool hit-rate counter. Caller must hold the lock."""
+        stats = self._tool_stats.get(tool_name)
+        if stats is None:
+            stats = self._tool_stats[tool_name] = dict.fromkeys(_COUNTERS, 0)
+        stats[counter] += 1
+
+    def _lifetimes(self, tool_name: str) -> Tuple[int, int]:
+        """Return ``(ttl, grace)`` for a tool."""
+        return self.tool_ttls.get(tool_name, self.ttl), self.tool_grace.get(tool_name, self.grace)
+
+    def get(self, tool_name: str, query: str,
+            refresh: Optional[Callable[[], Any]] = None) -> Optional[Dict[str, Any]]:
         """
         Get a result from the cache if it exists and is not expired.
-        
+
         Args:
             tool_name: Name of the tool being called
             query: User query
-            
+            refresh: Called in the background to recompute an entry served stale
+
         Returns:
             Optional[Dict[str, Any]]: Result from cache or None if not found
         """
         if not settings.CACHE_ENABLED:
             return None
-            
+
         key = self._generate_key(tool_name, query)
-        
-        # Check if key is in cache
-        if key not in self.cache:
-            return None
-            
-        # Check if cache is expired
-        now = time.time()
-        if now > self.expiry.get(key, 0):
-            # Remove expired cache
-            self._remove(key)
-            return None
-            
-        # Update access time
-        self.access_times[key] = now
-        
-        logger.info(f"Cache hit for tool '{tool_name}' and query: {query}")
-        return self.cache[key]
-    
-    def set(self, tool_name: str, query: str, result: Dict[str, Any]) -> None:
+        stale = False
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                now = time.time()
+                if now > entry.stale_until:
+                    # Remove expired cache
+                    self._remove(key, "expired")
+                    entry = None
+                else:
+                    stale = now > entry.expires_at
+
+            if entry is not None:
+                # Mark as most recently used
+                self._entries.move_to_end(key)
+                value = entry.value
+                self._record(tool_name, "hits")
+                if stale:
+                    self._record(tool_name, "stale_hits")
+                if entry.origin is not None and entry.origin != hash(_legacy_normalize(query)):
+                    self._record(tool_name, "normalized_hits")
+
+        if entry is None:
+            # Check if key is in the persistent tier
+            value, stale = self._read_through(tool_name, key)
+            with self._lock:
+                self._record(tool_name, "misses" if value is None else "hits")
+                if stale:
+                    self._record(tool_name, "stale_hits")
+            if value is None:
+                return None
+            if not stale:
+                logger.info(f"Persistent cache hit for tool '{tool_name}' and query: {query}")
+        elif not stale:
+            logger.info(f"Cache hit for tool '{tool_name}' and query: {query}")
+
+        if stale:
+            logger.info(f"Serving stale cache entry for tool '{tool_name}' and query: {query}")
+            if refresh is not None:
+                self._schedule_refresh(tool_name, key, refresh)
+            return value
+
+        if self.store is not None:
+            self.store.touch(key)
+        return value
+
+    def contains(self, tool_name: str, query: str) -> bool:
+        """Check whether a fresh in-memory entry exists, without touching LRU order or statistics."""
+        if not settings.CACHE_ENABLED:
+            return False
+        key = self._generate_key(tool_name, query)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.time() <= entry.expires_at
+
+    def _schedule_refresh(self, tool_name: str, key: str, refresh: Callable[[], Any]) -> None:
+        """Run ``refresh`` on the background pool unless one is already running for ``key``."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self._record(tool_name, "refreshes")
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=settings.CACHE_REFRESH_WORKERS,
+                    thread_name_prefix="query-cache-refresh"
+                )
+
+        def _run():
+            try:
+                refresh()
+            except Exception as e:
+                logger.error(f"Background refresh for tool '{tool_name}' failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_executor.submit(_run)
+
+    def _read_through(self, tool_name: str, key: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Load a key from the persistent tier into memory, if present.
+
+        Returns:
+            Tuple[Optional[Dict[str, Any]], bool]: The value (None if not stored) and
+            whether it is past its TTL but within the grace window
+        """
+        if self.store is None:
+            return None, False
+
+        ttl, grace = self._lifetimes(tool_name)
+        try:
+            stored = self.store.get(key, grace)
+        except Exception as e:
+            logger.error(f"Error reading persistent cache: {str(e)}")
+            return None, False
+        if stored is None:
+            return None, False
+
+        value, expires_at = stored
+        value = pre_serialize(value)
+        with self._lock:
+            self._insert(key, value, len(value.raw), expires_at, expires_at + grace, ttl + grace)
+            self.disk_hits += 1
+        return value, time.time() > expires_at
+
+    def set(self, tool_name: str, query: str, result: Dict[str, Any], ttl: Optional[float] = None) -> None:
         """
         Store a result in the cache.
-        
+
         Args:
             tool_name: Name of the tool being called
             query: User query
             result: Result to cache
+            ttl: Seconds the entry stays fresh, defaults to the tool's TTL
         """
         if not settings.CACHE_ENABLED:
             return
-            
+
         key = self._generate_key(tool_name, query)
-        now = time.time()
-        
-        # Check if cache is full
-        if len(self.cache) >= self.max_size and key not in self.cache:
-            # Evict least recently accessed entry
-            self._evict_oldest()
-        
-        # Store result in cache
-        self.cache[key] = result
-        self.expiry[key] = now + self.ttl
-        self.access_times[key] = now
-        
+        tool_ttl, grace = self._lifetimes(tool_name)
+        ttl = tool_ttl if ttl is None else ttl
+        expires_at = time.time() + ttl
+        # Serialized once here; hits reuse the bytes for responses and the size limit
+        value = pre_serialize(result)
+
+        with self._lock:
+            stored = self._insert(key, value, len(value.raw), expires_at,
+                                  expires_at + grace, ttl + grace, hash(_legacy_normalize(query)))
+
+        if not stored:
+            logger.warning(f"Result for tool '{tool_name}' exceeds MAX_CACHE_BYTES, not cached: {query}")
+            return
+
+        if self.store is not None:
+            self.store.put(key, result, expires_at, value.raw.decode('utf-8'))
+
         logger.info(f"Cached result for tool '{tool_name}' and query: {query}")
-    
-    def _remove(self, key: str) -> None:
-        """Remove an entry from the cache."""
-        if key in self.cache:
-            del self.cache[key]
-        if key in self.expiry:
-            del self.expiry[key]
-        if key in self.access_times:
-            del self.access_times[key]
-    
-    def _evict_oldest(self) -> None:
-        """Evict the least recently accessed entry from the cache."""
-        if not self.access_times:
+
+    def _insert(self, key: str, value: PreSerialized, size: int, expires_at: float, stale_until: float,
+                lifetime: float, origin: Optional[int] = None) -> bool:
+        """Insert or replace an in-memory entry. Caller must hold the lock.
+
+        Returns:
+            bool: False if the value alone is larger than ``max_bytes``
+        """
+        if key in self._entries:
+            self._remove(key)
+
+        if self.max_bytes and size > self.max_bytes:
+            self._evictions["oversize"] += 1
+            return False
+
+        # Evict least recently accessed entries until both limits are met
+        while self._entries and len(self._entries) >= self.max_size:
+            self._evict_oldest("max_size")
+        while self._entries and self.max_bytes and self.current_bytes + size > self.max_bytes:
+            self._evict_oldest("max_bytes")
+
+        self._entries[key] = _CacheEntry(value, size, expires_at, stale_until, lifetime, origin)
+        self.current_bytes += size
+        queue = self._expiry_queues.get(lifetime)
+        if queue is None:
+            queue = self._expiry_queues[lifetime] = OrderedDict()
+        # Entries promoted from the persistent tier can expire before recent
+        # writes; queueing them behind those would hide them from the sweeper
+        tail = next(reversed(queue), None)
+        if tail is not None and self._entries[tail].stale_until > stale_until:
+            self._unordered[key] = None
+        else:
+            queue[key] = None
+        return True
+
+    def _remove(self, key: str, reason: Optional[str] = None) -> None:
+        """Remove an entry from the cache. Caller must hold the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._expiry_queues[entry.lifetime].pop(key, None)
+            self._unordered.pop(key, None)
+            self.current_bytes -= entry.size
+            if reason is not None:
+                self._evictions[reason] += 1
+
+    def _evict_oldest(self, reason: str) -> None:
+        """Evict the least recently accessed entry. Caller must hold the lock."""
+        if not self._entries:
             return
-            
-        # Find the key with the oldest access time
-        oldest_key = min(self.access_times.items(), key=lambda x: x[1])[0]
-        self._remove(oldest_key)
-    
+
+        oldest_key, entry = self._entries.popitem(last=False)
+        self._expiry_queues[entry.lifetime].pop(oldest_key, None)
+        self._unordered.pop(oldest_key, None)
+        self.current_bytes -= entry.size
+        self._evictions[reason] += 1
+
     def clear(self) -> None:
         """Clear the entire cache."""
-        self.cache.clear()
-        self.expiry.clear()
-        self.access_times.clear()
-        
+        with self._lock:
+            self._entries.clear()
+            self._expiry_queues.clear()
+            self._unordered.clear()
+            self.current_bytes = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def warm_start(self, limit: int = settings.CACHE_WARM_START_SIZE) -> int:
+        """
+        Pre-load the hottest live entries from the persistent tier.
+
+        Args:
+            limit: Maximum number of entries to load (capped at ``max_size``)
+
+        Returns:
+            int: Number of entries loaded into memory
+        """
+        if self.store is None or not settings.CACHE_ENABLED:
+            return 0
+
+        rows = self.store.load_hottest(min(limit, self.max_size))
+        with self._lock:
+            for key, value, expires_at in rows:
+                value = pre_serialize(value)
+                # The tool is not stored on disk, so warm entries get no grace window
+                self._insert(key, value, len(value.raw), expires_at, expires_at, self.ttl)
+
+        logger.info(f"Warm-started cache with {len(rows)} entries from {self.store.path}")
+        return len(rows)
+
+    def close(self) -> None:
+        """Stop background threads and flush the persistent tier."""
+        self.stop_sweeper()
+        if self._refresh_executor is not None:
+            self._refresh_executor.shutdown(wait=False, cancel_futures=True)
+        if self.store is not None:
+            self.store.close()
+
     def remove_expired(self) -> None:
-        """Remove all expired entries."""
+        """Remove all expired entries.
+
+        Walks each expiry queue from the oldest write and stops at the first
+        entry that may still be served, so the cost is proportional to the
+        number of expired entries rather than the cache size. Entries that
+        were inserted out of expiry order are checked one by one.
+        """
         now = time.time()
-        expired_keys = [key for key, exp_time in self.expiry.items() if now > exp_time]
-        
-        for key in expired_keys:
-            self._remove(key)
-            
-        if expired_keys:
-            logger.info(f"Removed {len(expired_keys)} expired cache entries")
-    
+        removed = 0
+
+        with self._lock:
+            for queue in self._expiry_queues.values():
+                while queue:
+                    key = next(iter(queue))
+                    entry = self._entries.get(key)
+                    if entry is not None and now <= entry.stale_until:
+                        break
+                    self._remove(key, "expired")
+                    removed += 1
+            for key in [key for key in self._unordered if now > self._entries[key].stale_until]:
+                self._remove(key, "expired")
+                removed += 1
+
+        if removed:
+            logger.info(f"Removed {removed} expired cache entries")
+
+    def start_sweeper(self) -> None:
+        """Start the background thread that periodically removes expired entries."""
+        if self._sweeper_thread is not None and self._sweeper_thread.is_alive():
+            return
+
+        self._stop_sweeper.clear()
+        self._sweeper_thread = threading.Thread(
+            target=self._sweep_loop,
+            name="query-cache-sweeper",
+            daemon=True
+        )
+        self._sweeper_thread.start()
+
+    def stop_sweeper(self) -> None:
+        """Stop the background expiry sweeper."""
+        self._stop_sweeper.set()
+        if self._sweeper_thread is not None:
+            self._sweeper_thread.join(timeout=self.sweep_interval or None)
+            self._sweeper_thread = None
+
+    def _sweep_loop(self) -> None:
+        """Run ``remove_expired`` every ``sweep_interval`` seconds until stopped."""
+        while not self._stop_sweeper.wait(self.sweep_interval):
+            try:
+                self.remove_expired()
+            except Exception as e:
+                logger.error(f"Error sweeping expired cache entries: {str(e)}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _hit_rate_stats(self) -> Dict[str, Any]:
+        """Per-tool and overall hit-rate counters. Caller must hold the lock."""
+        tools = {}
+        totals = dict.fromkeys(_COUNTERS, 0)
+        for tool_name, stats in self._tool_stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            tools[tool_name] = dict(stats, hit_rate=stats["hits"] / lookups if lookups else 0.0)
+            for counter, value in stats.items():
+                totals[counter] += value
+        lookups = totals["hits"] + totals["misses"]
+        totals["hit_rate"] = totals["hits"] / lookups if lookups else 0.0
+        return {"overall": totals, "tools": tools}
+
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the cache."""
-        return {
-            "enabled": settings.CACHE_ENABLED,
-            "ttl": self.ttl,
-            "max_size": self.max_size,
-            "current_size": len(self.cache),
-            "memory_usage_estimate": sum(len(json.dumps(v)) for v in self.cache.values())
-        }
+        with self._lock:
+            return {
+                "enabled": settings.CACHE_ENABLED,
+                "ttl": self.ttl,
+                "grace": self.grace,
+                "tool_ttls": self.tool_ttls,
+                "tool_grace": self.tool_grace,
+                "max_size": self.max_size,
+                "current_size": len(self._entries),
+                "max_bytes": self.max_bytes,
+                "current_bytes": self.current_bytes,
+                "memory_usage_estimate": self.current_bytes,
+                "evictions": dict(self._evictions),
+                "disk_hits": self.disk_hits,
+                "hit_rate": self._hit_rate_stats(),
+                "persistent": self.store.get_stats() if self.store is not None else None
+            }
+
+def _create_normalizer() -> Callable[[str], str]:
+    """Create the cache key normalizer configured in settings."""
+    if not settings.CACHE_KEY_NORMALIZE:
+        return _legacy_normalize
+    return QueryNormalizer(fold_accents=settings.CACHE_KEY_FOLD_DIACRITICS)
+
+def _create_store() -> Optional[SQLiteCacheStore]:
+    """Create the persistent cache tier if ``CACHE_PERSIST_PATH`` is set."""
+    if not settings.CACHE_PERSIST_PATH:
+        return None
+    try:
+        return SQLiteCacheStore(
+            settings.CACHE_PERSIST_PATH,
+            flush_interval=settings.CACHE_FLUSH_INTERVAL,
+            retention=max([settings.CACHE_GRACE, *settings.CACHE_TOOL_GRACE.values()])
+        )
+    except Exception as e:
+        logger.error(f"Failed to open persistent cache at {settings.CACHE_PERSIST_PATH}: {str(e)}")
+        return None
 
 # Initialize cache
-query_cache = QueryCache()
\ No newline at end of file
+query_cache = QueryCache(
+    store=_create_store(),
+    normalizer=_create_normalizer(),
+    tool_ttls=settings.CACHE_TOOL_TTLS,
+    tool_grace=settings.CACHE_TOOL_GRACE
+)
@@ -0,0 +1,200 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+
+# Initialize logger
+logger = logging.getLogger("mcp_server")
+
+class SQLiteCacheStore:
+    """Persistent second cache tier backed by a local SQLite file.
+
+    Reads go straight to SQLite (read-through), writes are buffered in memory
+    and flushed in batches by a background thread (write-behind), so the hot
+    path of ``QueryCache.set`` never waits on disk. Each row keeps a hit
+    counter so a restarted node can pre-load its hottest entries.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, purge_every: int = 60, retention: float = 0):
+        """
+        Initialize the store.
+
+        Args:
+            path: Path of the SQLite database file
+            flush_interval: Seconds between write-behind flushes
+            purge_every: Number of flushes between deletions of expired rows
+            retention: Seconds expired rows are kept so they can still be served stale
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.purge_every = purge_every
+        self.retention = retention
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS query_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_query_cache_hits ON query_cache (hits DESC)")
+        self._conn.commit()
+        self._conn_lock = threading.Lock()
+
+        self._pending_lock = threading.Lock()
+        self._pending_writes: Dict[str, Tuple[str, float]] = {}
+        self._pending_hits: Dict[str, int] = {}
+
+        self._flush_count = 0
+        self._stop = threading.Event()
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop,
+            name="query-cache-writer",
+            daemon=True
+        )
+        self._writer_thread.start()
+
+    def get(self, key: str, grace: float = 0) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Look up a key, including writes that have not been flushed yet.
+
+        Args:
+            key: Cache key
+            grace: Seconds past ``expires_at`` during which the row is still returned
+
+        Returns:
+            Optional[Tuple[Dict[str, Any], float]]: ``(value, expires_at)`` or None if not stored or expired
+        """
+        now = time.time()
+
+        with self._pending_lock:
+            pending = self._pending_writes.get(key)
+        if pending is not None:
+            raw_value, expires_at = pending
+        else:
+            with self._conn_lock:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM query_cache WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            raw_value, expires_at = row
+
+        if now > expires_at + grace:
+            return None
+        return json.loads(raw_value), expires_at
+
+    def put(self, key: str, value: Dict[str, Any], expires_at: float, raw_value: Optional[str] = None) -> None:
+        """Queue a write; it reaches disk on the next flush. ``raw_value`` skips re-serializing ``value``."""
+        if raw_value is None:
+            raw_value = json.dumps(value, ensure_ascii=False)
+        with self._pending_lock:
+            self._pending_writes[key] = (raw_value, expires_at)
+
+    def touch(self, key: str) -> None:
+        """Record a cache hit for ``key`` so warm start can rank it."""
+        with self._pending_lock:
+            self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+
+    def load_hottest(self, limit: int) -> List[Tuple[str, Dict[str, Any], float]]:
+        """
+        Load the most frequently hit live entries.
+
+        Args:
+            limit: Maximum number of entries to return
+
+        Returns:
+            List[Tuple[str, Dict[str, Any], float]]: ``(key, value, expires_at)`` ordered by expiry time
+        """
+        self.flush()
+        with self._conn_lock:
+            rows = self._conn.execute(
+                "SELECT key, value, expires_at FROM query_cache "
+                "WHERE expires_at > ? ORDER BY hits DESC LIMIT ?",
+                (time.time(), limit)
+            ).fetchall()
+
+        # Oldest expiry first so callers can append to a write-ordered expiry queue
+        rows.sort(key=lambda row: row[2])
+        return [(key, json.loads(raw_value), expires_at) for key, raw_value, expires_at in rows]
+
+    def flush(self) -> None:
+        """Write all pending entries and hit counts to disk."""
+        with self._pending_lock:
+            writes, self._pending_writes = self._pending_writes, {}
+            hits, self._pending_hits = self._pending_hits, {}
+
+        if not writes and not hits:
+            return
+
+        with self._conn_lock:
+            if writes:
+                self._conn.executemany(
+                    "INSERT INTO query_cache (key, value, expires_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                    [(key, raw_value, expires_at) for key, (raw_value, expires_at) in writes.items()]
+                )
+            if hits:
+                self._conn.executemany(
+                    "UPDATE query_cache SET hits = hits + ? WHERE key = ?",
+                    [(count, key) for key, count in hits.items()]
+                )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        with self._conn_lock:
+            cursor = self._conn.execute(
+                "DELETE FROM query_cache WHERE expires_at < ?", (time.time() - self.retention,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        """Drop all stored and pending entries."""
+        with self._pending_lock:
+            self._pending_writes.clear()
+            self._pending_hits.clear()
+        with self._conn_lock:
+            self._conn.execute("DELETE FROM query_cache")
+            self._conn.commit()
+
+    def _writer_loop(self) -> None:
+        """Flush pending writes every ``flush_interval`` seconds until closed."""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                self._flush_count += 1
+                if self._flush_count % self.purge_every == 0:
+                    removed = self.purge_expired()
+                    if removed:
+                        logger.info(f"Purged {removed} expired rows from persistent cache")
+            except Exception as e:
+                logger.error(f"Error flushing persistent cache: {str(e)}")
+
+    def close(self) -> None:
+        """Stop the writer thread, flush what is left and close the database."""
+        self._stop.set()
+        self._writer_thread.join(timeout=self.flush_interval + 5)
+        try:
+            self.flush()
+        finally:
+            with self._conn_lock:
+                self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics about the store."""
+        with self._pending_lock:
+            pending = len(self._pending_writes)
+        return {
+            "path": self.path,
+            "pending_writes": pending
+        }
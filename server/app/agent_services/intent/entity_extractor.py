@@ -0,0 +1,315 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, List, Tuple, Iterable
+
+from app.core.settings import settings
+from app.core.tickers import KNOWN_TICKERS, KNOWLEDGE_VALUES_INDUSTRIES, COMPANY_NAMES
+from app.agent_services.query_normalizer import QueryNormalizer
+
+# Initialize logger
+logger = logging.getLogger("mcp_server")
+
+# Financial metric phrases and the canonical name reported in financial_metrics
+FINANCIAL_METRICS = {
+    "doanh thu": "doanh thu",
+    "doanh thu thuần": "doanh thu",
+    "lợi nhuận": "lợi nhuận",
+    "lãi": "lợi nhuận",
+    "lợi nhuận sau thuế": "lợi nhuận sau thuế",
+    "lợi nhuận trước thuế": "lợi nhuận trước thuế",
+    "biên lợi nhuận": "biên lợi nhuận",
+    "thu nhập lãi thuần": "thu nhập lãi thuần",
+    "tổng thu nhập hoạt động": "tổng thu nhập hoạt động",
+    "eps": "EPS",
+    "roe": "ROE",
+    "roa": "ROA",
+    "p/e": "P/E",
+    "pe": "P/E",
+    "p/b": "P/B",
+    "pb": "P/B",
+    "cổ tức": "cổ tức",
+    "tổng tài sản": "tổng tài sản",
+    "vốn chủ sở hữu": "vốn chủ sở hữu",
+    "nợ xấu": "nợ xấu",
+    "dòng tiền": "dòng tiền",
+    "biên lãi ròng": "NIM",
+    "nim": "NIM",
+}
+
+# Phrases meaning "the whole year" (quarter 5 in the extraction schema)
+FULL_YEAR_PHRASES = ("cả năm", "năm tài chính", "doanh thu năm", "lợi nhuận năm")
+
+# Tickers that are also common words or abbreviations, with the preceding words
+# that rule the ticker out ("TP HCM" is the city). They only count when written
+# in capitals or right after a ticker cue such as "mã" or "cổ phiếu".
+AMBIGUOUS_TICKERS = {
+    "HCM": ("tp", "thanh pho"),
+    "VND": ("trieu", "ty", "nghin", "ngan", "dong"),
+    "GAS": ("binh",),
+}
+
+# Words announcing a stock code, accent-folded
+TICKER_CUES = ("ma", "co phieu", "cp", "ma ck", "ma co phieu", "ticker")
+
+_WORD = re.compile(r"\w+")
+
+# Periods relative to today; resolving them is left to the LLM
+RELATIVE_PERIOD_PHRASES = (
+    "năm nay", "năm ngoái", "năm trước", "năm sau", "năm tới", "năm gần nhất", "năm gần đây",
+    "quý này", "quý trước", "quý sau", "quý tới", "quý gần nhất", "quý gần đây", "cùng kỳ"
+)
+
+_QUARTER_TOKEN = re.compile(r"^q([1-4])$")
+_YEAR_TOKEN = re.compile(r"^(?:19|20)\d{2}$")
+
+class AhoCorasick:
+    """Multi-pattern string matcher (Aho-Corasick automaton).
+
+    All patterns are found in a single left-to-right pass over the text, so
+    matching cost is linear in the text length regardless of how many
+    patterns were added.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]):
+        """
+        Build the automaton.
+
+        Args:
+            patterns: ``(pattern, payload)`` pairs; the payload is returned with each match
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, Any]]] = [[]]
+
+        for pattern, payload in patterns:
+            node = 0
+            for ch in pattern:
+                next_node = self._goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][ch] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append((len(pattern), payload))
+
+        # Breadth-first pass to compute failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, Any]]:
+        """
+        Find every pattern occurrence in ``text``.
+
+        Returns:
+            List[Tuple[int, int, Any]]: ``(start, end, payload)`` for each match
+        """
+        matches = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, payload in self._output[node]:
+                matches.append((i - length + 1, i + 1, payload))
+        return matches
+
+def _load_company_codes(path: str) -> List[str]:
+    """Read the stock codes listed in companies.json, if the file is available."""
+    if not path or not os.path.exists(path):
+        return []
+    try:
+        with open(path, encoding="utf-8") as f:
+            return list(json.load(f).keys())
+    except Exception as e:
+        logger.warning(f"Failed to load company list from {path}: {str(e)}")
+        return []
+
+class EntityExtractor:
+    """Pre-extracts stock codes, company names, metrics and periods without the LLM.
+
+    Tickers (from the index and industry tables and companies.json), company
+    aliases and financial metric phrases are compiled into one Aho-Corasick
+    automaton over accent-folded text. Quarters and years are read from the
+    canonical ``q<n> <yyyy>`` tokens produced by ``QueryNormalizer``.
+    """
+
+    def __init__(self, companies_path: str = settings.COMPANIES_JSON_PATH):
+        """
+        Initialize the extractor.
+
+        Args:
+            companies_path: Path of companies.json with additional stock codes
+        """
+        self._normalizer = QueryNormalizer(fold_accents=True)
+        tickers = set(KNOWN_TICKERS) | set(_load_company_codes(companies_path))
+        for codes in KNOWLEDGE_VALUES_INDUSTRIES.values():
+            tickers.update(codes)
+
+        patterns = [(code.lower(), ("ticker", code)) for code in tickers]
+        for code, names in COMPANY_NAMES.items():
+            for name in names:
+                patterns.append((self._normalizer(name), ("company", code, names[0])))
+        for phrase, metric in FINANCIAL_METRICS.items():
+            patterns.append((self._normalizer(phrase), ("metric", metric)))
+        self._full_year = [self._normalizer(phrase) for phrase in FULL_YEAR_PHRASES]
+        self._relative_periods = [f" {self._normalizer(phrase)} " for phrase in RELATIVE_PERIOD_PHRASES]
+
+        self._automaton = AhoCorasick(patterns)
+        self._lock = threading.Lock()
+        self._stats = {"queries": 0, "prefilled": 0}
+        self._total_seconds = 0.0
+
+    @staticmethod
+    def _ambiguous_ticker_ok(code: str, text: str, start: int, query: str) -> bool:
+        """Whether an ambiguous ticker at ``text[start:]`` is meant as a stock code."""
+        previous = " ".join(_WORD.findall(text[:start])[-2:])
+        if any(previous == cue or previous.endswith(f" {cue}") for cue in TICKER_CUES):
+            return True
+        if not re.search(rf"(?<!\w){code}(?!\w)", query):
+            return False
+        last = previous.rsplit(" ", 1)[-1]
+        return not (last.isdigit() or last in AMBIGUOUS_TICKERS[code]
+                    or previous in AMBIGUOUS_TICKERS[code])
+
+    def _word_matches(self, text: str, query: str) -> List[Tuple[int, int, Any]]:
+        """Keep leftmost-longest matches that start and end on word boundaries."""
+        matches = []
+        for start, end, payload in self._automaton.find_all(text):
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            if payload[0] == "ticker" and payload[1] in AMBIGUOUS_TICKERS \
+                    and not self._ambiguous_ticker_ok(payload[1], text, start, query):
+                continue
+            matches.append((start, end, payload))
+
+        # Drop matches nested inside a longer one ("lợi nhuận" inside "lợi nhuận sau thuế")
+        matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        kept = []
+        covered_until = -1
+        for start, end, payload in matches:
+            if start >= covered_until:
+                kept.append((start, end, payload))
+                covered_until = end
+        return kept
+
+    def match(self, query: str) -> Dict[str, List[str]]:
+        """
+        Find the entities mentioned in a query, without defaults or statistics.
+
+        Args:
+            query: User query
+
+        Returns:
+            Dict[str, List[str]]: ``stock_codes``, ``company_names``, ``financial_metrics``,
+            ``quarter`` and ``year`` as found in the text (possibly empty)
+        """
+        return self._match(self._normalizer(query), query)
+
+    def _match(self, text: str, query: str) -> Dict[str, List[str]]:
+        """``match`` on an already normalized query."""
+        stock_codes: List[str] = []
+        company_names: List[str] = []
+        metrics: List[str] = []
+        for _, _, payload in self._word_matches(text, query):
+            kind = payload[0]
+            if kind in ("ticker", "company") and payload[1] not in stock_codes:
+                stock_codes.append(payload[1])
+            if kind == "company":
+                name = payload[2]
+            elif kind == "ticker":
+                # A bare ticker still reports the company's canonical name
+                name = COMPANY_NAMES.get(payload[1], [None])[0]
+            else:
+                name = None
+            if name is not None and name not in company_names:
+                company_names.append(name)
+            if kind == "metric" and payload[1] not in metrics:
+                metrics.append(payload[1])
+
+        quarters: List[str] = []
+        years: List[str] = []
+        for token in text.split():
+            quarter = _QUARTER_TOKEN.match(token)
+            if quarter and quarter.group(1) not in quarters:
+                quarters.append(quarter.group(1))
+            elif _YEAR_TOKEN.match(token) and token not in years:
+                years.append(token)
+        if any(phrase in text for phrase in self._full_year) and "5" not in quarters:
+            quarters.append("5")
+
+        return {
+            "stock_codes": stock_codes,
+            "company_names": company_names,
+            "financial_metrics": metrics,
+            "quarter": quarters,
+            "year": years
+        }
+
+    def extract(self, query: str) -> Optional[Dict[str, List[str]]]:
+        """
+        Extract entities from a query.
+
+        Args:
+            query: User query
+
+        Returns:
+            Optional[Dict[str, List[str]]]: ``stock_codes``, ``company_names``,
+            ``financial_metrics`` when a known metric matched and, when stated
+            explicitly, ``quarter`` and ``year``; None when no stock or company
+            was recognized and the LLM should do the full extraction. Metrics
+            outside ``FINANCIAL_METRICS`` and periods that are missing or
+            relative ("năm ngoái", "quý trước") are left out for the LLM to fill.
+        """
+        start_time = time.perf_counter()
+        text = self._normalizer(query)
+        entities = self._match(text, query)
+
+        result = None
+        if entities["stock_codes"]:
+            result = dict(entities)
+            padded = f" {text} "
+            relative = any(phrase in padded for phrase in self._relative_periods)
+            for field in ("quarter", "year"):
+                if relative or not result[field]:
+                    del result[field]
+            # The phrase list is short: with no match the query may still name a metric
+            if not result["financial_metrics"]:
+                del result["financial_metrics"]
+
+        with self._lock:
+            self._stats["queries"] += 1
+            if result is not None:
+                self._stats["prefilled"] += 1
+            self._total_seconds += time.perf_counter() - start_time
+
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the share of queries pre-filled locally and the average extraction cost."""
+        with self._lock:
+            queries = self._stats["queries"]
+            return {
+                **self._stats,
+                "prefilled_fraction": self._stats["prefilled"] / queries if queries else 0.0,
+                "avg_extract_microseconds": self._total_seconds / queries * 1e6 if queries else 0.0
+            }
+
+# Initialize entity extractor
+entity_extractor = EntityExtractor()
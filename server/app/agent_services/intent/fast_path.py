@@ -0,0 +1,150 @@
+import re
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+
+from app.core.settings import settings
+from app.core.tickers import KNOWN_TICKERS
+from app.agent_services.query_normalizer import QueryNormalizer
+
+# Initialize logger
+logger = logging.getLogger("mcp_server")
+
+# Keyword lexicons (accent-folded, lowercase). Each category maps to the
+# analyze_intent fields it implies. Longer phrases are matched first.
+CATEGORY_LEXICONS: Dict[str, Tuple[str, ...]] = {
+    "live": ("gia co phieu", "gia hien tai", "thi gia", "gia", "bao nhieu tien"),
+    "signal": ("tin hieu mua ban", "tin hieu mua", "tin hieu ban", "tin hieu", "diem mua", "diem ban",
+               "co nen mua", "co nen ban", "nen mua", "nen ban"),
+    "news": ("tin tuc moi nhat", "tin tuc", "tin moi", "su kien"),
+}
+
+CATEGORY_RESULTS: Dict[str, Dict[str, Any]] = {
+    "live": {"required_analysis": ["live"], "question_type": "SIMPLE", "main_intent": "Hỏi giá cổ phiếu"},
+    "signal": {"required_analysis": ["signal"], "question_type": "TECHNICAL", "main_intent": "Hỏi tín hiệu mua bán cổ phiếu"},
+    "news": {"required_analysis": ["news"], "question_type": "SENTIMENT", "main_intent": "Tìm tin tức về cổ phiếu"},
+}
+
+# Words that carry no intent of their own and may surround the keywords
+FILLER_WORDS = frozenset((
+    "ma", "co", "phieu", "cp", "cua", "la", "hom", "nay", "bay", "gio", "hien", "tai", "the", "nao",
+    "bao", "nhieu", "khong", "ko", "a", "vay", "nhe", "oi", "cho", "toi", "minh", "xem", "hoi",
+    "ve", "mo", "dong", "phien", "sang", "chieu", "moi", "nhat"
+))
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+class FastPathClassifier:
+    """Deterministic pre-classifier that answers trivial intent queries locally.
+
+    A query is answered without the LLM only when it names at least one known
+    ticker, matches exactly one keyword category, and every remaining word is
+    filler. Anything else -- comparisons, "why" questions, several categories,
+    unknown words -- falls through to the LLM.
+    """
+
+    def __init__(self, enabled: bool = settings.INTENT_FAST_PATH_ENABLED):
+        """
+        Initialize the classifier.
+
+        Args:
+            enabled: Whether ``classify`` may return results
+        """
+        self.enabled = enabled
+        self._normalizer = QueryNormalizer(fold_accents=True)
+        self._phrases: List[Tuple[List[str], str]] = sorted(
+            ((phrase.split(), category) for category, phrases in CATEGORY_LEXICONS.items() for phrase in phrases),
+            key=lambda item: -len(item[0])
+        )
+        self._lock = threading.Lock()
+        self._stats = {"queries": 0, "handled": 0}
+        self._local_seconds = 0.0
+        self._llm_latency_ema: Optional[float] = None
+
+    def _match(self, tokens: List[str]) -> Tuple[set, List[str], List[str]]:
+        """Return ``(categories, tickers, leftover_tokens)`` for a tokenized query."""
+        categories = set()
+        tickers = []
+        leftover = []
+        i = 0
+        while i < len(tokens):
+            for phrase, category in self._phrases:
+                if tokens[i:i + len(phrase)] == phrase:
+                    categories.add(category)
+                    i += len(phrase)
+                    break
+            else:
+                token = tokens[i]
+                if token.upper() in KNOWN_TICKERS:
+                    if token.upper() not in tickers:
+                        tickers.append(token.upper())
+                elif token not in FILLER_WORDS:
+                    leftover.append(token)
+                i += 1
+        return categories, tickers, leftover
+
+    def classify(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Classify a query locally.
+
+        Args:
+            query: User query
+
+        Returns:
+            Optional[Dict[str, Any]]: ``analyze_intent`` result, or None to fall back to the LLM
+        """
+        if not self.enabled:
+            return None
+
+        start_time = time.perf_counter()
+        tokens = _TOKEN_PATTERN.findall(self._normalizer(query))
+        categories, tickers, leftover = self._match(tokens)
+
+        result = None
+        if tickers and len(categories) == 1 and not leftover:
+            category = categories.pop()
+            template = CATEGORY_RESULTS[category]
+            result = {
+                "is_finance_related": True,
+                "needs_clarification": False,
+                "main_intent": f"{template['main_intent']} {', '.join(tickers)}",
+                "required_analysis": list(template["required_analysis"]),
+                "question_type": template["question_type"],
+                "stock_codes": tickers
+            }
+
+        with self._lock:
+            self._stats["queries"] += 1
+            if result is not None:
+                self._stats["handled"] += 1
+                self._local_seconds += time.perf_counter() - start_time
+
+        if result is not None:
+            logger.info(f"Intent fast path answered locally: {query}")
+        return result
+
+    def record_llm_latency(self, seconds: float) -> None:
+        """Feed the latency of an LLM intent call into the running average used for savings."""
+        with self._lock:
+            if self._llm_latency_ema is None:
+                self._llm_latency_ema = seconds
+            else:
+                self._llm_latency_ema = 0.9 * self._llm_latency_ema + 0.1 * seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the share of traffic answered locally and the estimated latency saved."""
+        with self._lock:
+            queries, handled = self._stats["queries"], self._stats["handled"]
+            llm_latency = self._llm_latency_ema or 0.0
+            return {
+                "enabled": self.enabled,
+                "queries": queries,
+                "handled": handled,
+                "handled_fraction": handled / queries if queries else 0.0,
+                "avg_llm_latency_seconds": llm_latency,
+                "latency_saved_seconds": max(handled * llm_latency - self._local_seconds, 0.0)
+            }
+
+# Initialize fast path classifier
+intent_fast_path = FastPathClassifier()
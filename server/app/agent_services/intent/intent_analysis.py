@@ -1,47 +1,91 @@
 import json
 import time
+import asyncio
 import logging
-from typing import Dict, Any
+from functools import partial
+from typing import Dict, Any, Optional, List, Tuple
 
-from app.agent_services.llm import llm
+from app.agent_services.model_router import model_router, LARGE
 from app.agent_services.cache import query_cache
+from app.agent_services.semantic_cache import semantic_cache
+from app.agent_services.singleflight import inflight_calls, async_inflight_calls
+from app.agent_services.response_parser import response_parser, ResponseParseError
+from app.agent_services.prompt_cache import cached_system_message
+from app.agent_services.intent.fast_path import intent_fast_path
+from app.agent_services.intent.entity_extractor import entity_extractor
+from app.agent_services.intent.prefetch import extraction_prefetcher
+from app.agent_services.intent.schemas import (
+    IntentResult, ExtractionResult, SearchQueryResult, AnalysisAndExtractionResult
+)
+from app.core.settings import settings
+from app.core.tracing import span
 from app.prompts.intent.intent_analysis import intent_prompt_template, INTENT_ANALYSIS
-from app.prompts.intent.information_extraction import info_prompt_template, INFORMATION_EXTRACTION
+from app.prompts.intent.information_extraction import (
+    info_prompt_template, INFORMATION_EXTRACTION, search_query_prompt_template, SEARCH_QUERY_GENERATION
+)
+from app.prompts.intent.analyze_and_extract import analyze_extract_prompt_template, ANALYZE_AND_EXTRACT
 
 # Initialize logger
 logger = logging.getLogger("mcp_server")
 
-def perform_intent_analysis(query: str) -> Dict[str, Any]:
-    """Analyze user intent."""
-    tool_name = "analyze_intent"
-    
-    # Check cache first
-    cached_result = query_cache.get(tool_name, query)
-    if cached_result is not None:
-        logger.info(f"Using cached result for intent analysis: {query}")
-        return cached_result
-    
-    logger.info(f"Cache miss, performing intent analysis for: {query}")
-    analysis_start_time = time.time()
-    
-    try:
-        system_prompt = INTENT_ANALYSIS
-        user_prompt = intent_prompt_template.format(query=query)
-        
-        response = llm.invoke([
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ])
-        
-        response_text = response.content
-        
-        try:
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            logger.warning("Failed to parse JSON from intent analysis response, retrying with simplified prompt")
-            
-            # Retry with a more explicit prompt for JSON formatting
-            retry_prompt = f"""
+# Fields of the fused result that belong to each single-purpose tool
+INTENT_FIELDS = ("is_finance_related", "needs_clarification", "main_intent", "required_analysis",
+                 "question_type", "stock_codes")
+EXTRACTION_FIELDS = ("stock_codes", "company_names", "financial_metrics", "quarter", "year",
+                     "search_live_query", "search_rag_query", "search_news_query")
+
+def _get_similar(tool_name: str, query: str) -> Optional[Dict[str, Any]]:
+    """Look up a near-duplicate query and promote its result to the exact cache."""
+    similar = semantic_cache.get(tool_name, query)
+    if similar is None:
+        return None
+    result, expires_at = similar
+    # Keep the original expiry so promotion does not extend the answer's lifetime
+    query_cache.set(tool_name, query, result, ttl=expires_at - time.time())
+    return result
+
+def _flight_key(tool_name: str, query: str) -> tuple:
+    """Key under which identical concurrent calls are collapsed (same as the cache key)."""
+    return (tool_name, query_cache.normalizer(query))
+
+def _get_cached(tool_name: str, query: str, refresh) -> Optional[Dict[str, Any]]:
+    """Check the exact and semantic caches; stale entries are refreshed in the background."""
+    with span("cache_lookup", tool=tool_name) as stage:
+        cached_result = query_cache.get(tool_name, query, refresh=refresh)
+        if cached_result is None:
+            cached_result = _get_similar(tool_name, query)
+        if stage is not None:
+            stage.attributes["hit"] = cached_result is not None
+    return cached_result
+
+async def _off_loop(fn, *args):
+    """
+    Run cache work from an async tool without stalling the event loop.
+
+    SQLite reads of the persistent tier and the semantic cache's similarity scan
+    can block, so when either is enabled ``fn`` runs in a worker thread.
+    """
+    if query_cache.store is not None or semantic_cache.enabled:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+def _store_result(tool_name: str, query: str, result: Dict[str, Any]) -> None:
+    """Cache a freshly computed result."""
+    with span("cache_store", tool=tool_name):
+        query_cache.set(tool_name, query, result)
+        semantic_cache.add(tool_name, query, result)
+
+def _intent_messages(query: str) -> List[Dict[str, str]]:
+    """Build the intent analysis prompt."""
+    return [
+        cached_system_message(INTENT_ANALYSIS),
+        {"role": "user", "content": intent_prompt_template.format(query=query)}
+    ]
+
+def _intent_retry_messages(query: str) -> List[Dict[str, str]]:
+    """Build the intent analysis prompt used after a JSON parse failure."""
+    # Retry with a more explicit prompt for JSON formatting
+    retry_prompt = f"""
             Phân tích câu hỏi về tài chính và trả về CHÍNH XÁC định dạng JSON sau:
 
             Câu hỏi: {query}
@@ -59,97 +103,322 @@ def perform_intent_analysis(query: str) -> Dict[str, Any]:
             }}
             CHÚ Ý: Chỉ trả về JSON thuần túy, không có văn bản khác.
             """
-            
-            retry_response = llm.invoke([
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": retry_prompt}
-            ])
-            
-            result = json.loads(retry_response.content)
-        
-        # Cache the result
-        query_cache.set(tool_name, query, result)
-        
-        analysis_time = time.time() - analysis_start_time
-        logger.info(f"Intent analysis completed in {analysis_time:.2f} seconds")
-        
+    return [
+        cached_system_message(INTENT_ANALYSIS),
+        {"role": "user", "content": retry_prompt}
+    ]
+
+def _default_intent_result(error: Exception) -> Dict[str, Any]:
+    """Result returned when intent analysis fails."""
+    return {
+        "is_finance_related": False,
+        "needs_clarification": True,
+        "main_intent": f"Error analyzing intent: {str(error)}",
+        "required_analysis": [],
+        "question_type": "SIMPLE",
+        "stock_codes": []
+    }
+
+def _extraction_messages(query: str) -> List[Dict[str, str]]:
+    """Build the information extraction prompt (also used for the retry)."""
+    return [
+        cached_system_message(INFORMATION_EXTRACTION),
+        {"role": "user", "content": info_prompt_template.format(query=query)}
+    ]
+
+def _extraction_request(query: str) -> Tuple[List[Dict[str, str]], Optional[Dict[str, List[str]]]]:
+    """
+    Build the extraction prompt, pre-filling entities locally when possible.
+
+    Returns:
+        Tuple[List[Dict[str, str]], Optional[Dict[str, List[str]]]]: Messages for the LLM
+        and the pre-extracted fields, or None when the LLM must extract everything
+    """
+    prefilled = entity_extractor.extract(query) if settings.INFO_PREEXTRACT_ENABLED else None
+    if prefilled is None:
+        return _extraction_messages(query), None
+
+    # The LLM only has to write the search queries
+    messages = [
+        cached_system_message(SEARCH_QUERY_GENERATION),
+        {"role": "user", "content": search_query_prompt_template.format(
+            query=query, entities=json.dumps(prefilled, ensure_ascii=False)
+        )}
+    ]
+    return messages, prefilled
+
+def _merge_prefilled(prefilled: Optional[Dict[str, List[str]]], result: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine pre-extracted entities with the LLM's output; non-empty LLM fields take precedence."""
+    if prefilled is None:
         return result
+    merged = {**_default_extraction_result(), **prefilled}
+    for field in merged:
+        if result.get(field):
+            merged[field] = result[field]
+    return merged
+
+def _default_extraction_result() -> Dict[str, Any]:
+    """Result returned when information extraction fails."""
+    return {
+        "stock_codes": [],
+        "company_names": [],
+        "financial_metrics": [],
+        "quarter": [],
+        "year": [],
+        "search_live_query": [],
+        "search_rag_query": [],
+        "search_news_query": []
+    }
+
+class _LLMRequest:
+    """Prompt, parsing, retry, caching and fallback of one LLM-backed tool run.
+
+    Shared by ``_call_llm`` and ``_call_llm_async``, which only differ in how
+    the model is called.
+    """
+
+    # Name of each tool's work in log messages
+    LABELS = {
+        "analyze_intent": "intent analysis",
+        "extract_information": "information extraction",
+        "analyze_and_extract": "analysis and extraction",
+    }
+
+    def __init__(self, tool_name: str, query: str):
+        self.tool_name = tool_name
+        self.query = query
+        self.label = self.LABELS[tool_name]
+        self.prefilled: Optional[Dict[str, List[str]]] = None
+        logger.info(f"Cache miss, performing {self.label} for: {query}")
+        self.start_time = time.time()
+
+    def prepare(self) -> None:
+        """Build the prompt and parser."""
+        with span("prompt_format"):
+            if self.tool_name == "analyze_intent":
+                self.messages = _intent_messages(self.query)
+                self.retry_messages = _intent_retry_messages(self.query)
+                schema = IntentResult
+            elif self.tool_name == "extract_information":
+                self.messages, self.prefilled = _extraction_request(self.query)
+                self.retry_messages = self.messages
+                schema = ExtractionResult if self.prefilled is None else SearchQueryResult
+            else:
+                self.messages = self.retry_messages = _fused_messages(self.query)
+                schema = AnalysisAndExtractionResult
+        self.parse = partial(response_parser.parse, self.tool_name, schema=schema)
+
+    def retry(self) -> List[Dict[str, str]]:
+        """Record a retry after an unparseable response and return its prompt."""
+        # Only responses that cannot be repaired locally cost another LLM call
+        logger.warning(f"Failed to parse JSON from {self.label} response, retrying")
+        response_parser.record_retry(self.tool_name)
+        return self.retry_messages
+
+    def complete(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache a parsed result and return it."""
+        if self.tool_name == "analyze_and_extract":
+            _store_fused_result(self.query, result)
+        else:
+            if self.tool_name == "extract_information":
+                result = _merge_prefilled(self.prefilled, result)
+            _store_result(self.tool_name, self.query, result)
+
+        elapsed = time.time() - self.start_time
+        if self.tool_name == "analyze_intent":
+            intent_fast_path.record_llm_latency(elapsed)
+        logger.info(f"{self.label.capitalize()} completed in {elapsed:.2f} seconds")
+        return result
+
+    def fail(self, error: Exception) -> Dict[str, Any]:
+        """Log a failed run and return the tool's default result."""
+        logger.error(f"Error in {self.label}: {str(error)}")
+        logger.error(f"{self.label.capitalize()} failed after {time.time() - self.start_time:.2f} seconds")
+        return default_tool_result(self.tool_name, error)
+
+def _call_llm(tool_name: str, query: str) -> Dict[str, Any]:
+    """Run a tool on the LLM, retrying once on an unparseable response, and cache the result."""
+    request = _LLMRequest(tool_name, query)
+    try:
+        request.prepare()
+        try:
+            result = model_router.invoke(query, request.messages, request.parse)
+        except ResponseParseError:
+            with span("retry"):
+                result = request.parse(model_router.invoke_tier(LARGE, request.retry()).content)
+        return request.complete(result)
+    except Exception as e:
+        return request.fail(e)
+
+async def _call_llm_async(tool_name: str, query: str) -> Dict[str, Any]:
+    """Async counterpart of ``_call_llm`` bounded by ``llm_limiter``."""
+    request = _LLMRequest(tool_name, query)
+    try:
+        request.prepare()
+        try:
+            result = await model_router.ainvoke(query, request.messages, request.parse)
+        except ResponseParseError:
+            with span("retry"):
+                result = request.parse((await model_router.ainvoke_tier(LARGE, request.retry())).content)
+        return await _off_loop(request.complete, result)
     except Exception as e:
-        logger.error(f"Error in intent analysis: {str(e)}")
-        analysis_time = time.time() - analysis_start_time
-        logger.error(f"Analysis failed after {analysis_time:.2f} seconds")
-        
-        # Return default result in case of error
-        default_result = {
-            "is_finance_related": False,
-            "needs_clarification": True,
-            "main_intent": f"Error analyzing intent: {str(e)}",
-            "required_analysis": [],
-            "question_type": "SIMPLE",
-            "stock_codes": []
-        }
-        
-        return default_result
+        return request.fail(e)
+
+def perform_intent_analysis(query: str) -> Dict[str, Any]:
+    """Analyze user intent."""
+    tool_name = "analyze_intent"
+
+    # Trivial queries are classified locally without the LLM
+    with span("fast_path"):
+        local_result = intent_fast_path.classify(query)
+    if local_result is not None:
+        return local_result
+
+    cached_result = _get_cached(tool_name, query, refresh=lambda: _run_intent_analysis(query))
+    if cached_result is not None:
+        logger.info(f"Using cached result for intent analysis: {query}")
+        return cached_result
+
+    return _run_intent_analysis(query)
+
+async def perform_intent_analysis_async(query: str) -> Dict[str, Any]:
+    """Analyze user intent using the LLM client's async API."""
+    tool_name = "analyze_intent"
+
+    # Trivial queries are classified locally without the LLM
+    with span("fast_path"):
+        local_result = intent_fast_path.classify(query)
+    if local_result is not None:
+        _prefetch_extraction(query)
+        return local_result
+
+    cached_result = await _off_loop(_get_cached, tool_name, query, lambda: _run_intent_analysis(query))
+    if cached_result is not None:
+        logger.info(f"Using cached result for intent analysis: {query}")
+        if cached_result.get("is_finance_related"):
+            _prefetch_extraction(query)
+        return cached_result
+
+    # Speculatively extract information while the intent call is on the LLM
+    _prefetch_extraction(query)
+
+    # Concurrent callers with the same key share one LLM call
+    with span("inflight_call"):
+        result = await async_inflight_calls.do(_flight_key(tool_name, query), lambda: _call_llm_async("analyze_intent", query))
+    if not result.get("is_finance_related"):
+        extraction_prefetcher.cancel(_flight_key("extract_information", query))
+    return result
+
+def _prefetch_extraction(query: str) -> None:
+    """Start extract_information in the background unless its result is already cached."""
+    if extraction_prefetcher.enabled and not query_cache.contains("extract_information", query):
+        extraction_prefetcher.start(
+            _flight_key("extract_information", query),
+            lambda: perform_information_extraction_async(query)
+        )
+
+def _run_intent_analysis(query: str) -> Dict[str, Any]:
+    """Run intent analysis, sharing the LLM call with concurrent identical callers."""
+    return inflight_calls.do(_flight_key("analyze_intent", query), lambda: _call_llm("analyze_intent", query))
 
 def perform_information_extraction(query: str) -> Dict[str, Any]:
     """Extract information from user query."""
     tool_name = "extract_information"
-    
-    # Check cache first
-    cached_result = query_cache.get(tool_name, query)
+
+    cached_result = _get_cached(tool_name, query, refresh=lambda: _run_information_extraction(query))
     if cached_result is not None:
         logger.info(f"Using cached result for information extraction: {query}")
         return cached_result
-    
-    logger.info(f"Cache miss, performing information extraction for: {query}")
-    extraction_start_time = time.time()
-    
-    try:
-        system_prompt = INFORMATION_EXTRACTION
-        user_prompt = info_prompt_template.format(query=query)
-        
-        response = llm.invoke([
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ])
-        
-        response_text = response.content
-        
-        try:
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            logger.warning("Failed to parse JSON from information extraction response, retrying")
-            
-            # Retry with a more explicit prompt
-            retry_response = llm.invoke([
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ])
-            
-            result = json.loads(retry_response.content)
-        
-        # Cache the result
-        query_cache.set(tool_name, query, result)
-        
-        extraction_time = time.time() - extraction_start_time
-        logger.info(f"Information extraction completed in {extraction_time:.2f} seconds")
-        
-        return result
-    except Exception as e:
-        logger.error(f"Error in information extraction: {str(e)}")
-        extraction_time = time.time() - extraction_start_time
-        logger.error(f"Extraction failed after {extraction_time:.2f} seconds")
-        
-        # Return default result in case of error
-        default_result = {
-            "stock_codes": [],
-            "company_names": [],
-            "financial_metrics": [],
-            "quarter": [],
-            "year": [],
-            "search_live_query": [],
-            "search_rag_query": [],
-            "search_news_query": []
-        }
-        
-        return default_result
+
+    return _run_information_extraction(query)
+
+async def perform_information_extraction_async(query: str) -> Dict[str, Any]:
+    """Extract information from user query using the LLM client's async API."""
+    tool_name = "extract_information"
+
+    cached_result = await _off_loop(_get_cached, tool_name, query, lambda: _run_information_extraction(query))
+    if cached_result is not None:
+        logger.info(f"Using cached result for information extraction: {query}")
+        return cached_result
+
+    # Concurrent callers with the same key share one LLM call
+    with span("inflight_call"):
+        return await async_inflight_calls.do(_flight_key(tool_name, query), lambda: _call_llm_async("extract_information", query))
+
+def _run_information_extraction(query: str) -> Dict[str, Any]:
+    """Run information extraction, sharing the LLM call with concurrent identical callers."""
+    return inflight_calls.do(_flight_key("extract_information", query), lambda: _call_llm("extract_information", query))
+
+def _fused_messages(query: str) -> List[Dict[str, str]]:
+    """Build the combined analyze-and-extract prompt (also used for the retry)."""
+    return [
+        cached_system_message(ANALYZE_AND_EXTRACT),
+        {"role": "user", "content": analyze_extract_prompt_template.format(query=query)}
+    ]
+
+def _default_fused_result(error: Exception) -> Dict[str, Any]:
+    """Result returned when the combined call fails."""
+    return {**_default_extraction_result(), **_default_intent_result(error)}
+
+def default_tool_result(tool_name: str, error: Exception) -> Dict[str, Any]:
+    """
+    Result a tool returns when it fails or runs out of time.
+
+    Args:
+        tool_name: Name of the tool
+        error: Cause of the failure
+
+    Returns:
+        Dict[str, Any]: The tool's default result
+    """
+    if tool_name == "analyze_intent":
+        return _default_intent_result(error)
+    if tool_name == "extract_information":
+        return _default_extraction_result()
+    return _default_fused_result(error)
+
+def _store_fused_result(query: str, result: Dict[str, Any]) -> None:
+    """Cache a fused result and fill the single-tool entries so older clients also hit."""
+    _store_result("analyze_and_extract", query, result)
+    _store_result("analyze_intent", query, {k: result[k] for k in INTENT_FIELDS if k in result})
+    _store_result("extract_information", query, {k: result[k] for k in EXTRACTION_FIELDS if k in result})
+
+def _get_cached_fused(query: str) -> Optional[Dict[str, Any]]:
+    """Check the fused entry, or compose it from two cached single-tool results."""
+    cached_result = _get_cached("analyze_and_extract", query, refresh=lambda: _run_analysis_and_extraction(query))
+    if cached_result is not None:
+        return cached_result
+
+    intent = query_cache.get("analyze_intent", query)
+    if intent is None:
+        return None
+    extraction = query_cache.get("extract_information", query)
+    if extraction is None:
+        return None
+    return {**extraction, **intent}
+
+def perform_analysis_and_extraction(query: str) -> Dict[str, Any]:
+    """Analyze intent and extract information with a single LLM call."""
+    cached_result = _get_cached_fused(query)
+    if cached_result is not None:
+        logger.info(f"Using cached result for analysis and extraction: {query}")
+        return cached_result
+
+    return _run_analysis_and_extraction(query)
+
+async def perform_analysis_and_extraction_async(query: str) -> Dict[str, Any]:
+    """Analyze intent and extract information with a single async LLM call."""
+    cached_result = await _off_loop(_get_cached_fused, query)
+    if cached_result is not None:
+        logger.info(f"Using cached result for analysis and extraction: {query}")
+        return cached_result
+
+    # Concurrent callers with the same key share one LLM call
+    with span("inflight_call"):
+        return await async_inflight_calls.do(
+            _flight_key("analyze_and_extract", query), lambda: _call_llm_async("analyze_and_extract", query)
+        )
+
+def _run_analysis_and_extraction(query: str) -> Dict[str, Any]:
+    """Run the combined call, sharing it with concurrent identical callers."""
+    return inflight_calls.do(_flight_key("analyze_and_extract", query), lambda: _call_llm("analyze_and_extract", query))
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.agent_services.llm import LLMConcurrencyLimiter, llm_limiter
+from app.core.deadline import set_deadline
+from app.core.settings import settings
+from app.core.tracing import detach
+
+# Initialize logger
+logger = logging.getLogger("mcp_server")
+
+class SpeculativePrefetcher:
+    """Runs likely follow-up tool calls in the background before they are requested.
+
+    Used to start ``extract_information`` while ``analyze_intent`` is still on
+    the LLM. The prefetched result lands in the cache, and a follow-up call
+    that arrives while the prefetch runs joins it through single-flight.
+    Speculative work has its own concurrency cap: when the cap is reached new
+    prefetches are skipped rather than queued. Prefetches bypass admission
+    control but share the LLM concurrency limiter with real requests, so they
+    are also skipped while the limiter has no free slot or calls waiting for
+    one; a prefetch that is already running still holds its slot until it
+    finishes or is cancelled. Prefetches that turn out to be useless can be
+    cancelled.
+    """
+
+    def __init__(self, enabled: bool = settings.EXTRACTION_PREFETCH_ENABLED,
+                 max_concurrency: int = settings.EXTRACTION_PREFETCH_MAX_CONCURRENCY,
+                 limiter: Optional[LLMConcurrencyLimiter] = None):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            enabled: Whether ``start`` launches any work
+            max_concurrency: Maximum number of prefetches running at once
+            limiter: LLM concurrency limiter the prefetched calls go through
+        """
+        self.enabled = enabled
+        self.max_concurrency = max_concurrency
+        self.limiter = limiter
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._stats = {"started": 0, "skipped_busy": 0, "skipped_llm_busy": 0,
+                       "completed": 0, "cancelled": 0, "failed": 0}
+
+    def _llm_busy(self) -> bool:
+        """Whether a prefetch would take an LLM slot a real request needs."""
+        if self.limiter is None:
+            return False
+        return self.limiter.waiting > 0 or self.limiter.in_flight >= self.limiter.max_concurrency
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Start ``fn()`` in the background unless a prefetch for ``key`` is running, the cap is reached or the LLM is busy.
+
+        Args:
+            key: Identity of the prefetched call
+            fn: Zero-argument coroutine function performing the work
+
+        Returns:
+            bool: Whether a prefetch was started
+        """
+        if not self.enabled or key in self._tasks:
+            return False
+        if len(self._tasks) >= self.max_concurrency:
+            self._stats["skipped_busy"] += 1
+            return False
+        if self._llm_busy():
+            self._stats["skipped_llm_busy"] += 1
+            return False
+
+        self._stats["started"] += 1
+        self._tasks[key] = asyncio.get_running_loop().create_task(self._run(key, fn))
+        return True
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> None:
+        # Speculative work is not part of the request that triggered it: no trace, no deadline
+        detach()
+        set_deadline(None)
+        try:
+            await fn()
+            self._stats["completed"] += 1
+        except asyncio.CancelledError:
+            self._stats["cancelled"] += 1
+            logger.info(f"Cancelled speculative prefetch for {key}")
+        except Exception as e:
+            self._stats["failed"] += 1
+            logger.error(f"Speculative prefetch for {key} failed: {str(e)}")
+        finally:
+            self._tasks.pop(key, None)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel a running prefetch; returns whether one was running."""
+        task = self._tasks.get(key)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get prefetch counts and the number currently running."""
+        return {
+            "enabled": self.enabled,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": len(self._tasks),
+            **self._stats
+        }
+
+# Initialize extraction prefetcher
+extraction_prefetcher = SpeculativePrefetcher(limiter=llm_limiter)
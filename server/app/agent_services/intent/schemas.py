@@ -0,0 +1,46 @@
+from typing import List
+from pydantic import BaseModel, ConfigDict
+
+# Result schemas for the LLM-backed intent tools. Unknown fields are kept and
+# numbers are accepted where strings are expected (e.g. "quarter": [1, 2]).
+class IntentResult(BaseModel):
+    model_config = ConfigDict(extra="allow", coerce_numbers_to_str=True)
+
+    is_finance_related: bool
+    needs_clarification: bool
+    main_intent: str
+    required_analysis: List[str]
+    question_type: str
+    stock_codes: List[str] = []
+
+class ExtractionResult(BaseModel):
+    model_config = ConfigDict(extra="allow", coerce_numbers_to_str=True)
+
+    stock_codes: List[str]
+    company_names: List[str] = []
+    financial_metrics: List[str] = []
+    quarter: List[str]
+    year: List[str]
+    search_live_query: List[str]
+    search_rag_query: List[str]
+    search_news_query: List[str]
+
+class SearchQueryResult(BaseModel):
+    model_config = ConfigDict(extra="allow", coerce_numbers_to_str=True)
+
+    search_live_query: List[str]
+    search_rag_query: List[str]
+    search_news_query: List[str]
+    # Only asked for when the metrics or the period could not be pre-extracted
+    financial_metrics: List[str] = []
+    quarter: List[str] = []
+    year: List[str] = []
+
+class AnalysisAndExtractionResult(IntentResult):
+    company_names: List[str] = []
+    financial_metrics: List[str] = []
+    quarter: List[str]
+    year: List[str]
+    search_live_query: List[str]
+    search_rag_query: List[str]
+    search_news_query: List[str]
@@ -1,53 +1,298 @@
+import time
+import asyncio
 import logging
-from langchain_openai import ChatOpenAI
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
 from app.core.settings import settings
+from app.core.tracing import span
+from app.agent_services.llm_backends import HedgedLLM
+from app.agent_services.prompt_cache import PromptCachingLLM
 
 # Initialize logger
 logger = logging.getLogger("mcp_server")
 
-def get_llm():
-    """Create and return a language model."""
+def get_llm(bedrock_model_id: Optional[str] = None, openai_model: Optional[str] = None):
+    """
+    Create and return a language model.
+
+    Bedrock is the primary backend and OpenAI the secondary. When both are
+    configured they are wrapped in a ``HedgedLLM`` so calls fail over at
+    runtime once Bedrock's circuit opens, not only at import time. Duplicate
+    (hedged) requests to OpenAI are only sent with ``LLM_HEDGING_ENABLED``.
+
+    Args:
+        bedrock_model_id: Bedrock model to use, defaults to ``BEDROCK_MODEL_ID``
+        openai_model: OpenAI model to use, defaults to ``OPENAI_MODEL``
+    """
+    bedrock_model_id = bedrock_model_id or settings.BEDROCK_MODEL_ID
+    openai_model = openai_model or settings.OPENAI_MODEL
+    backends = []
+
     # Prioritize Bedrock if available
     if settings.BEDROCK_REGION:
         try:
             from langchain_aws import ChatBedrockConverse
             import boto3
             
+            from botocore.config import Config
+            
+            # Bound how long a hung call can hold an executor thread. boto3 takes
+            # no per-call deadline, so all attempts together must fit in one
+            # tool call's budget; the thread outlives a cancelled request otherwise
+            read_timeout = settings.BEDROCK_READ_TIMEOUT
+            if settings.TOOL_CALL_TIMEOUT:
+                read_timeout = min(read_timeout, settings.TOOL_CALL_TIMEOUT / max(settings.BEDROCK_MAX_ATTEMPTS, 1))
             bedrock_client = boto3.client(
                 service_name="bedrock-runtime",
-                region_name=settings.BEDROCK_REGION
+                region_name=settings.BEDROCK_REGION,
+                config=Config(
+                    read_timeout=read_timeout,
+                    retries={"max_attempts": settings.BEDROCK_MAX_ATTEMPTS, "mode": "standard"}
+                )
             )
             
-            logger.info(f"Initializing AWS Bedrock model: {settings.BEDROCK_MODEL_ID}")
+            logger.info(f"Initializing AWS Bedrock model: {bedrock_model_id}")
             
-            return ChatBedrockConverse(
+            backends.append(("bedrock", PromptCachingLLM(ChatBedrockConverse(
                 client=bedrock_client,
-                model=settings.BEDROCK_MODEL_ID,
+                model=bedrock_model_id,
                 temperature=0
-            )
+            ), "bedrock")))
         except Exception as e:
             logger.warning(f"Failed to initialize Bedrock model, falling back to OpenAI: {str(e)}")
     
-    # Fallback to OpenAI
-    try:
-        if not settings.OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-        
-        logger.info(f"Initializing OpenAI model: {settings.OPENAI_MODEL}")
-        
-        return ChatOpenAI(
-            model=settings.OPENAI_MODEL,
-            temperature=0,
-            api_key=settings.OPENAI_API_KEY
-        )
-    except Exception as e:
-        logger.error(f"Failed to initialize OpenAI model: {str(e)}")
-        raise
-
-# Initialize LLM
-try:
-    llm = get_llm()
-    logger.info("Successfully initialized LLM model")
-except Exception as e:
-    logger.error(f"Failed to initialize LLM model: {str(e)}")
-    llm = None
\ No newline at end of file
+    # OpenAI as secondary backend
+    if settings.OPENAI_API_KEY:
+        try:
+            from langchain_openai import ChatOpenAI
+
+            logger.info(f"Initializing OpenAI model: {openai_model}")
+            
+            backends.append(("openai", PromptCachingLLM(ChatOpenAI(
+                model=openai_model,
+                temperature=0,
+                api_key=settings.OPENAI_API_KEY
+            ), "openai")))
+        except Exception as e:
+            logger.error(f"Failed to initialize OpenAI model: {str(e)}")
+
+    if not backends:
+        raise ValueError("No LLM backend available: Bedrock failed to initialize and OPENAI_API_KEY is not set")
+    if len(backends) == 1:
+        return backends[0][1]
+    return HedgedLLM(backends)
+
+class LLMConcurrencyLimiter:
+    """Caps the number of concurrent async LLM calls.
+
+    Used as ``async with llm_limiter:`` around ``llm.ainvoke``. Callers beyond
+    the cap queue on a semaphore; the queue depth and the time spent waiting
+    are recorded so saturation is visible instead of silent.
+
+    Only OpenAI has a native async client. ``ChatBedrockConverse`` has no
+    ``_agenerate``, so a Bedrock ``ainvoke`` still runs the blocking boto3 call
+    in the loop's default executor; for Bedrock this cap together with
+    ``LLM_EXECUTOR_WORKERS`` (the executor's size) is what bounds the calls.
+    """
+
+    def __init__(self, max_concurrency: int):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_concurrency: Maximum number of LLM calls in flight at once
+        """
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def __aenter__(self):
+        # Created lazily so the semaphore belongs to the server's event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.waiting += 1
+        wait_start = time.perf_counter()
+        try:
+            with span("llm_queue"):
+                await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        wait_time = time.perf_counter() - wait_start
+        self.in_flight += 1
+        self.acquired += 1
+        self.total_wait += wait_time
+        self.max_wait = max(self.max_wait, wait_time)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and wait-time statistics."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "acquired": self.acquired,
+            "avg_wait_seconds": self.total_wait / self.acquired if self.acquired else 0.0,
+            "max_wait_seconds": self.max_wait
+        }
+
+class LLMExecutor(ThreadPoolExecutor):
+    """Thread pool for blocking SDK calls that counts queued and running work.
+
+    Installed as the event loop's default executor, so it runs Bedrock
+    ``ainvoke`` calls and every ``asyncio.to_thread`` job. ``queued`` above
+    zero means all ``max_workers`` threads are busy.
+    """
+
+    def __init__(self, max_workers: int):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Number of worker threads
+        """
+        super().__init__(max_workers=max_workers, thread_name_prefix="llm-call")
+        self.max_workers = max_workers
+        self.queued = 0
+        self.running = 0
+        self._count_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._count_lock:
+            self.queued += 1
+
+        def run():
+            with self._count_lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._count_lock:
+                    self.running -= 1
+
+        future = super().submit(run)
+        future.add_done_callback(self._discard_cancelled)
+        return future
+
+    def _discard_cancelled(self, future) -> None:
+        # A job cancelled while still queued never runs
+        if future.cancelled():
+            with self._count_lock:
+                self.queued -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the worker count, busy threads and jobs waiting for a thread."""
+        with self._count_lock:
+            return {"max_workers": self.max_workers, "busy": self.running, "queue_depth": self.queued}
+
+def create_llm_executor() -> LLMExecutor:
+    """Build the executor for blocking SDK calls and keep it for ``llm_executor_stats``."""
+    global _llm_executor
+    _llm_executor = LLMExecutor(settings.LLM_EXECUTOR_WORKERS)
+    return _llm_executor
+
+def llm_executor_stats() -> Optional[Dict[str, Any]]:
+    """Stats of the executor made by ``create_llm_executor``, or None before the server has started."""
+    return _llm_executor.get_stats() if _llm_executor is not None else None
+
+class LazyLLM:
+    """Defers building a chat model until its first call.
+
+    Importing the Bedrock and OpenAI SDKs and creating their clients takes
+    seconds, so doing it at import time delays every cold start. The model is
+    built on first use (or by ``warm_up`` in the background) under a lock; a
+    failed build is remembered and re-raised instead of retried on every call.
+    """
+
+    def __init__(self, factory: Callable[[], Any], name: str):
+        """
+        Initialize the wrapper.
+
+        Args:
+            factory: Function building the model, e.g. ``get_llm``
+            name: Name used in log messages
+        """
+        self.factory = factory
+        self.name = name
+        self.instance: Optional[Any] = None
+        self.error: Optional[Exception] = None
+        self.build_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """False once building the model has failed."""
+        return self.error is None
+
+    def get(self) -> Any:
+        """
+        Return the model, building it on the first call.
+
+        Raises:
+            Exception: The error of a failed build
+        """
+        if self.instance is None:
+            with self._lock:
+                if self.instance is None and self.error is None:
+                    start_time = time.perf_counter()
+                    try:
+                        self.instance = self.factory()
+                        self.build_seconds = time.perf_counter() - start_time
+                        logger.info(f"Successfully initialized {self.name} LLM model in {self.build_seconds:.2f}s")
+                    except Exception as e:
+                        self.error = e
+                        logger.error(f"Failed to initialize {self.name} LLM model: {str(e)}")
+        if self.error is not None:
+            raise self.error
+        return self.instance
+
+    def warm_up(self) -> None:
+        """Build the model ahead of the first call, logging instead of raising on failure."""
+        try:
+            self.get()
+        except Exception:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the build state (``pending``, ``ready`` or ``failed``) and build time."""
+        state = "failed" if self.error is not None else "ready" if self.instance is not None else "pending"
+        return {"state": state, "build_seconds": self.build_seconds}
+
+    def invoke(self, messages: Any, **kwargs: Any) -> Any:
+        return self.get().invoke(messages, **kwargs)
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        # Build off the event loop; the SDK imports and client setup block
+        model = self.instance if self.instance is not None else await asyncio.to_thread(self.get)
+        return await model.ainvoke(messages, **kwargs)
+
+def warm_up_llms() -> None:
+    """Build the configured model tiers, e.g. in a background thread once the server is listening."""
+    for model in (llm, small_llm):
+        if model is not None:
+            model.warm_up()
+
+# Initialize LLM (built on first use)
+llm = LazyLLM(get_llm, "large")
+
+# Initialize the small model tier used for simple queries
+small_llm = None
+if settings.LLM_ROUTING_ENABLED:
+    small_llm = LazyLLM(lambda: get_llm(settings.BEDROCK_SMALL_MODEL_ID, settings.OPENAI_SMALL_MODEL), "small")
+
+# Initialize async concurrency limit
+llm_limiter = LLMConcurrencyLimiter(settings.LLM_MAX_CONCURRENCY)
+
+# Default executor of the server's event loop, set up by the app lifespan
+_llm_executor: Optional[LLMExecutor] = None
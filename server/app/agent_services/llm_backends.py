@@ -0,0 +1,352 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.core.settings import settings
+
+# Initialize logger
+logger = logging.getLogger("mcp_server")
+
+class LatencyTracker:
+    """Keeps a window of recent latencies and reports percentiles."""
+
+    def __init__(self, window: int = 500):
+        """
+        Initialize the tracker.
+
+        Args:
+            window: Number of most recent samples kept
+        """
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add a latency sample."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Get a latency percentile over the window.
+
+        Args:
+            percent: Percentile between 0 and 100
+
+        Returns:
+            Optional[float]: Latency in seconds, or None without samples
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(int(len(samples) * percent / 100), len(samples) - 1)
+        return samples[index]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get p50/p95/p99 latency over the window."""
+        return {
+            "samples": len(self),
+            "p50_seconds": self.percentile(50),
+            "p95_seconds": self.percentile(95),
+            "p99_seconds": self.percentile(99)
+        }
+
+class CircuitBreaker:
+    """Stops sending calls to a backend after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and the
+    backend is skipped for ``reset_timeout`` seconds. It then goes half-open:
+    one probe call is let through, and its outcome closes or re-opens the
+    circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = settings.LLM_BREAKER_FAILURES,
+                 reset_timeout: float = settings.LLM_BREAKER_RESET_SECONDS):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return whether a call may be sent to the backend now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold or after a failed probe."""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def record_cancel(self) -> None:
+        """Release the probe slot of a call that was cancelled before it finished."""
+        with self._lock:
+            self._probing = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the breaker state."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened
+            }
+
+class _Backend:
+    """One LLM provider with its own latency window and circuit breaker."""
+
+    def __init__(self, name: str, model: Any):
+        self.name = name
+        self.model = model
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker()
+        self.calls = 0
+        self.errors = 0
+        self.wins = 0
+        self._lock = threading.Lock()
+
+    def _finish(self, start_time: float, error: Optional[Exception]) -> None:
+        with self._lock:
+            self.calls += 1
+            if error is not None:
+                self.errors += 1
+        if error is None:
+            self.latency.record(time.perf_counter() - start_time)
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+            logger.warning(f"LLM backend {self.name} failed: {str(error)}")
+
+    def invoke(self, messages: Any, **kwargs: Any) -> Any:
+        start_time = time.perf_counter()
+        try:
+            response = self.model.invoke(messages, **kwargs)
+        except Exception as e:
+            self._finish(start_time, e)
+            raise
+        self._finish(start_time, None)
+        return response
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        start_time = time.perf_counter()
+        try:
+            response = await self.model.ainvoke(messages, **kwargs)
+        except asyncio.CancelledError:
+            self.breaker.record_cancel()
+            raise
+        except Exception as e:
+            self._finish(start_time, e)
+            raise
+        self._finish(start_time, None)
+        return response
+
+class HedgedLLM:
+    """Chat model client spread over several backends (e.g. Bedrock, then OpenAI).
+
+    Each call goes to the first backend whose circuit is closed. If it has not
+    answered after the hedge delay -- the primary's recent p95 latency, or
+    ``initial_delay`` until enough samples exist -- a duplicate request is sent
+    to the next backend and whichever answers first wins. A backend that fails
+    outright is also backed up immediately. Exposes the ``invoke``/``ainvoke``
+    subset of the LangChain chat model interface.
+    """
+
+    def __init__(
+        self,
+        backends: List[Tuple[str, Any]],
+        hedging: bool = settings.LLM_HEDGING_ENABLED,
+        percentile: float = settings.LLM_HEDGE_PERCENTILE,
+        initial_delay: float = settings.LLM_HEDGE_INITIAL_DELAY,
+        min_delay: float = settings.LLM_HEDGE_MIN_DELAY,
+        min_samples: int = 20
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            backends: ``(name, chat_model)`` pairs in order of preference
+            hedging: Whether duplicate requests may be sent to a secondary backend
+            percentile: Primary latency percentile used as the hedge delay
+            initial_delay: Hedge delay used until ``min_samples`` latencies are known
+            min_delay: Lower bound of the hedge delay
+            min_samples: Samples needed before the percentile is trusted
+        """
+        self.backends = [_Backend(name, model) for name, model in backends]
+        self.hedging = hedging
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.latency = LatencyTracker()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _pick(self, tried: List[_Backend]) -> Optional[_Backend]:
+        """Return the first untried backend whose circuit lets a call through."""
+        for backend in self.backends:
+            if backend not in tried and backend.breaker.allow():
+                return backend
+        return None
+
+    def hedge_delay(self, backend: _Backend) -> float:
+        """Seconds to wait on ``backend`` before sending a hedged request."""
+        if len(backend.latency) < self.min_samples:
+            return max(self.initial_delay, self.min_delay)
+        return max(backend.latency.percentile(self.percentile), self.min_delay)
+
+    def _won(self, backend: _Backend, primary: _Backend, start_time: float) -> None:
+        with self._lock:
+            backend.wins += 1
+            if backend is not primary:
+                self.hedge_wins += 1
+        self.latency.record(time.perf_counter() - start_time)
+
+    def _hedge(self, tried: List[_Backend]) -> Optional[_Backend]:
+        """Pick the backend for a duplicate request, if one is available."""
+        backend = self._pick(tried)
+        if backend is not None:
+            tried.append(backend)
+            with self._lock:
+                self.hedges += 1
+            logger.info(f"Hedging LLM request to {backend.name}")
+        return backend
+
+    def _submit(self, backend: _Backend, messages: Any, kwargs: Dict[str, Any]):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.LLM_EXECUTOR_WORKERS,
+                    thread_name_prefix="llm-hedge"
+                )
+        return self._executor.submit(backend.invoke, messages, **kwargs)
+
+    def invoke(self, messages: Any, **kwargs: Any) -> Any:
+        """Blocking call with hedging across backends."""
+        primary = self._pick([])
+        if primary is None:
+            raise RuntimeError("All LLM backends are unavailable (circuit open)")
+        start_time = time.perf_counter()
+        if len(self.backends) == 1 or not self.hedging:
+            response = primary.invoke(messages, **kwargs)
+            self._won(primary, primary, start_time)
+            return response
+
+        tried = [primary]
+        pending = {self._submit(primary, messages, kwargs): primary}
+        error = None
+        while pending:
+            can_hedge = len(tried) < len(self.backends)
+            timeout = self.hedge_delay(primary) if can_hedge and error is None else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                backend = pending.pop(future)
+                if future.exception() is None:
+                    self._won(backend, primary, start_time)
+                    return future.result()
+                error = future.exception()
+            # Hedge on timeout, or back up a failed call straight away
+            if can_hedge and (not done or not pending):
+                backend = self._hedge(tried)
+                if backend is not None:
+                    pending[self._submit(backend, messages, kwargs)] = backend
+        raise error
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        """Async call with hedging across backends; the losing request is cancelled."""
+        primary = self._pick([])
+        if primary is None:
+            raise RuntimeError("All LLM backends are unavailable (circuit open)")
+        start_time = time.perf_counter()
+        if len(self.backends) == 1 or not self.hedging:
+            response = await primary.ainvoke(messages, **kwargs)
+            self._won(primary, primary, start_time)
+            return response
+
+        tried = [primary]
+        pending = {asyncio.ensure_future(primary.ainvoke(messages, **kwargs)): primary}
+        error = None
+        try:
+            while pending:
+                can_hedge = len(tried) < len(self.backends)
+                timeout = self.hedge_delay(primary) if can_hedge and error is None else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    backend = pending.pop(task)
+                    if task.exception() is None:
+                        self._won(backend, primary, start_time)
+                        return task.result()
+                    error = task.exception()
+                # Hedge on timeout, or back up a failed call straight away
+                if can_hedge and (not done or not pending):
+                    backend = self._hedge(tried)
+                    if backend is not None:
+                        pending[asyncio.ensure_future(backend.ainvoke(messages, **kwargs))] = backend
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get end-to-end tail latency, hedging counts and per-backend health."""
+        return {
+            "hedging": self.hedging,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "latency": self.latency.get_stats(),
+            "backends": {
+                backend.name: {
+                    "calls": backend.calls,
+                    "errors": backend.errors,
+                    "wins": backend.wins,
+                    "hedge_delay_seconds": self.hedge_delay(backend),
+                    "latency": backend.latency.get_stats(),
+                    "circuit": backend.breaker.get_stats()
+                }
+                for backend in self.backends
+            }
+        }
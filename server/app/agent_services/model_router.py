@@ -0,0 +1,205 @@
+import re
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable, List
+
+from app.core.settings import settings
+from app.core.tracing import span
+from app.agent_services.llm import llm, small_llm, llm_limiter
+from app.agent_services.query_normalizer import QueryNormalizer
+from app.agent_services.intent.entity_extractor import entity_extractor
+
+# Initialize logger
+logger = logging.getLogger("mcp_server")
+
+SMALL = "small"
+LARGE = "large"
+
+# Accent-folded phrases that signal reasoning beyond lookup and extraction
+COMPLEXITY_PHRASES = (
+    "so sanh", "tai sao", "vi sao", "nguyen nhan", "phan tich", "danh gia", "du bao", "du doan",
+    "xu huong", "trien vong", "anh huong", "tac dong", "chien luoc", "dinh gia", "tong hop",
+    "khuyen nghi", "rui ro", "neu", "nhu the nao"
+)
+
+# Words up to which a query counts as short
+SHORT_QUERY_WORDS = 12
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+class ModelRouter:
+    """Routes each LLM call to a small (fast, cheap) or large (strong) model.
+
+    Every query gets a local complexity score from its length, the number of
+    entities it mentions and reasoning phrases such as "so sánh" or "tại sao".
+    Queries scoring below ``threshold`` go to the small model. If the small
+    model fails or its output does not validate, the call is escalated to the
+    large model, so routing never lowers answer quality below a parse failure.
+    """
+
+    def __init__(self, small: Any, large: Any, threshold: float = settings.LLM_ROUTING_THRESHOLD):
+        """
+        Initialize the router.
+
+        Args:
+            small: Small-tier chat model, or None to send everything to ``large``
+            large: Large-tier chat model
+            threshold: Complexity score from which the large model is used
+        """
+        self.tiers = {SMALL: small, LARGE: large}
+        self.threshold = threshold
+        self._normalizer = QueryNormalizer(fold_accents=True)
+        self._lock = threading.Lock()
+        self._stats = {
+            tier: {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            for tier in (SMALL, LARGE)
+        }
+        self._routed = {SMALL: 0, LARGE: 0}
+        self._escalations = 0
+
+    def score(self, query: str) -> float:
+        """
+        Compute the complexity score of a query.
+
+        Args:
+            query: User query
+
+        Returns:
+            float: 0 for a short single-entity lookup, growing with length, entities and reasoning phrases
+        """
+        text = self._normalizer(query)
+        words = len(_TOKEN_PATTERN.findall(text))
+        entities = entity_extractor.match(query)
+
+        score = max(words - SHORT_QUERY_WORDS, 0) / SHORT_QUERY_WORDS
+        score += max(len(entities["stock_codes"]) - 1, 0)
+        score += 0.5 * max(len(entities["financial_metrics"]) - 1, 0)
+        score += 0.5 * max(len(entities["quarter"]) + len(entities["year"]) - 2, 0)
+        padded = f" {text} "
+        score += sum(1 for phrase in COMPLEXITY_PHRASES if f" {phrase} " in padded)
+        return score
+
+    def small_available(self) -> bool:
+        """Whether a small tier is configured and, if built lazily, did not fail to build."""
+        small = self.tiers[SMALL]
+        return small is not None and getattr(small, "available", True)
+
+    def route(self, query: str) -> str:
+        """
+        Pick the model tier for a query.
+
+        Args:
+            query: User query
+
+        Returns:
+            str: ``"small"`` or ``"large"``
+        """
+        tier = LARGE
+        if self.small_available() and self.score(query) < self.threshold:
+            tier = SMALL
+        with self._lock:
+            self._routed[tier] += 1
+        return tier
+
+    def _record(self, tier: str, seconds: float, failed: bool) -> None:
+        with self._lock:
+            tier_stats = self._stats[tier]
+            tier_stats["calls"] += 1
+            tier_stats["total_seconds"] += seconds
+            tier_stats["max_seconds"] = max(tier_stats["max_seconds"], seconds)
+            if failed:
+                tier_stats["errors"] += 1
+
+    def _escalate(self, query: str, error: Exception) -> None:
+        with self._lock:
+            self._escalations += 1
+        logger.warning(f"Small model output rejected, escalating to large model for: {query} ({str(error)})")
+
+    def invoke_tier(self, tier: str, messages: List[Dict[str, str]]) -> Any:
+        """
+        Call one model tier and record its latency.
+
+        Args:
+            tier: ``"small"`` or ``"large"``
+            messages: Chat messages
+
+        Returns:
+            Any: The model response
+        """
+        start_time = time.perf_counter()
+        failed = True
+        try:
+            with span("llm_call", tier=tier):
+                response = self.tiers[tier].invoke(messages)
+            failed = False
+            return response
+        finally:
+            self._record(tier, time.perf_counter() - start_time, failed)
+
+    async def ainvoke_tier(self, tier: str, messages: List[Dict[str, str]]) -> Any:
+        """Async counterpart of ``invoke_tier`` bounded by ``llm_limiter``."""
+        async with llm_limiter:
+            start_time = time.perf_counter()
+            failed = True
+            try:
+                with span("llm_call", tier=tier):
+                    response = await self.tiers[tier].ainvoke(messages)
+                failed = False
+                return response
+            finally:
+                self._record(tier, time.perf_counter() - start_time, failed)
+
+    def invoke(self, query: str, messages: List[Dict[str, str]], parse: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Route a call, parse its output and escalate to the large model on failure.
+
+        Args:
+            query: User query, used for routing
+            messages: Chat messages
+            parse: Function validating the response text; raises ``ResponseParseError`` if invalid
+
+        Returns:
+            Dict[str, Any]: Parsed result
+
+        Raises:
+            ResponseParseError: If the large model's output does not validate
+        """
+        if self.route(query) == SMALL:
+            try:
+                return parse(self.invoke_tier(SMALL, messages).content)
+            except Exception as e:
+                self._escalate(query, e)
+        return parse(self.invoke_tier(LARGE, messages).content)
+
+    async def ainvoke(self, query: str, messages: List[Dict[str, str]], parse: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """Async counterpart of ``invoke``."""
+        if self.route(query) == SMALL:
+            try:
+                return parse((await self.ainvoke_tier(SMALL, messages)).content)
+            except Exception as e:
+                self._escalate(query, e)
+        return parse((await self.ainvoke_tier(LARGE, messages)).content)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing decisions, escalations and per-tier call counts and latency."""
+        with self._lock:
+            tiers = {}
+            for tier, tier_stats in self._stats.items():
+                calls = tier_stats["calls"]
+                tiers[tier] = {
+                    "routed": self._routed[tier],
+                    "calls": calls,
+                    "errors": tier_stats["errors"],
+                    "avg_latency_seconds": tier_stats["total_seconds"] / calls if calls else 0.0,
+                    "max_latency_seconds": tier_stats["max_seconds"]
+                }
+            return {
+                "enabled": self.small_available(),
+                "threshold": self.threshold,
+                "escalations": self._escalations,
+                "tiers": tiers
+            }
+
+# Initialize model router
+model_router = ModelRouter(small_llm, llm)
@@ -0,0 +1,155 @@
+import logging
+import threading
+from typing import Dict, Any, List
+
+from app.core.settings import settings
+from app.core.deadline import remaining
+
+# Initialize logger
+logger = logging.getLogger("mcp_server")
+
+# Bedrock Converse marker: everything before it in the request is cached
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+def cached_system_message(text: str) -> Dict[str, Any]:
+    """
+    Build a system message whose static text is marked as a cacheable prefix.
+
+    Args:
+        text: Static system prompt
+
+    Returns:
+        Dict[str, Any]: Chat message; providers without cache points get the plain text back via ``strip_cache_points``
+    """
+    if not settings.PROMPT_CACHE_ENABLED:
+        return {"role": "system", "content": text}
+    return {"role": "system", "content": [{"type": "text", "text": text}, CACHE_POINT]}
+
+def strip_cache_points(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Remove cache point markers, turning text-only block lists back into plain strings."""
+    stripped = []
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, list) and CACHE_POINT in content:
+            blocks = [block for block in content if block != CACHE_POINT]
+            if all(isinstance(block, dict) and block.get("type") == "text" for block in blocks):
+                content = "".join(block["text"] for block in blocks)
+            else:
+                content = blocks
+            message = {**message, "content": content}
+        stripped.append(message)
+    return stripped
+
+class PromptCacheStats:
+    """Accumulates cached vs uncached input tokens, and output tokens, reported by the providers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._providers: Dict[str, Dict[str, int]] = {}
+
+    def record(self, provider: str, uncached: int, cache_read: int, cache_write: int, output: int = 0) -> None:
+        """Add the token counts of one call."""
+        with self._lock:
+            stats = self._providers.setdefault(provider, {
+                "calls": 0, "uncached_input_tokens": 0, "cache_read_tokens": 0, "cache_write_tokens": 0,
+                "output_tokens": 0
+            })
+            stats["calls"] += 1
+            stats["uncached_input_tokens"] += uncached
+            stats["cache_read_tokens"] += cache_read
+            stats["cache_write_tokens"] += cache_write
+            stats["output_tokens"] += output
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-provider token totals and the share of input tokens read from the cache."""
+        with self._lock:
+            providers = {}
+            for provider, stats in self._providers.items():
+                total = stats["uncached_input_tokens"] + stats["cache_read_tokens"] + stats["cache_write_tokens"]
+                providers[provider] = {
+                    **stats,
+                    "cached_fraction": stats["cache_read_tokens"] / total if total else 0.0
+                }
+            return {"enabled": settings.PROMPT_CACHE_ENABLED, "providers": providers}
+
+class PromptCachingLLM:
+    """Adapts requests to one provider and records its prompt cache usage.
+
+    Bedrock receives the ``cachePoint`` markers as they are. Other providers
+    (OpenAI caches long prefixes automatically) get them stripped. If Bedrock
+    rejects cache points, e.g. for a model without prompt caching, they are
+    dropped for this model and the call is repeated once. OpenAI requests
+    also carry the time left until the request deadline as their timeout;
+    Bedrock calls are bounded by the client's read timeout and retry attempts
+    instead, which ``get_llm`` caps to ``TOOL_CALL_TIMEOUT``.
+    """
+
+    def __init__(self, model: Any, provider: str):
+        """
+        Initialize the wrapper.
+
+        Args:
+            model: LangChain chat model
+            provider: ``"bedrock"`` or ``"openai"``
+        """
+        self.model = model
+        self.provider = provider
+        self.cache_points = provider == "bedrock"
+
+    def _prepare(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return messages if self.cache_points else strip_cache_points(messages)
+
+    def _kwargs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        time_left = remaining()
+        if self.provider == "openai" and time_left is not None and "timeout" not in kwargs:
+            return {**kwargs, "timeout": time_left}
+        return kwargs
+
+    def _unsupported(self, error: Exception) -> bool:
+        if self.cache_points and "cach" in str(error).lower():
+            logger.warning(f"Prompt caching rejected by {self.provider}, sending prompts uncached: {str(error)}")
+            self.cache_points = False
+            return True
+        return False
+
+    def _record(self, response: Any) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        if not usage:
+            return
+        details = usage.get("input_token_details") or {}
+        cache_read = details.get("cache_read", 0) or 0
+        cache_write = details.get("cache_creation", 0) or 0
+        uncached = usage.get("input_tokens", 0)
+        if self.provider != "bedrock":
+            # OpenAI counts cached tokens inside input_tokens; Bedrock reports them separately
+            uncached = max(uncached - cache_read - cache_write, 0)
+        prompt_cache_stats.record(self.provider, uncached, cache_read, cache_write, usage.get("output_tokens", 0) or 0)
+        logger.info(
+            f"LLM call on {self.provider}: {uncached} uncached input tokens, "
+            f"{cache_read} read from cache, {cache_write} written to cache"
+        )
+
+    def invoke(self, messages: List[Dict[str, Any]], **kwargs: Any) -> Any:
+        """Call the model with provider-specific cache markers."""
+        try:
+            response = self.model.invoke(self._prepare(messages), **self._kwargs(kwargs))
+        except Exception as e:
+            if not self._unsupported(e):
+                raise
+            response = self.model.invoke(self._prepare(messages), **self._kwargs(kwargs))
+        self._record(response)
+        return response
+
+    async def ainvoke(self, messages: List[Dict[str, Any]], **kwargs: Any) -> Any:
+        """Async counterpart of ``invoke``."""
+        try:
+            response = await self.model.ainvoke(self._prepare(messages), **self._kwargs(kwargs))
+        except Exception as e:
+            if not self._unsupported(e):
+                raise
+            response = await self.model.ainvoke(self._prepare(messages), **self._kwargs(kwargs))
+        self._record(response)
+        return response
+
+# Initialize prompt cache statistics
+prompt_cache_stats = PromptCacheStats()
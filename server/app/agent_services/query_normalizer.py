@@ -0,0 +1,94 @@
+import re
+import unicodedata
+from typing import Callable, List, Optional
+
+# A normalization step takes a query string and returns a rewritten one
+NormalizationStep = Callable[[str], str]
+
+# Roman numerals used for quarters, e.g. "quý IV"
+_ROMAN_QUARTERS = {"i": "1", "ii": "2", "iii": "3", "iv": "4"}
+
+# "quý 1", "quí 1", "quy 1", "q1", "q.1", "quý iv", optionally followed by a year
+# separator ("/", "-", "năm"). Applied after lowercasing and Unicode normalization.
+_QUARTER_PATTERN = re.compile(
+    r"\b(?:qu[ýyíi]|q)\s*\.?\s*([1-4]|iv|i{1,3})\b(?:\s*(?:[/\-]|năm|nam)?\s*((?:19|20)\d{2})\b)?"
+)
+
+# "năm 2024" / "nam 2024" -> "2024", "fy2024" -> "2024"
+_YEAR_PATTERN = re.compile(r"\b(?:năm|nam|fy)\s*((?:19|20)\d{2})\b")
+
+# Exchange-qualified tickers: "$vnm", "vnm.hose", "hose:vnm", "vnm:hnx"
+_TICKER_PREFIX_PATTERN = re.compile(r"\$([a-z0-9]{3})\b")
+_TICKER_SUFFIX_PATTERN = re.compile(r"\b([a-z0-9]{3})[.:](?:hose|hsx|hnx|upcom)\b")
+_EXCHANGE_PREFIX_PATTERN = re.compile(r"\b(?:hose|hsx|hnx|upcom)[.:]([a-z0-9]{3})\b")
+
+# Anything that is not a letter, digit or whitespace
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]|_")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+def unicode_nfc(query: str) -> str:
+    """Compose Vietnamese diacritics so NFC and NFD input compare equal."""
+    return unicodedata.normalize("NFC", query)
+
+def lowercase(query: str) -> str:
+    """Lowercase the query."""
+    return query.lower()
+
+def canonicalize_tickers(query: str) -> str:
+    """Strip ``$`` prefixes and exchange qualifiers from ticker symbols."""
+    query = _TICKER_PREFIX_PATTERN.sub(r"\1", query)
+    query = _TICKER_SUFFIX_PATTERN.sub(r"\1", query)
+    return _EXCHANGE_PREFIX_PATTERN.sub(r"\1", query)
+
+def canonicalize_periods(query: str) -> str:
+    """Rewrite quarter and year expressions to ``q<n> <yyyy>`` / ``<yyyy>``."""
+    def _quarter(match: re.Match) -> str:
+        quarter = _ROMAN_QUARTERS.get(match.group(1), match.group(1))
+        year = match.group(2)
+        return f"q{quarter} {year}" if year else f"q{quarter}"
+
+    query = _QUARTER_PATTERN.sub(_quarter, query)
+    return _YEAR_PATTERN.sub(r"\1", query)
+
+def collapse_punctuation(query: str) -> str:
+    """Turn punctuation into spaces and collapse runs of whitespace."""
+    query = _PUNCTUATION_PATTERN.sub(" ", query)
+    return _WHITESPACE_PATTERN.sub(" ", query).strip()
+
+def fold_diacritics(query: str) -> str:
+    """Remove Vietnamese diacritics, e.g. ``"quý"`` -> ``"quy"``, ``"đ"`` -> ``"d"``."""
+    decomposed = unicodedata.normalize("NFD", query)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.replace("đ", "d").replace("Đ", "D")
+
+DEFAULT_STEPS: List[NormalizationStep] = [
+    unicode_nfc,
+    lowercase,
+    canonicalize_tickers,
+    canonicalize_periods,
+    collapse_punctuation,
+]
+
+class QueryNormalizer:
+    """Canonicalizes user queries before they are hashed into cache keys.
+
+    The normalizer is an ordered list of ``str -> str`` steps, so callers can
+    add, drop or reorder steps without touching ``QueryCache``.
+    """
+
+    def __init__(self, steps: Optional[List[NormalizationStep]] = None, fold_accents: bool = False):
+        """
+        Initialize the normalizer.
+
+        Args:
+            steps: Normalization steps to apply in order (defaults to ``DEFAULT_STEPS``)
+            fold_accents: Also strip diacritics after the other steps
+        """
+        self.steps = list(DEFAULT_STEPS if steps is None else steps)
+        if fold_accents:
+            self.steps.append(fold_diacritics)
+
+    def __call__(self, query: str) -> str:
+        for step in self.steps:
+            query = step(query)
+        return query
@@ -0,0 +1,169 @@
+import json
+import logging
+import threading
+from typing import Dict, Any, Optional, Type
+
+from pydantic import BaseModel
+
+from app.core.tracing import span
+
+# Initialize logger
+logger = logging.getLogger("mcp_server")
+
+# Characters that end a JSON value; a string opening right after one is missing a comma
+_VALUE_END = frozenset('"]}0123456789el')
+_CLOSING = {"{": "}", "[": "]"}
+
+def repair_json(text: str) -> Optional[str]:
+    """
+    Cut the first JSON object out of an LLM response and fix common defects.
+
+    A single pass over the text, tracking string and nesting state, handles
+    markdown fences and prose around the object, trailing commas before
+    ``}``/``]``, commas missing between members written on separate lines,
+    and objects truncated before their closing brackets.
+
+    Args:
+        text: Raw LLM response
+
+    Returns:
+        Optional[str]: Repaired JSON text, or None if no object was found
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    out = []
+    stack = []
+    in_string = False
+    escaped = False
+    last = ""  # Last significant character outside strings
+
+    for ch in text[start:]:
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                last = '"'
+            continue
+
+        if ch.isspace():
+            out.append(ch)
+            continue
+
+        if ch in "}]":
+            # Drop a trailing comma before the closing bracket
+            if last == ",":
+                for i in range(len(out) - 1, -1, -1):
+                    if out[i] == ",":
+                        del out[i]
+                        break
+            if not stack:
+                break
+            out.append(_CLOSING[stack.pop()])
+            last = ch
+            if not stack:
+                break
+            continue
+
+        if ch == '"':
+            if last in _VALUE_END:
+                out.append(",")
+            in_string = True
+        elif ch in _CLOSING:
+            stack.append(ch)
+        out.append(ch)
+        last = ch
+
+    # Close whatever a truncated response left open
+    if in_string:
+        out.append('"')
+    elif last == ",":
+        del out[len(out) - 1 - out[::-1].index(",")]
+    while stack:
+        out.append(_CLOSING[stack.pop()])
+    return "".join(out)
+
+class ResponseParseError(ValueError):
+    """Raised when an LLM response cannot be repaired into JSON or fails schema validation."""
+
+class ResponseParser:
+    """Parses and validates JSON returned by the LLM, repairing it locally when possible.
+
+    Every response is first tried with ``json.loads``; only when that fails is
+    it passed through ``repair_json``. The result is validated against the
+    tool's pydantic schema. Callers make a retry LLM call only when ``parse``
+    raises, and report it with ``record_retry``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, tool_name: str, counter: str) -> None:
+        with self._lock:
+            tool_stats = self._stats.setdefault(tool_name, {"clean": 0, "repaired": 0, "retries": 0, "failed": 0})
+            tool_stats[counter] += 1
+
+    def parse(self, tool_name: str, content: str, schema: Type[BaseModel]) -> Dict[str, Any]:
+        """
+        Parse an LLM response into a validated result.
+
+        Args:
+            tool_name: Name of the tool, used for the counters
+            content: Raw LLM response
+            schema: Pydantic model the result must satisfy
+
+        Returns:
+            Dict[str, Any]: Validated result
+
+        Raises:
+            ResponseParseError: If the response cannot be repaired or fails validation
+        """
+        with span("parse", tool=tool_name):
+            return self._parse(tool_name, content, schema)
+
+    def _parse(self, tool_name: str, content: str, schema: Type[BaseModel]) -> Dict[str, Any]:
+        try:
+            data = json.loads(content)
+            counter = "clean"
+        except json.JSONDecodeError as e:
+            repaired = repair_json(content)
+            if repaired is None:
+                self._count(tool_name, "failed")
+                raise ResponseParseError(f"No JSON object in response: {str(e)}") from e
+            try:
+                data = json.loads(repaired)
+            except json.JSONDecodeError as repair_error:
+                self._count(tool_name, "failed")
+                raise ResponseParseError(f"Invalid JSON in response: {str(repair_error)}") from repair_error
+            counter = "repaired"
+            logger.info(f"Repaired malformed JSON from {tool_name} response")
+
+        try:
+            result = schema.model_validate(data).model_dump()
+        except ValueError as e:
+            self._count(tool_name, "failed")
+            raise ResponseParseError(f"Response does not match the {schema.__name__} schema: {str(e)}") from e
+
+        self._count(tool_name, counter)
+        return result
+
+    def record_retry(self, tool_name: str) -> None:
+        """Count a retry LLM call made because ``parse`` failed."""
+        self._count(tool_name, "retries")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-tool counts of clean, repaired and failed parses and of retry calls."""
+        with self._lock:
+            tools = {tool_name: dict(tool_stats) for tool_name, tool_stats in self._stats.items()}
+        totals = {counter: sum(tool_stats[counter] for tool_stats in tools.values())
+                  for counter in ("clean", "repaired", "retries", "failed")}
+        return {**totals, "tools": tools}
+
+# Initialize response parser
+response_parser = ResponseParser()
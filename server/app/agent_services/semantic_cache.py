@@ -0,0 +1,215 @@
+import re
+import time
+import zlib
+import logging
+import threading
+from typing import Dict, Any, Optional, List, Tuple, FrozenSet
+
+from app.core.settings import settings
+from app.core.tickers import KNOWN_TICKERS
+from app.agent_services.query_normalizer import QueryNormalizer
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+# Initialize logger
+logger = logging.getLogger("mcp_server")
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Accent-folded words that flip or set the direction of a question ("không",
+# "chưa", "đừng", "mua"/"bán", "tăng"/"giảm"...). Character n-grams barely see
+# them, so like tickers they must match exactly for a hit
+POLARITY_WORDS = frozenset({
+    "khong", "ko", "kg", "chua", "chang", "cha", "dung",
+    "mua", "ban", "tang", "giam", "len", "xuong", "lai", "lo", "tot", "xau"
+})
+
+# Upper bounds of the best-score histogram buckets exposed in get_stats
+_SCORE_BUCKETS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0)
+
+class _ToolIndex:
+    """Fixed-capacity ring buffer of query vectors for one tool."""
+
+    def __init__(self, capacity: int, dims: int):
+        self.vectors = np.zeros((capacity, dims), dtype=np.float32)
+        self.entries: List[Optional[Tuple[FrozenSet[str], Dict[str, Any], float]]] = [None] * capacity
+        self.next_slot = 0
+
+    def add(self, vector, entities: FrozenSet[str], result: Dict[str, Any], expires_at: float) -> None:
+        # Overwrite the oldest slot once the buffer is full (FIFO eviction)
+        slot = self.next_slot
+        self.vectors[slot] = vector
+        self.entries[slot] = (entities, result, expires_at)
+        self.next_slot = (slot + 1) % len(self.entries)
+
+class SemanticCache:
+    """Near-duplicate cache keyed by query similarity instead of exact text.
+
+    Queries are embedded offline as L2-normalized hashed character n-gram
+    vectors, so lookup is a single NumPy matrix-vector product against the
+    stored vectors of the same tool. A stored result is reused only when the
+    cosine similarity clears ``threshold`` *and* both queries name the same
+    tickers, the same numbers (quarters, years) and the same negation and
+    direction words (``POLARITY_WORDS``) -- paraphrases about a different
+    stock or period, or asking the opposite, must never share an answer.
+    Entries expire after their tool's TTL; they are never served stale.
+    """
+
+    def __init__(self, threshold: float = settings.SEMANTIC_CACHE_THRESHOLD,
+                 max_size: int = settings.SEMANTIC_CACHE_MAX_SIZE,
+                 ttl: int = settings.CACHE_TTL, ngram: int = 3, dims: int = 1024,
+                 tool_ttls: Optional[Dict[str, int]] = None):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            max_size: Maximum number of vectors kept per tool
+            ttl: Default time-to-live for entries (seconds)
+            ngram: Character n-gram length
+            dims: Number of hash buckets in each vector
+            tool_ttls: Per-tool TTL overrides, defaults to ``CACHE_TOOL_TTLS``
+        """
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self.tool_ttls = settings.CACHE_TOOL_TTLS if tool_ttls is None else tool_ttls
+        self.ngram = ngram
+        self.dims = dims
+        self.enabled = settings.CACHE_ENABLED and settings.SEMANTIC_CACHE_ENABLED and np is not None
+        self._normalizer = QueryNormalizer(fold_accents=True)
+        self._indexes: Dict[str, _ToolIndex] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "near_misses": 0, "entity_mismatches": 0}
+        self._score_histogram = [0] * len(_SCORE_BUCKETS)
+        self._last_hit_scores: List[float] = []
+
+        if settings.SEMANTIC_CACHE_ENABLED and np is None:
+            logger.warning("SEMANTIC_CACHE_ENABLED is set but numpy is not installed; semantic cache disabled")
+
+    def _vectorize(self, normalized: str):
+        """Embed a normalized query as a hashed character n-gram vector."""
+        vector = np.zeros(self.dims, dtype=np.float32)
+        padded = f" {normalized} "
+        for i in range(max(len(padded) - self.ngram + 1, 1)):
+            gram = padded[i:i + self.ngram]
+            vector[zlib.crc32(gram.encode("utf-8")) % self.dims] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _entities(self, normalized: str) -> FrozenSet[str]:
+        """Tickers, numbers and polarity words that must match exactly for a hit."""
+        return frozenset(
+            token for token in _TOKEN_PATTERN.findall(normalized)
+            if token.upper() in KNOWN_TICKERS or token in POLARITY_WORDS or any(ch.isdigit() for ch in token)
+        )
+
+    def _record_score(self, score: float) -> None:
+        """Add a best-match score to the histogram. Caller must hold the lock."""
+        for i, bound in enumerate(_SCORE_BUCKETS):
+            if score <= bound:
+                self._score_histogram[i] += 1
+                return
+
+    def get(self, tool_name: str, query: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Find a cached result for a query similar to ``query``.
+
+        Args:
+            tool_name: Name of the tool being called
+            query: User query
+
+        Returns:
+            Optional[Tuple[Dict[str, Any], float]]: ``(result, expires_at)`` of the
+            closest matching query, or None
+        """
+        if not self.enabled:
+            return None
+
+        normalized = self._normalizer(query)
+        vector = self._vectorize(normalized)
+        entities = self._entities(normalized)
+        now = time.time()
+
+        with self._lock:
+            index = self._indexes.get(tool_name)
+            if index is None:
+                self._stats["misses"] += 1
+                return None
+
+            scores = index.vectors @ vector
+            # Try candidates from best to worst until one clears every check
+            for slot in np.argsort(scores)[::-1]:
+                score = float(scores[slot])
+                entry = index.entries[slot]
+                if score < self.threshold or entry is None:
+                    break
+                stored_entities, result, expires_at = entry
+                if now > expires_at:
+                    continue
+                if stored_entities != entities:
+                    self._stats["entity_mismatches"] += 1
+                    continue
+
+                self._stats["hits"] += 1
+                self._record_score(score)
+                self._last_hit_scores = (self._last_hit_scores + [score])[-100:]
+                logger.info(f"Semantic cache hit for tool '{tool_name}' (similarity {score:.3f}): {query}")
+                return result, expires_at
+
+            best = float(scores.max()) if len(scores) else 0.0
+            self._record_score(best)
+            self._stats["misses"] += 1
+            if best >= self.threshold - 0.1:
+                self._stats["near_misses"] += 1
+            return None
+
+    def add(self, tool_name: str, query: str, result: Dict[str, Any]) -> None:
+        """
+        Index a result under the vector of ``query``.
+
+        Args:
+            tool_name: Name of the tool being called
+            query: User query
+            result: Result to cache
+        """
+        if not self.enabled:
+            return
+
+        normalized = self._normalizer(query)
+        vector = self._vectorize(normalized)
+        entities = self._entities(normalized)
+
+        with self._lock:
+            index = self._indexes.get(tool_name)
+            if index is None:
+                index = self._indexes[tool_name] = _ToolIndex(self.max_size, self.dims)
+            index.add(vector, entities, result, time.time() + self.tool_ttls.get(tool_name, self.ttl))
+
+    def clear(self) -> None:
+        """Drop all indexed vectors."""
+        with self._lock:
+            self._indexes.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the distribution of best-match scores."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "enabled": self.enabled,
+                "threshold": self.threshold,
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "score_histogram": dict(zip((f"<={b}" for b in _SCORE_BUCKETS), self._score_histogram)),
+                "recent_hit_scores": list(self._last_hit_scores),
+                "indexed": {
+                    tool: sum(entry is not None for entry in index.entries)
+                    for tool, index in self._indexes.items()
+                }
+            }
+
+# Initialize semantic cache
+semantic_cache = SemanticCache()
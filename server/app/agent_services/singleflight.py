@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+# Initialize logger
+logger = logging.getLogger("mcp_server")
+
+class _Call:
+    """An in-flight call that followers can wait on."""
+
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running (followers) block until it finishes and receive
+    the same result or exception. Once the leader returns, the key is released
+    and the next caller starts a fresh execution.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {"executions": 0, "collapsed": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run ``fn`` unless a call for ``key`` is already in flight, then share its outcome.
+
+        Args:
+            key: Identity of the call, e.g. ``(tool_name, normalized_query)``
+            fn: Zero-argument function performing the work
+
+        Returns:
+            Any: Result of the shared execution
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["collapsed"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats["executions"] += 1
+                leader = True
+
+        if not leader:
+            logger.info(f"Joining in-flight call for {key}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get counts of executions and collapsed (deduplicated) calls."""
+        with self._lock:
+            return {
+                **self._stats,
+                "in_flight": len(self._calls),
+                "waiting": sum(call.waiters for call in self._calls.values())
+            }
+
+class AsyncSingleFlight:
+    """``SingleFlight`` for coroutines running on one event loop.
+
+    Followers wait on a future owned by the leader without awaiting it
+    directly, so a follower that is cancelled does not cancel the shared call. If the leader is cancelled,
+    its followers start a fresh execution instead of failing.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._stats = {"executions": 0, "collapsed": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await ``fn()`` unless a call for ``key`` is already in flight, then share its outcome.
+
+        Args:
+            key: Identity of the call, e.g. ``(tool_name, normalized_query)``
+            fn: Zero-argument coroutine function performing the work
+
+        Returns:
+            Any: Result of the shared execution
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self._stats["collapsed"] += 1
+            logger.info(f"Joining in-flight call for {key}")
+            # asyncio.wait neither cancels the future nor raises when the future is
+            # cancelled, so a CancelledError here can only be our own
+            await asyncio.wait((future,))
+            if future.cancelled():
+                # The leader was cancelled (e.g. abandoned speculative work), not us: run it ourselves
+                return await self.do(key, fn)
+            return future.result()
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self._stats["executions"] += 1
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody was waiting
+            future.exception()
+            raise
+        finally:
+            del self._calls[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get counts of executions and collapsed (deduplicated) calls."""
+        return {**self._stats, "in_flight": len(self._calls)}
+
+# Initialize shared in-flight call groups for LLM-backed tools
+inflight_calls = SingleFlight()
+async_inflight_calls = AsyncSingleFlight()
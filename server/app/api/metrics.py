@@ -0,0 +1,148 @@
+from typing import List
+
+from app.core.metrics import MetricFamily, metrics_registry
+from app.core.admission import admission_controller
+from app.agent_services.cache import query_cache
+from app.agent_services.semantic_cache import semantic_cache
+from app.agent_services.singleflight import inflight_calls, async_inflight_calls
+from app.agent_services.llm import llm_limiter, llm_executor_stats
+from app.agent_services.model_router import model_router
+from app.agent_services.prompt_cache import prompt_cache_stats
+from app.agent_services.response_parser import response_parser
+from app.agent_services.intent.fast_path import intent_fast_path
+from app.agent_services.intent.prefetch import extraction_prefetcher
+
+# Scrape-time collectors: they read the components' existing ``get_stats``
+# counters, so the request path pays nothing extra for these metrics.
+
+def collect_cache() -> List[MetricFamily]:
+    """Query cache and semantic cache counters."""
+    stats = query_cache.get_stats()
+    lookups = MetricFamily("mcp_cache_lookups_total", "counter", "Query cache lookups by tool and result")
+    for tool_name, tool_stats in stats["hit_rate"]["tools"].items():
+        for result in ("hits", "misses", "normalized_hits", "stale_hits", "refreshes"):
+            lookups.add(tool_stats[result], tool=tool_name, result=result)
+    evictions = MetricFamily("mcp_cache_evictions_total", "counter", "Query cache evictions by reason")
+    for reason, count in stats["evictions"].items():
+        evictions.add(count, reason=reason)
+    families = [
+        lookups,
+        evictions,
+        MetricFamily("mcp_cache_entries", "gauge", "Entries in the query cache").add(stats["current_size"]),
+        MetricFamily("mcp_cache_bytes", "gauge", "Serialized bytes in the query cache").add(stats["current_bytes"]),
+        MetricFamily("mcp_cache_disk_hits_total", "counter", "Query cache hits served by the persistent tier").add(stats["disk_hits"]),
+    ]
+    if stats["persistent"] is not None:
+        families.append(MetricFamily(
+            "mcp_cache_pending_writes", "gauge", "Writes waiting for the persistent cache tier"
+        ).add(stats["persistent"]["pending_writes"]))
+
+    semantic = semantic_cache.get_stats()
+    semantic_lookups = MetricFamily("mcp_semantic_cache_lookups_total", "counter", "Semantic cache lookups by result")
+    for result in ("hits", "misses", "near_misses", "entity_mismatches"):
+        semantic_lookups.add(semantic[result], result=result)
+    families.append(semantic_lookups)
+    return families
+
+def collect_llm() -> List[MetricFamily]:
+    """LLM calls per tier and backend, parse retries, token usage and routing."""
+    router = model_router.get_stats()
+    calls = MetricFamily("mcp_llm_calls_total", "counter", "LLM calls by model tier")
+    errors = MetricFamily("mcp_llm_errors_total", "counter", "Failed LLM calls by model tier")
+    routed = MetricFamily("mcp_llm_routed_total", "counter", "Routing decisions by model tier")
+    for tier, tier_stats in router["tiers"].items():
+        calls.add(tier_stats["calls"], tier=tier)
+        errors.add(tier_stats["errors"], tier=tier)
+        routed.add(tier_stats["routed"], tier=tier)
+    families = [
+        calls, errors, routed,
+        MetricFamily("mcp_llm_escalations_total", "counter", "Small-model answers escalated to the large model").add(router["escalations"]),
+    ]
+
+    backend_calls = MetricFamily("mcp_llm_backend_calls_total", "counter", "Calls by LLM backend and outcome")
+    hedges = MetricFamily("mcp_llm_hedges_total", "counter", "Hedged duplicate requests by model tier")
+    circuit_open = MetricFamily("mcp_llm_circuit_open", "gauge", "1 if the backend's circuit breaker is open")
+    for tier, model in model_router.tiers.items():
+        # Lazily built tiers are only inspected once built, never built by a scrape
+        model = getattr(model, "instance", model)
+        # Only HedgedLLM spreads a tier over several backends
+        if model is None or not hasattr(model, "backends"):
+            continue
+        hedged = model.get_stats()
+        hedges.add(hedged["hedges"], tier=tier)
+        for name, backend in hedged["backends"].items():
+            backend_calls.add(backend["calls"] - backend["errors"], tier=tier, backend=name, status="ok")
+            backend_calls.add(backend["errors"], tier=tier, backend=name, status="error")
+            circuit_open.add(int(backend["circuit"]["state"] == "open"), tier=tier, backend=name)
+    families += [backend_calls, hedges, circuit_open]
+
+    parses = MetricFamily("mcp_llm_parses_total", "counter", "LLM response parses by tool and outcome")
+    retries = MetricFamily("mcp_llm_retries_total", "counter", "LLM calls repeated after an unparseable response")
+    for tool_name, tool_stats in response_parser.get_stats()["tools"].items():
+        for outcome in ("clean", "repaired", "failed"):
+            parses.add(tool_stats[outcome], tool=tool_name, outcome=outcome)
+        retries.add(tool_stats["retries"], tool=tool_name)
+    families += [parses, retries]
+
+    tokens = MetricFamily("mcp_llm_tokens_total", "counter", "LLM tokens by provider and kind")
+    for provider, provider_stats in prompt_cache_stats.get_stats()["providers"].items():
+        for kind in ("uncached_input", "cache_read", "cache_write", "output"):
+            tokens.add(provider_stats[f"{kind}_tokens"], provider=provider, kind=kind)
+    families.append(tokens)
+
+    fast_path = intent_fast_path.get_stats()
+    families.append(MetricFamily(
+        "mcp_intent_fast_path_total", "counter", "analyze_intent queries seen and answered without the LLM"
+    ).add(fast_path["queries"], result="seen").add(fast_path["handled"], result="handled"))
+    return families
+
+def collect_queues() -> List[MetricFamily]:
+    """Admission queue, LLM concurrency limiter and executor, in-flight and prefetch gauges."""
+    admission = admission_controller.get_stats()
+    queue_depth = MetricFamily("mcp_admission_queue_depth", "gauge", "Tool calls waiting for an admission slot by lane")
+    decisions = MetricFamily("mcp_admission_decisions_total", "counter", "Admission outcomes by lane")
+    for lane, lane_stats in admission["lanes"].items():
+        queue_depth.add(lane_stats["queue_depth"], lane=lane)
+        for decision in ("admitted", "rejected", "shed", "timed_out"):
+            decisions.add(lane_stats[decision], lane=lane, decision=decision)
+
+    limiter = llm_limiter.get_stats()
+    prefetch = extraction_prefetcher.get_stats()
+    prefetches = MetricFamily("mcp_prefetch_total", "counter", "Speculative extract_information prefetches by outcome")
+    for outcome in ("started", "skipped_busy", "skipped_llm_busy", "completed", "cancelled", "failed"):
+        prefetches.add(prefetch[outcome], outcome=outcome)
+    families = []
+    executor = llm_executor_stats()
+    if executor is not None:
+        families += [
+            MetricFamily("mcp_llm_executor_busy_threads", "gauge",
+                         "Busy threads of the executor running blocking SDK calls (Bedrock) and to_thread jobs").add(executor["busy"]),
+            MetricFamily("mcp_llm_executor_queue_depth", "gauge",
+                         "Jobs waiting for a thread of the blocking SDK call executor").add(executor["queue_depth"]),
+            MetricFamily("mcp_llm_executor_max_workers", "gauge",
+                         "Threads of the blocking SDK call executor").add(executor["max_workers"]),
+        ]
+    return families + [
+        queue_depth,
+        decisions,
+        MetricFamily("mcp_admission_active", "gauge", "Tool calls holding an admission slot").add(admission["active"]),
+        MetricFamily("mcp_llm_queue_depth", "gauge", "Async LLM calls waiting for the concurrency limiter").add(limiter["queue_depth"]),
+        MetricFamily("mcp_llm_in_flight", "gauge", "Async LLM calls in flight").add(limiter["in_flight"]),
+        MetricFamily("mcp_llm_wait_seconds_max", "gauge", "Longest wait for the LLM concurrency limiter").add(limiter["max_wait_seconds"]),
+        MetricFamily("mcp_inflight_calls", "gauge", "Deduplicated tool calls in flight").add(
+            inflight_calls.get_stats()["in_flight"] + async_inflight_calls.get_stats()["in_flight"]
+        ),
+        MetricFamily("mcp_collapsed_calls_total", "counter", "Tool calls that joined an identical in-flight call").add(
+            inflight_calls.get_stats()["collapsed"] + async_inflight_calls.get_stats()["collapsed"]
+        ),
+        prefetches,
+    ]
+
+# Register collectors
+metrics_registry.add_collector(collect_cache)
+metrics_registry.add_collector(collect_llm)
+metrics_registry.add_collector(collect_queues)
+
+def render_metrics() -> str:
+    """Render all metrics in Prometheus text exposition format."""
+    return metrics_registry.render()
@@ -0,0 +1,21 @@
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.json_codec import dumps
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with ``json_codec.dumps``.
+
+    Returned directly from the MCP endpoint, so FastAPI's ``jsonable_encoder``
+    pass is skipped: the nested JSON-RPC dicts go straight to orjson (when
+    enabled) and cached tool results are embedded as their stored bytes.
+    Content that is not natively serializable falls back to the default path.
+    """
+
+    def render(self, content: Any) -> bytes:
+        try:
+            return dumps(content)
+        except TypeError:
+            return dumps(jsonable_encoder(content))
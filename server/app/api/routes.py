@@ -1,20 +1,60 @@
 import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 import logging
 from datetime import datetime
+from typing import Any
 
 from app.api.models import ErrorResponse
+from app.api.responses import FastJSONResponse
+from fastapi.responses import Response, PlainTextResponse
 from app.agent_services.intent.intent_analysis import (
-    perform_intent_analysis,
-    perform_information_extraction
+    perform_intent_analysis_async,
+    perform_information_extraction_async,
+    perform_analysis_and_extraction_async,
+    default_tool_result
 )
+from app.agent_services.cache import query_cache
+from app.agent_services.llm import LazyLLM, create_llm_executor, warm_up_llms
+from app.agent_services.model_router import model_router
+from app.core.settings import settings
+from app.core.json_codec import loads
+from app.core.deadline import remaining, set_deadline, set_deadline_from_header, tool_call_timeout
+from app.core.admission import admission_controller, set_client_id, ServerBusyError, SERVER_BUSY_CODE
 from app.core.constants import SERVER_CAPABILITIES, AVAILABLE_TOOLS
+from app.core.metrics import request_count, request_latency, tool_call_count, tool_call_latency
+from app.core.tracing import tracer
+from app.api.metrics import render_metrics
 
 # Initialize logger
 logger = logging.getLogger("mcp_server")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the cache and LLM clients on startup and flush the cache and traces on shutdown."""
+    # LLM SDKs without native async (boto3) run in the default executor; size it
+    # for LLM_MAX_CONCURRENCY instead of the small CPU-based default
+    asyncio.get_running_loop().set_default_executor(create_llm_executor())
+    try:
+        await asyncio.to_thread(query_cache.warm_start)
+    except Exception as e:
+        logger.error(f"Cache warm start failed: {str(e)}")
+    # Build the LLM clients in the background so the server starts listening
+    # right away; requests arriving meanwhile wait for the build
+    if settings.LLM_WARM_UP:
+        app.state.llm_warm_up = asyncio.create_task(asyncio.to_thread(warm_up_llms))
+    yield
+    await asyncio.to_thread(query_cache.close)
+    await asyncio.to_thread(tracer.close)
+
 # Initialize FastAPI app
-app = FastAPI(title="Intent Analysis MCP Server")
+app = FastAPI(title="Intent Analysis MCP Server", lifespan=lifespan)
+
+# Metric label values are limited to these; anything else is reported as "other"
+KNOWN_METHODS = {"initialize", "tools/list", "tools/call"}
+KNOWN_TOOLS = {tool["name"] for tool in AVAILABLE_TOOLS}
 
 # Define route handlers for MCP methods - now async
 async def handle_initialize(params: dict) -> dict:
@@ -36,119 +76,140 @@ async def handle_tools_list(params: dict) -> dict:
         "nextCursor": None  # No next page
     }
 
+def _timeout_response(tool_name: str, timeout: float) -> dict:
+    """Build the tools/call result for a call that ran out of time: the tool's default result, flagged."""
+    logger.warning(f"Tool '{tool_name}' timed out after {timeout:.2f} seconds")
+    error = TimeoutError(f"Tool call timed out after {timeout:.2f} seconds")
+    return {
+        "content": [
+            {
+                "type": "text",
+                "text": f"Error: {str(error)}"
+            },
+            {
+                "type": "json",
+                "json": default_tool_result(tool_name, error)
+            }
+        ],
+        "isError": True,
+        "_meta": {"timeout": True}
+    }
+
+# Tool name -> (async implementation, text summary shown before the JSON result)
+TOOL_HANDLERS = {
+    "analyze_intent": (perform_intent_analysis_async, "Đã phân tích ý định cho câu hỏi"),
+    "extract_information": (perform_information_extraction_async, "Đã trích xuất thông tin từ câu hỏi"),
+    "analyze_and_extract": (perform_analysis_and_extraction_async,
+                            "Đã phân tích ý định và trích xuất thông tin cho câu hỏi"),
+}
+
+def _error_result(message: str) -> dict:
+    """Build a tools/call result reporting an error."""
+    return {
+        "content": [
+            {
+                "type": "text",
+                "text": f"Error: {message}"
+            }
+        ],
+        "isError": True
+    }
+
 async def handle_tools_call(params: dict) -> dict:
-    """Handle tools/call method."""
+    """Handle tools/call method.
+
+    The call is bounded by the request deadline, which the router sets from
+    ``tool_call_timeout(params)`` before admission so the queue wait counts
+    against it. The LLM layer reads the same deadline, so provider requests
+    stop waiting once it passes.
+    """
     tool_name = params.get("name")
     arguments = params.get("arguments", {})
-    
-    if tool_name == "analyze_intent":
-        query = arguments.get("query")
-        
-        if not query:
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": "Error: Missing required parameter 'query'"
-                    }
-                ],
-                "isError": True
-            }
-        
-        try:
-            # Use asyncio to run CPU-bound task in a separate thread pool
-            import asyncio
-            result = await asyncio.to_thread(perform_intent_analysis, query)
-            
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"Đã phân tích ý định cho câu hỏi: {query}"
-                    },
-                    {
-                        "type": "json",
-                        "json": result
-                    }
-                ],
-                "isError": False
-            }
-        except Exception as e:
-            logger.error(f"Error executing intent analysis: {str(e)}")
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"Error: {str(e)}"
-                    }
-                ],
-                "isError": True
-            }
-    
-    elif tool_name == "extract_information":
-        query = arguments.get("query")
-        
-        if not query:
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": "Error: Missing required parameter 'query'"
-                    }
-                ],
-                "isError": True
-            }
-        
-        try:
-            # Use asyncio to run CPU-bound task in a separate thread pool
-            import asyncio
-            result = await asyncio.to_thread(perform_information_extraction, query)
-            
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"Đã trích xuất thông tin từ câu hỏi: {query}"
-                    },
-                    {
-                        "type": "json",
-                        "json": result
-                    }
-                ],
-                "isError": False
-            }
-        except Exception as e:
-            logger.error(f"Error executing information extraction: {str(e)}")
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"Error: {str(e)}"
-                    }
-                ],
-                "isError": True
+    timeout = remaining()
+
+    handler = TOOL_HANDLERS.get(tool_name)
+    if handler is None:
+        return _error_result(f"Unknown tool '{tool_name}'")
+    perform, summary = handler
+
+    query = arguments.get("query")
+    if not query:
+        return _error_result("Missing required parameter 'query'")
+
+    try:
+        result = await asyncio.wait_for(perform(query), timeout)
+    except asyncio.TimeoutError:
+        return _timeout_response(tool_name, timeout)
+    except Exception as e:
+        logger.error(f"Error executing tool '{tool_name}': {str(e)}")
+        return _error_result(str(e))
+
+    return {
+        "content": [
+            {
+                "type": "text",
+                "text": f"{summary}: {query}"
+            },
+            {
+                "type": "json",
+                "json": result
             }
+        ],
+        "isError": False
+    }
 
-    else:
-        return {
-            "content": [
-                {
-                    "type": "text",
-                    "text": f"Error: Unknown tool '{tool_name}'"
-                }
-            ],
-            "isError": True
-        }
+def _response_status(response: dict) -> str:
+    """Classify a JSON-RPC response as ok, error, timeout or busy for the metrics."""
+    if "error" in response:
+        return "busy" if response["error"].get("code") == SERVER_BUSY_CODE else "error"
+    result = response.get("result")
+    if isinstance(result, dict) and result.get("isError"):
+        return "timeout" if result.get("_meta", {}).get("timeout") else "error"
+    return "ok"
 
-# Main MCP endpoint
-@app.post("/")
-async def mcp_endpoint(request: Request):
-    """Main endpoint handling JSON-RPC requests according to MCP spec."""
+async def handle_jsonrpc_request(request_data: Any) -> dict:
+    """Handle a single JSON-RPC request object, recording its count and latency.
+
+    A tools/call with ``params._meta.debug`` set is traced and gets a per-stage
+    timing breakdown in ``result._meta.timings``; sampled calls are traced
+    for the span exporter only.
+    """
+    start_time = time.perf_counter()
+    method = request_data.get("method") if isinstance(request_data, dict) else None
+    method = method if method in KNOWN_METHODS else "other"
+    trace = debug = None
+    if method == "tools/call":
+        params = request_data.get("params")
+        params = params if isinstance(params, dict) else {}
+        tool_name = params.get("name")
+        tool_name = tool_name if tool_name in KNOWN_TOOLS else "other"
+        meta = params.get("_meta")
+        debug = bool(meta.get("debug")) if isinstance(meta, dict) else False
+        trace = tracer.begin(f"tools/call {tool_name}", debug=debug, tool=tool_name)
+
+    response = await _route_jsonrpc_request(request_data)
+
+    elapsed = time.perf_counter() - start_time
+    status = _response_status(response)
+    request_count.inc(method, "ok" if status == "ok" else "error")
+    request_latency.observe(elapsed, method)
+    if method == "tools/call":
+        tool_call_count.inc(tool_name, status)
+        tool_call_latency.observe(elapsed, tool_name)
+    if trace is not None:
+        trace.root.attributes["status"] = status
+        tracer.finish(trace)
+        if debug and isinstance(response.get("result"), dict):
+            result = response["result"]
+            result["_meta"] = {**result.get("_meta", {}), "timings": trace.breakdown()}
+    return response
+
+async def _route_jsonrpc_request(request_data: Any) -> dict:
+    """Validate a single JSON-RPC request object and route it to its handler."""
     try:
-        # Parse JSON request
-        request_data = await request.json()
-        
         # Validate JSON-RPC request
+        if not isinstance(request_data, dict):
+            return {"jsonrpc": "2.0", "error": {"code": -32600, "message": "Invalid Request"}, "id": None}
         if not all(k in request_data for k in ["jsonrpc", "method", "id"]):
             raise HTTPException(status_code=400, detail="Invalid JSON-RPC request")
         
@@ -168,7 +229,11 @@ async def mcp_endpoint(request: Request):
         elif method == "tools/list":
             result = await handle_tools_list(params)
         elif method == "tools/call":
-            result = await handle_tools_call(params)
+            # The time budget starts before admission, so it also covers the queue wait
+            set_deadline(tool_call_timeout(params))
+            # Bounded admission queue; raises ServerBusyError when overloaded
+            async with admission_controller.admit(params.get("name")):
+                result = await handle_tools_call(params)
         else:
             # Method not supported
             return {
@@ -187,6 +252,16 @@ async def mcp_endpoint(request: Request):
             "id": request_id
         }
     
+    except ServerBusyError as e:
+        return {
+            "jsonrpc": "2.0",
+            "error": {
+                "code": SERVER_BUSY_CODE,
+                "message": str(e)
+            },
+            "id": request_data.get("id")
+        }
+    
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
         # Return error response
@@ -196,10 +271,75 @@ async def mcp_endpoint(request: Request):
                 "code": -32603,
                 "message": f"Internal error: {str(e)}"
             },
-            "id": request_data.get("id") if "request_data" in locals() else None
+            "id": request_data.get("id") if isinstance(request_data, dict) else None
         }
 
+# Main MCP endpoint
+@app.post("/")
+async def mcp_endpoint(request: Request):
+    """Main endpoint handling JSON-RPC requests according to MCP spec.
+    
+    Accepts a single request object or a JSON-RPC 2.0 batch array. Batch
+    entries are dispatched concurrently and their responses are returned in
+    request order, each with its own result or error. A single request
+    rejected by admission control gets HTTP 429; rejected batch entries
+    carry the "server busy" error in their own response.
+
+    Responses are built as ``FastJSONResponse`` so cached tool results are
+    written from their pre-serialized bytes.
+    """
+    try:
+        # Parse JSON request
+        request_data = loads(await request.body())
+    except Exception as e:
+        logger.error(f"Error parsing request: {str(e)}")
+        return FastJSONResponse({"jsonrpc": "2.0", "error": {"code": -32700, "message": f"Parse error: {str(e)}"}, "id": None})
+    
+    # Deadline for the whole HTTP request; each tools/call may narrow it further
+    set_deadline_from_header(request.headers.get("X-Request-Timeout-Ms"))
+    set_client_id(request.headers.get("X-Client-Id"))
+    
+    if not isinstance(request_data, list):
+        response = await _cancel_on_disconnect(request, handle_jsonrpc_request(request_data))
+        if isinstance(response, Response):
+            return response
+        if response.get("error", {}).get("code") == SERVER_BUSY_CODE:
+            return FastJSONResponse(status_code=429, content=response, headers={"Retry-After": "1"})
+        return FastJSONResponse(response)
+    
+    # Batch request
+    if not request_data or len(request_data) > settings.MCP_MAX_BATCH_SIZE:
+        return FastJSONResponse({"jsonrpc": "2.0", "error": {"code": -32600, "message": "Invalid Request"}, "id": None})
+    
+    responses = await _cancel_on_disconnect(
+        request, asyncio.gather(*(handle_jsonrpc_request(entry) for entry in request_data))
+    )
+    return responses if isinstance(responses, Response) else FastJSONResponse(list(responses))
+
+async def _cancel_on_disconnect(request: Request, awaitable) -> Any:
+    """Await ``awaitable``, cancelling it if the client disconnects first."""
+    task = asyncio.ensure_future(awaitable)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=settings.DISCONNECT_POLL_INTERVAL)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            task.cancel()
+            logger.info("Client disconnected, cancelled its pending work")
+            # Nobody is listening; 499 (client closed request) is only for access logs
+            return Response(status_code=499)
+
+# Prometheus metrics route
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Health check route
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "admission": admission_controller.get_stats(),
+        "llm": {tier: model.get_stats() for tier, model in model_router.tiers.items() if isinstance(model, LazyLLM)}
+    }
\ No newline at end of file
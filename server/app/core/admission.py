@@ -0,0 +1,204 @@
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Optional
+
+from app.core.settings import settings
+from app.core.deadline import remaining
+from app.core.tracing import span
+
+# Initialize logger
+logger = logging.getLogger("mcp_server")
+
+# Priority lanes, highest first
+LANES = ("high", "normal", "low")
+
+# JSON-RPC server error code returned when a call is not admitted
+SERVER_BUSY_CODE = -32000
+
+# Client identity (X-Client-Id header) of the request being handled, if any
+_client_id: ContextVar[Optional[str]] = ContextVar("client_id", default=None)
+
+def set_client_id(value: Optional[str]) -> None:
+    """Set the client identity of the current request."""
+    _client_id.set(value or None)
+
+class ServerBusyError(Exception):
+    """Raised when a tool call is rejected or shed by admission control."""
+
+class _Waiter:
+    """A queued tool call waiting for a slot."""
+
+    __slots__ = ("lane", "future")
+
+    def __init__(self, lane: str, future: asyncio.Future):
+        self.lane = lane
+        self.future = future
+
+class AdmissionController:
+    """Bounded admission queue in front of tool calls, with priority lanes.
+
+    At most ``max_concurrency`` tool calls run at once. Further calls wait in
+    one FIFO queue per lane and a freed slot goes to the oldest call of the
+    highest non-empty lane. The queues hold ``max_queue`` calls in total;
+    when they are full, a new call sheds the newest call of a lower lane, or
+    is rejected with ``ServerBusyError`` straight away if there is none. A
+    call that waits longer than ``queue_timeout`` (or past its request
+    deadline) is rejected as well, so overload surfaces as fast "server busy"
+    errors instead of ever-growing latency.
+
+    The lane of a call comes from its client (``X-Client-Id`` header) if that
+    client has a configured priority, otherwise from the tool name, otherwise
+    ``"normal"``.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.ADMISSION_ENABLED,
+        max_concurrency: int = settings.ADMISSION_MAX_CONCURRENCY,
+        max_queue: int = settings.ADMISSION_MAX_QUEUE,
+        queue_timeout: float = settings.ADMISSION_QUEUE_TIMEOUT,
+        client_priorities: Optional[Dict[str, str]] = None,
+        tool_priorities: Optional[Dict[str, str]] = None
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            enabled: Whether calls are limited at all
+            max_concurrency: Tool calls allowed to run at once
+            max_queue: Calls allowed to wait for a slot, across all lanes
+            queue_timeout: Longest time a call may wait for a slot, in seconds
+            client_priorities: Lane per client id, defaults to ``ADMISSION_CLIENT_PRIORITIES``
+            tool_priorities: Lane per tool name, defaults to ``ADMISSION_TOOL_PRIORITIES``
+        """
+        self.enabled = enabled
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.client_priorities = settings.ADMISSION_CLIENT_PRIORITIES if client_priorities is None else client_priorities
+        self.tool_priorities = settings.ADMISSION_TOOL_PRIORITIES if tool_priorities is None else tool_priorities
+        self.active = 0
+        self._queues: Dict[str, Deque[_Waiter]] = {lane: deque() for lane in LANES}
+        self._stats = {
+            lane: {"admitted": 0, "queued": 0, "rejected": 0, "shed": 0, "timed_out": 0}
+            for lane in LANES
+        }
+
+    def lane(self, tool_name: Optional[str]) -> str:
+        """Get the priority lane of a call to ``tool_name`` from the current client."""
+        lane = self.client_priorities.get(_client_id.get()) or self.tool_priorities.get(tool_name) or "normal"
+        return lane if lane in LANES else "normal"
+
+    def queue_depth(self) -> int:
+        """Number of calls waiting for a slot."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _shed_lower(self, lane: str) -> bool:
+        """Reject the newest waiter of the lowest lane below ``lane``; False if there is none."""
+        for victim_lane in reversed(LANES[LANES.index(lane) + 1:]):
+            queue = self._queues[victim_lane]
+            if queue:
+                victim = queue.pop()
+                self._stats[victim_lane]["shed"] += 1
+                victim.future.set_exception(ServerBusyError("Server busy: shed for higher-priority traffic"))
+                return True
+        return False
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Remove a waiter that stopped waiting, returning a slot that was already handed to it."""
+        future = waiter.future
+        if future.done() and not future.cancelled() and future.exception() is None:
+            self.release()
+            return
+        try:
+            self._queues[waiter.lane].remove(waiter)
+        except ValueError:
+            pass
+
+    async def acquire(self, lane: str) -> None:
+        """
+        Wait for a slot in ``lane``.
+
+        Args:
+            lane: One of ``LANES``
+
+        Raises:
+            ServerBusyError: If the queue is full, the call was shed or it waited too long
+        """
+        stats = self._stats[lane]
+        if self.active < self.max_concurrency and not self.queue_depth():
+            self.active += 1
+            stats["admitted"] += 1
+            return
+
+        if self.queue_depth() >= self.max_queue and not self._shed_lower(lane):
+            stats["rejected"] += 1
+            logger.warning(f"Admission queue full, rejecting {lane}-priority tool call")
+            raise ServerBusyError("Server busy: admission queue is full")
+
+        waiter = _Waiter(lane, asyncio.get_running_loop().create_future())
+        self._queues[lane].append(waiter)
+        stats["queued"] += 1
+
+        timeout = self.queue_timeout
+        time_left = remaining()
+        if time_left is not None:
+            timeout = min(timeout, time_left)
+        try:
+            done, _ = await asyncio.wait({waiter.future}, timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not done:
+            self._abandon(waiter)
+            stats["timed_out"] += 1
+            logger.warning(f"{lane}-priority tool call waited {timeout:.2f} seconds for a slot, rejecting")
+            raise ServerBusyError("Server busy: timed out waiting for a slot")
+        # Raises ServerBusyError if a higher-priority call shed this one
+        waiter.future.result()
+        stats["admitted"] += 1
+
+    def release(self) -> None:
+        """Hand the slot of a finished call to the next waiter, or free it."""
+        for lane in LANES:
+            queue = self._queues[lane]
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.future.done():
+                    waiter.future.set_result(None)
+                    return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def admit(self, tool_name: Optional[str]):
+        """Hold a slot for the duration of a call to ``tool_name``: ``async with admission_controller.admit(name):``."""
+        if not self.enabled:
+            yield
+            return
+        lane = self.lane(tool_name)
+        with span("admission_queue", lane=lane):
+            await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get slot usage, queue depth per lane and admission counters."""
+        return {
+            "enabled": self.enabled,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queue_depth": self.queue_depth(),
+            "lanes": {
+                lane: {"queue_depth": len(self._queues[lane]), **self._stats[lane]}
+                for lane in LANES
+            }
+        }
+
+# Initialize admission control
+admission_controller = AdmissionController()
@@ -50,6 +50,24 @@ AVAILABLE_TOOLS = [
             "description": "Thông tin đã trích xuất"
         }
     },
+    {
+        "name": "analyze_and_extract",
+        "description": "Phân tích ý định và trích xuất thông tin từ câu hỏi của người dùng trong một lần gọi (kết hợp analyze_intent và extract_information)",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Câu hỏi của người dùng cần phân tích và trích xuất thông tin"
+                }
+            },
+            "required": ["query"]
+        },
+        "returns": {
+            "type": "object",
+            "description": "Kết quả phân tích ý định và thông tin đã trích xuất"
+        }
+    },
     {
         "name": "define_question_type",
         "description": "Xác định loại câu hỏi của người dùng",
@@ -0,0 +1,53 @@
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from app.core.settings import settings
+
+# Absolute deadline (time.monotonic()) of the request being handled, if any
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+def _parse_ms(value: Any) -> Optional[float]:
+    """Convert a millisecond timeout to seconds; invalid or non-positive values are ignored."""
+    try:
+        seconds = float(value) / 1000
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds > 0 else None
+
+def set_deadline(timeout: Optional[float]) -> None:
+    """Set the deadline of the current request ``timeout`` seconds from now (None clears it)."""
+    _deadline.set(time.monotonic() + timeout if timeout else None)
+
+def set_deadline_from_header(value: Optional[str]) -> None:
+    """Set the deadline from an ``X-Request-Timeout-Ms`` header value."""
+    set_deadline(_parse_ms(value))
+
+def remaining() -> Optional[float]:
+    """Seconds left until the current deadline, or None without a deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+def tool_call_timeout(params: Dict[str, Any]) -> Optional[float]:
+    """
+    Compute the time budget of a tools/call request.
+
+    The budget is the smallest of the server's ``TOOL_CALL_TIMEOUT``, the
+    request header deadline and ``params._meta.timeoutMs``.
+
+    Args:
+        params: JSON-RPC params of the call
+
+    Returns:
+        Optional[float]: Seconds allowed, or None for no limit
+    """
+    meta = params.get("_meta") or {}
+    candidates = [
+        settings.TOOL_CALL_TIMEOUT or None,
+        remaining(),
+        _parse_ms(meta.get("timeoutMs")) if isinstance(meta, dict) else None
+    ]
+    candidates = [candidate for candidate in candidates if candidate is not None]
+    return min(candidates) if candidates else None
@@ -0,0 +1,66 @@
+import json
+from typing import Any, Dict, Union
+
+from app.core.settings import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# orjson when installed and enabled, the stdlib json module otherwise
+FAST_JSON = orjson is not None and settings.FAST_JSON_ENABLED
+
+class PreSerialized(dict):
+    """A JSON object kept together with its UTF-8 encoding.
+
+    Cached tool results are stored as ``PreSerialized`` so that a cache hit can
+    be written to the response by copying ``raw`` instead of encoding the
+    object again. Callers still see a plain dict; it must be treated as
+    read-only, since ``raw`` is not updated when it changes.
+    """
+
+    __slots__ = ("raw",)
+
+    def __init__(self, value: Dict[str, Any], raw: bytes):
+        super().__init__(value)
+        self.raw = raw
+
+def _default(obj: Any) -> Any:
+    # With OPT_PASSTHROUGH_SUBCLASS every subclass of a builtin type lands here
+    if isinstance(obj, PreSerialized):
+        return orjson.Fragment(obj.raw)
+    for base in (dict, list, str, int, float):
+        if isinstance(obj, base):
+            return base(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize to compact UTF-8 JSON.
+
+    ``PreSerialized`` values are embedded as their stored bytes when orjson is used.
+
+    Raises:
+        TypeError: If ``obj`` contains a value that is not JSON serializable
+    """
+    if FAST_JSON:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_PASSTHROUGH_SUBCLASS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse JSON from bytes or a string.
+
+    Raises:
+        ValueError: If ``data`` is not valid JSON
+    """
+    if FAST_JSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def pre_serialize(value: Dict[str, Any]) -> PreSerialized:
+    """Encode ``value`` once and keep the bytes with it."""
+    if isinstance(value, PreSerialized):
+        return value
+    return PreSerialized(value, dumps(value))
@@ -0,0 +1,177 @@
+import bisect
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+# Default latency buckets in seconds, from cache hits to slow LLM calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricFamily:
+    """Samples of one metric collected at scrape time, e.g. from a ``get_stats`` dict."""
+
+    def __init__(self, name: str, kind: str, help_text: str):
+        """
+        Initialize the family.
+
+        Args:
+            name: Metric name
+            kind: ``"counter"`` or ``"gauge"``
+            help_text: One-line description
+        """
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.samples: List[Tuple[Dict[str, Any], float]] = []
+
+    def add(self, value: float, **labels: Any) -> "MetricFamily":
+        """Add one sample."""
+        self.samples.append((labels, value))
+        return self
+
+    def render(self, lines: List[str]) -> None:
+        """Append the family in Prometheus text format to ``lines``."""
+        lines.append(f"# HELP {self.name} {self.help_text}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for labels, value in self.samples:
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+
+class Counter:
+    """Monotonic counter with labels, updated on the request path."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        """
+        Initialize the counter.
+
+        Args:
+            name: Metric name, conventionally ending in ``_total``
+            help_text: One-line description
+            labelnames: Names of the labels passed to ``inc``, in order
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        """Add ``amount`` to the series identified by ``labelvalues``."""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self, lines: List[str]) -> None:
+        """Append the counter in Prometheus text format to ``lines``."""
+        with self._lock:
+            values = list(self._values.items())
+        family = MetricFamily(self.name, "counter", self.help_text)
+        for labelvalues, value in values:
+            family.add(value, **dict(zip(self.labelnames, labelvalues)))
+        family.render(lines)
+
+class Histogram:
+    """Fixed-bucket histogram with labels, updated on the request path.
+
+    ``observe`` costs one lock, one dict lookup and a bisect; cumulative
+    bucket counts are only computed when the histogram is rendered.
+    """
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            name: Metric name, e.g. ``mcp_request_duration_seconds``
+            help_text: One-line description
+            labelnames: Names of the labels passed to ``observe``, in order
+            buckets: Sorted upper bounds; ``+Inf`` is implied
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # Per series: [count per bucket (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """Record ``value`` in the series identified by ``labelvalues``."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self, lines: List[str]) -> None:
+        """Append the histogram in Prometheus text format to ``lines``."""
+        with self._lock:
+            series = [(labelvalues, list(counts), total, count)
+                      for labelvalues, (counts, total, count) in self._series.items()]
+        lines.append(f"# HELP {self.name} {self.help_text}")
+        lines.append(f"# TYPE {self.name} histogram")
+        for labelvalues, counts, total, count in series:
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                bucket_labels = {**labels, "le": _format_value(bound)}
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+
+class MetricsRegistry:
+    """Renders request-path metrics and scrape-time collectors in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def register(self, metric: Any) -> Any:
+        """Add a ``Counter`` or ``Histogram``; returns it for assignment."""
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """Add a function producing metric families when ``/metrics`` is scraped."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render every metric, running the collectors now."""
+        lines: List[str] = []
+        for metric in self._metrics:
+            metric.render(lines)
+        for collector in self._collectors:
+            for family in collector():
+                family.render(lines)
+        return "\n".join(lines) + "\n"
+
+# Initialize metrics registry
+metrics_registry = MetricsRegistry()
+
+# Request-path metrics, labelled with bounded values only (known methods and tools)
+request_count = metrics_registry.register(Counter(
+    "mcp_requests_total", "JSON-RPC requests by method and outcome", ("method", "status")
+))
+request_latency = metrics_registry.register(Histogram(
+    "mcp_request_duration_seconds", "JSON-RPC request latency by method", ("method",)
+))
+tool_call_count = metrics_registry.register(Counter(
+    "mcp_tool_calls_total", "tools/call requests by tool and outcome (ok, error, timeout, busy)", ("tool", "status")
+))
+tool_call_latency = metrics_registry.register(Histogram(
+    "mcp_tool_call_duration_seconds", "tools/call latency by tool, including admission queueing", ("tool",)
+))
@@ -1,27 +1,97 @@
 import os
 from dotenv import load_dotenv
+from typing import Dict
 from pydantic import BaseModel
 
 # Load environment variables
 load_dotenv()
 
+def _parse_tool_seconds(value: str) -> Dict[str, int]:
+    """Parse ``"tool_a=60,tool_b=120"`` into ``{"tool_a": 60, "tool_b": 120}``."""
+    result = {}
+    for item in value.split(","):
+        if "=" in item:
+            tool_name, seconds = item.split("=", 1)
+            result[tool_name.strip()] = int(seconds)
+    return result
+
+def _parse_names(value: str) -> Dict[str, str]:
+    """Parse ``"a=high,b=low"`` into ``{"a": "high", "b": "low"}``."""
+    result = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, label = item.split("=", 1)
+            result[name.strip()] = label.strip().lower()
+    return result
+
 class Settings(BaseModel):
     # Server settings
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "5002"))
+    MCP_MAX_BATCH_SIZE: int = int(os.getenv("MCP_MAX_BATCH_SIZE", "50"))  # Entries allowed in one JSON-RPC batch
+    FAST_JSON_ENABLED: bool = os.getenv("FAST_JSON_ENABLED", "true").lower() == "true"  # Parse and serialize MCP messages with orjson when installed
+    TOOL_CALL_TIMEOUT: float = float(os.getenv("TOOL_CALL_TIMEOUT", "30"))  # Seconds per tools/call, 0 disables
+    DISCONNECT_POLL_INTERVAL: float = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.5"))  # Seconds between client disconnect checks
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0"))  # Share of tool calls traced without the debug flag
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "").lower()  # "jsonl", "otel" or empty to keep spans in-process
+    TRACE_JSONL_PATH: str = os.getenv("TRACE_JSONL_PATH", "traces.jsonl")  # File spans are appended to with TRACE_EXPORTER=jsonl
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"  # Bound concurrent and queued tool calls
+    ADMISSION_MAX_CONCURRENCY: int = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64"))  # Tool calls running at once
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "128"))  # Tool calls waiting for a slot before "server busy"
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))  # Seconds a call may wait for a slot
+    ADMISSION_CLIENT_PRIORITIES: Dict[str, str] = _parse_names(os.getenv("ADMISSION_CLIENT_PRIORITIES", ""))  # e.g. "chat=high,batch=low"
+    ADMISSION_TOOL_PRIORITIES: Dict[str, str] = _parse_names(os.getenv("ADMISSION_TOOL_PRIORITIES", ""))  # e.g. "analyze_intent=high"
     
     # Cache settings
     CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))  # Default: 1 hour
     MAX_CACHE_SIZE: int = int(os.getenv("MAX_CACHE_SIZE", "1000"))
+    MAX_CACHE_BYTES: int = int(os.getenv("MAX_CACHE_BYTES", str(64 * 1024 * 1024)))  # Serialized bytes, 0 disables
+    CACHE_SWEEP_INTERVAL: int = int(os.getenv("CACHE_SWEEP_INTERVAL", "60"))  # Seconds between expiry sweeps, 0 disables
+    CACHE_GRACE: int = int(os.getenv("CACHE_GRACE", "0"))  # Seconds an expired entry may be served while refreshing
+    CACHE_TOOL_TTLS: Dict[str, int] = _parse_tool_seconds(os.getenv("CACHE_TOOL_TTLS", ""))  # e.g. "analyze_intent=7200"
+    CACHE_TOOL_GRACE: Dict[str, int] = _parse_tool_seconds(os.getenv("CACHE_TOOL_GRACE", "analyze_intent=1800"))
+    CACHE_REFRESH_WORKERS: int = int(os.getenv("CACHE_REFRESH_WORKERS", "2"))  # Threads for stale-while-revalidate refreshes
+    CACHE_KEY_NORMALIZE: bool = os.getenv("CACHE_KEY_NORMALIZE", "true").lower() == "true"  # Canonicalize queries before hashing
+    CACHE_KEY_FOLD_DIACRITICS: bool = os.getenv("CACHE_KEY_FOLD_DIACRITICS", "false").lower() == "true"  # Also strip Vietnamese accents
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"  # Reuse results of near-duplicate queries
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))  # Minimum cosine similarity for a hit
+    SEMANTIC_CACHE_MAX_SIZE: int = int(os.getenv("SEMANTIC_CACHE_MAX_SIZE", "2000"))  # Vectors kept per tool
+    CACHE_PERSIST_PATH: str = os.getenv("CACHE_PERSIST_PATH", "")  # SQLite file for the persistent tier, empty disables
+    CACHE_FLUSH_INTERVAL: float = float(os.getenv("CACHE_FLUSH_INTERVAL", "1.0"))  # Seconds between write-behind flushes
+    CACHE_WARM_START_SIZE: int = int(os.getenv("CACHE_WARM_START_SIZE", "1000"))  # Entries pre-loaded on startup
     
     # LLM settings
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4")
+    INTENT_FAST_PATH_ENABLED: bool = os.getenv("INTENT_FAST_PATH_ENABLED", "false").lower() == "true"  # Classify trivial queries locally
+    INFO_PREEXTRACT_ENABLED: bool = os.getenv("INFO_PREEXTRACT_ENABLED", "false").lower() == "true"  # Pre-fill entities before extraction
+    COMPANIES_JSON_PATH: str = os.getenv(
+        "COMPANIES_JSON_PATH",
+        os.path.join(os.path.dirname(__file__), "..", "..", "..", "companies.json")
+    )  # Extra stock codes for entity pre-extraction
+    EXTRACTION_PREFETCH_ENABLED: bool = os.getenv("EXTRACTION_PREFETCH_ENABLED", "false").lower() == "true"  # Start extract_information with analyze_intent
+    EXTRACTION_PREFETCH_MAX_CONCURRENCY: int = int(os.getenv("EXTRACTION_PREFETCH_MAX_CONCURRENCY", "8"))  # Concurrent speculative extractions
+    LLM_ROUTING_ENABLED: bool = os.getenv("LLM_ROUTING_ENABLED", "false").lower() == "true"  # Send simple queries to the small model
+    LLM_ROUTING_THRESHOLD: float = float(os.getenv("LLM_ROUTING_THRESHOLD", "1.0"))  # Complexity score from which the large model is used
+    OPENAI_SMALL_MODEL: str = os.getenv("OPENAI_SMALL_MODEL", "gpt-4o-mini")
+    PROMPT_CACHE_ENABLED: bool = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"  # Mark static system prompts cacheable
+    LLM_HEDGING_ENABLED: bool = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"  # Duplicate slow calls to the secondary backend
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))  # Primary latency percentile used as hedge delay
+    LLM_HEDGE_INITIAL_DELAY: float = float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "5.0"))  # Hedge delay before enough samples exist
+    LLM_HEDGE_MIN_DELAY: float = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))  # Lower bound of the hedge delay
+    LLM_BREAKER_FAILURES: int = int(os.getenv("LLM_BREAKER_FAILURES", "5"))  # Consecutive failures that open a backend's circuit
+    LLM_BREAKER_RESET_SECONDS: float = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))  # Seconds before a probe call
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))  # Concurrent async LLM calls
+    LLM_EXECUTOR_WORKERS: int = int(os.getenv("LLM_EXECUTOR_WORKERS", "80"))  # Threads for blocking SDK calls, including every Bedrock call
+    LLM_WARM_UP: bool = os.getenv("LLM_WARM_UP", "true").lower() == "true"  # Build the LLM clients in the background on startup instead of on the first call
     
     # AWS Bedrock settings
     BEDROCK_REGION: str = os.getenv("BEDROCK_REGION", "us-east-1")
     BEDROCK_MODEL_ID: str = os.getenv("BEDROCK_MODEL_ID", "us.anthropic.claude-3-5-sonnet-20241022-v2:0")
+    BEDROCK_READ_TIMEOUT: int = int(os.getenv("BEDROCK_READ_TIMEOUT", "30"))  # Socket read timeout of the Bedrock client, capped so all attempts fit in TOOL_CALL_TIMEOUT
+    BEDROCK_MAX_ATTEMPTS: int = int(os.getenv("BEDROCK_MAX_ATTEMPTS", "2"))  # Including the first attempt
+    BEDROCK_SMALL_MODEL_ID: str = os.getenv("BEDROCK_SMALL_MODEL_ID", "us.anthropic.claude-3-5-haiku-20241022-v1:0")
 
 # Initialize settings
 settings = Settings()
\ No newline at end of file
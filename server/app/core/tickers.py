@@ -0,0 +1,116 @@
+# Ticker universe shared by the local (non-LLM) query helpers.
+# Mirrors STOCK_INDICES in load_es_data.py and KNOWLEDGE_VALUES_INDUSTRIES in
+# test_to_table.py; keep them in sync when the index membership changes.
+
+# Index membership for each stock code
+STOCK_INDICES = {
+    # VN30 stocks
+    'ACB': 'VN30', 'BCM': 'VN30', 'BID': 'VN30', 'BVH': 'VN30', 'CTG': 'VN30',
+    'FPT': 'VN30', 'GAS': 'VN30', 'GVR': 'VN30', 'HDB': 'VN30', 'HPG': 'VN30',
+    'MBB': 'VN30', 'MSN': 'VN30', 'MWG': 'VN30', 'PLX': 'VN30', 'POW': 'VN30',
+    'SAB': 'VN30', 'SHB': 'VN30', 'SSB': 'VN30', 'SSI': 'VN30', 'STB': 'VN30',
+    'TCB': 'VN30', 'TPB': 'VN30', 'VCB': 'VN30', 'VHM': 'VN30', 'VIB': 'VN30',
+    'VIC': 'VN30', 'VJC': 'VN30', 'VNM': 'VN30', 'VPB': 'VN30', 'VRE': 'VN30',
+    
+    # VN100 stocks
+    'AAA': 'VN100', 'ANV': 'VN100', 'ASM': 'VN100', 'BCG': 'VN100', 'BMP': 'VN100',
+    'BSI': 'VN100', 'BWE': 'VN100', 'CII': 'VN100', 'CMG': 'VN100', 'CRE': 'VN100',
+    'CTD': 'VN100', 'CTR': 'VN100', 'DBC': 'VN100', 'DCM': 'VN100', 'DGC': 'VN100',
+    'DGW': 'VN100', 'DIG': 'VN100', 'DPM': 'VN100', 'DXG': 'VN100', 'DXS': 'VN100',
+    'EIB': 'VN100', 'EVF': 'VN100', 'FRT': 'VN100', 'FTS': 'VN100', 'GEX': 'VN100',
+    'GMD': 'VN100', 'HAG': 'VN100', 'HCM': 'VN100', 'HDC': 'VN100', 'HDG': 'VN100',
+    'HHV': 'VN100', 'HSG': 'VN100', 'HT1': 'VN100', 'IMP': 'VN100', 'KBC': 'VN100',
+    'KDC': 'VN100', 'KDH': 'VN100', 'KOS': 'VN100', 'LPB': 'VN100', 'MSB': 'VN100',
+    'NKG': 'VN100', 'NLG': 'VN100', 'NT2': 'VN100', 'NVL': 'VN100', 'OCB': 'VN100',
+    'PAN': 'VN100', 'PC1': 'VN100', 'PDR': 'VN100', 'PHR': 'VN100', 'PNJ': 'VN100',
+    'PPC': 'VN100', 'PTB': 'VN100', 'PVD': 'VN100', 'PVT': 'VN100', 'REE': 'VN100',
+    'SBT': 'VN100', 'SCS': 'VN100', 'SIP': 'VN100', 'SJS': 'VN100', 'SZC': 'VN100',
+    'TCH': 'VN100', 'TLG': 'VN100', 'VCG': 'VN100', 'VCI': 'VN100', 'VGC': 'VN100',
+    'VHC': 'VN100', 'VIX': 'VN100', 'VND': 'VN100', 'VPI': 'VN100', 'VSH': 'VN100'
+}
+
+# Industry of each stock code
+KNOWLEDGE_VALUES_INDUSTRIES = {
+    'banks': ['ACB', 'BID', 'CTG', 'EIB', 'HDB', 'LPB', 'MBB', 'MSB', 'OCB', 'SHB', 'SSB', 'STB', 'TCB', 'TPB', 'VCB', 'VIB', 'VPB', 'NAB'],
+    'basic_resources': ['HPG', 'HSG', 'NKG', 'PTB'],
+    'chemicals': ['AAA', 'DCM', 'DGC', 'DPM', 'GVR', 'PHR'],
+    'construction_materials': ['BMP', 'CII', 'CTD', 'CTR', 'HHV', 'HT1', 'PC1', 'VCG', 'VGC'],
+    'finacial_services': ['BCG', 'BSI', 'EVF', 'FTS', 'HCM', 'SSI', 'VCI', 'VIX', 'VND', 'CTS', 'HVA'],
+    'food_beverage': ['ANV', 'ASM', 'DBC', 'HAG', 'KDC', 'MSN', 'PAN', 'SAB', 'SBT', 'VHC', 'VNM'],
+    'health_care': ['IMP'],
+    'industrial_goods_services': ['GEX', 'GMD', 'PVT', 'REE', 'VTP'],
+    'insurance': ['BVH'],
+    'oil_gas': ['PLX', 'PVD'],
+    'personal_household_goods': ['PNJ', 'TLG'],
+    'real_estate': ['BCM', 'CRE', 'DIG', 'DXG', 'DXS', 'HDC', 'HDG', 'KBC', 'KDH', 'KOS', 'NLG', 'NVL', 'PDR', 'SIP', 'SJS', 'SZC', 'TCH', 'VHM', 'VIC', 'VPI', 'VRE'],
+    'retail': ['DGW', 'FRT', 'MWG'],
+    'technology': ['CMG', 'FPT'],
+    'travel_leisure': ['SCS', 'VJC'],
+    'utilities': ['BWE', 'GAS', 'NT2', 'POW', 'PPC', 'VSH'],
+    'media': [],
+    'telecommunications': [],
+    'automobiles_parts': []
+}
+
+# All stock codes the server knows about
+KNOWN_TICKERS = frozenset(STOCK_INDICES) | frozenset(
+    code for codes in KNOWLEDGE_VALUES_INDUSTRIES.values() for code in codes
+)
+
+# Company names and common aliases for well-known stock codes.
+# The first name is the canonical one reported in company_names.
+COMPANY_NAMES = {
+    'ACB': ['Ngân hàng Á Châu', 'Á Châu'],
+    'BCM': ['Becamex IDC', 'Becamex'],
+    'BID': ['BIDV', 'Ngân hàng Đầu tư và Phát triển'],
+    'BVH': ['Bảo Việt', 'Tập đoàn Bảo Việt'],
+    'CTG': ['VietinBank', 'Ngân hàng Công Thương'],
+    'DCM': ['Đạm Cà Mau', 'Phân bón Dầu khí Cà Mau'],
+    'DGC': ['Hóa chất Đức Giang', 'Đức Giang'],
+    'DPM': ['Đạm Phú Mỹ', 'Phân bón và Hóa chất Dầu khí'],
+    'DXG': ['Đất Xanh', 'Tập đoàn Đất Xanh'],
+    'EIB': ['Eximbank'],
+    'FPT': ['FPT Corporation', 'Tập đoàn FPT'],
+    'FRT': ['FPT Retail', 'FPT Long Châu'],
+    'GAS': ['PV Gas', 'Tổng công ty Khí Việt Nam'],
+    'GMD': ['Gemadept'],
+    'GVR': ['Tập đoàn Cao su Việt Nam', 'Cao su Việt Nam'],
+    'HCM': ['Chứng khoán HSC', 'HSC'],
+    'HDB': ['HDBank'],
+    'HPG': ['Hòa Phát', 'Tập đoàn Hòa Phát'],
+    'HSG': ['Hoa Sen', 'Tập đoàn Hoa Sen'],
+    'KBC': ['Kinh Bắc', 'Đô thị Kinh Bắc'],
+    'KDH': ['Nhà Khang Điền', 'Khang Điền'],
+    'LPB': ['LPBank', 'Ngân hàng Lộc Phát'],
+    'MBB': ['MB Bank', 'MBBank', 'Ngân hàng Quân Đội'],
+    'MSB': ['Ngân hàng Hàng Hải', 'Maritime Bank'],
+    'MSN': ['Masan', 'Tập đoàn Masan'],
+    'MWG': ['Thế Giới Di Động', 'Mobile World'],
+    'NKG': ['Thép Nam Kim', 'Nam Kim'],
+    'NVL': ['Novaland'],
+    'OCB': ['Ngân hàng Phương Đông', 'Orient Commercial Bank'],
+    'PDR': ['Phát Đạt', 'Bất động sản Phát Đạt'],
+    'PLX': ['Petrolimex', 'Tập đoàn Xăng dầu Việt Nam'],
+    'PNJ': ['Vàng bạc Đá quý Phú Nhuận', 'Phú Nhuận'],
+    'POW': ['PV Power', 'Điện lực Dầu khí Việt Nam'],
+    'PVD': ['PV Drilling', 'Khoan Dầu khí'],
+    'PVT': ['PVTrans', 'Vận tải Dầu khí'],
+    'SAB': ['Sabeco', 'Bia Sài Gòn'],
+    'SHB': ['Ngân hàng Sài Gòn - Hà Nội', 'Ngân hàng SHB'],
+    'SSB': ['SeABank', 'Ngân hàng Đông Nam Á'],
+    'SSI': ['Chứng khoán SSI'],
+    'STB': ['Sacombank'],
+    'TCB': ['Techcombank'],
+    'TPB': ['TPBank', 'Ngân hàng Tiên Phong'],
+    'VCB': ['Vietcombank', 'Ngân hàng Ngoại thương'],
+    'VCI': ['Vietcap', 'Chứng khoán Vietcap'],
+    'VHC': ['Vĩnh Hoàn', 'Thủy sản Vĩnh Hoàn'],
+    'VHM': ['Vinhomes'],
+    'VIB': ['Ngân hàng Quốc tế', 'VIB Bank'],
+    'VIC': ['Vingroup', 'Tập đoàn Vingroup'],
+    'VJC': ['Vietjet', 'Vietjet Air'],
+    'VND': ['VNDirect', 'Chứng khoán VNDirect'],
+    'VNM': ['Vinamilk', 'Sữa Việt Nam'],
+    'VPB': ['VPBank', 'Ngân hàng Việt Nam Thịnh Vượng'],
+    'VRE': ['Vincom Retail'],
+}
@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import queue
+import random
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from app.core.settings import settings
+
+# Initialize logger
+logger = logging.getLogger("mcp_server")
+
+# Trace of the request being handled and the innermost open span, if any
+_trace: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+class Span:
+    """One timed stage of a traced request."""
+
+    __slots__ = ("name", "span_id", "parent", "start", "end", "attributes")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.attributes = attributes
+
+class Trace:
+    """Spans recorded for one request."""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.trace_id = os.urandom(16).hex()
+        self.start_ns = time.time_ns()
+        self.root = Span(name, None, attributes)
+        self.spans: List[Span] = [self.root]
+        self.finished = False
+
+    def unix_nanos(self, perf_time: float) -> int:
+        """Convert a ``time.perf_counter()`` reading of this trace to Unix nanoseconds."""
+        return self.start_ns + int((perf_time - self.root.start) * 1e9)
+
+    def breakdown(self) -> Dict[str, Any]:
+        """
+        Per-stage timings relative to the start of the request.
+
+        Returns:
+            Dict[str, Any]: ``total_ms`` and the finished spans in start order, each
+            with its parent stage, ``start_ms``, ``duration_ms`` and attributes
+        """
+        spans = sorted((recorded for recorded in self.spans[1:] if recorded.end is not None),
+                       key=lambda recorded: recorded.start)
+        return {
+            "total_ms": round((self.root.end - self.root.start) * 1000, 3),
+            "spans": [
+                {
+                    "name": recorded.name,
+                    "parent": recorded.parent.name,
+                    "start_ms": round((recorded.start - self.root.start) * 1000, 3),
+                    "duration_ms": round((recorded.end - recorded.start) * 1000, 3),
+                    **recorded.attributes
+                }
+                for recorded in spans
+            ]
+        }
+
+class span:
+    """Time a stage of the current request: ``with span("llm_call", tier=tier) as s:``.
+
+    Without an active trace this is a no-op costing a context variable read,
+    so stages can be instrumented on the hot path. ``s`` is None then;
+    ``s.attributes`` can be updated inside the block otherwise.
+    """
+
+    __slots__ = ("name", "attributes", "_span", "_token")
+
+    def __init__(self, name: str, **attributes: Any):
+        self.name = name
+        self.attributes = attributes
+        self._span = None
+
+    def __enter__(self) -> Optional[Span]:
+        trace = _trace.get()
+        if trace is None or trace.finished:
+            return None
+        self._span = Span(self.name, _current_span.get() or trace.root, self.attributes)
+        self._token = _current_span.set(self._span)
+        trace.spans.append(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._span is None:
+            return
+        self._span.end = time.perf_counter()
+        if exc_type is not None:
+            self._span.attributes["error"] = exc_type.__name__
+        _current_span.reset(self._token)
+
+def detach() -> None:
+    """Stop recording spans in the current context, e.g. in a background task started by a traced request."""
+    _trace.set(None)
+    _current_span.set(None)
+
+class JsonlSpanExporter:
+    """Appends finished spans to a file, one OpenTelemetry-shaped JSON object per line.
+
+    ``export`` runs on the event loop at the end of every traced request, so
+    it only queues the trace; a background thread serializes the spans and
+    appends everything queued in one write. When the queue is full the trace
+    is dropped and counted rather than blocking the request.
+    """
+
+    def __init__(self, path: str, max_queue: int = 10000):
+        """
+        Initialize the exporter.
+
+        Args:
+            path: File the spans are appended to
+            max_queue: Finished traces allowed to wait for the writer thread
+        """
+        self.path = path
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=max_queue)
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop,
+            name="trace-writer",
+            daemon=True
+        )
+        self._writer_thread.start()
+
+    def export(self, trace: Trace) -> None:
+        """Queue the spans of a finished trace for writing."""
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _lines(self, trace: Trace) -> List[str]:
+        lines = []
+        for recorded in trace.spans:
+            if recorded.end is None:
+                continue
+            lines.append(json.dumps({
+                "traceId": trace.trace_id,
+                "spanId": recorded.span_id,
+                "parentSpanId": recorded.parent.span_id if recorded.parent is not None else None,
+                "name": recorded.name,
+                "startTimeUnixNano": trace.unix_nanos(recorded.start),
+                "endTimeUnixNano": trace.unix_nanos(recorded.end),
+                "attributes": recorded.attributes
+            }, ensure_ascii=False, default=str))
+        return lines
+
+    def _writer_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = [line for trace in batch if trace is not None for line in self._lines(trace)]
+            if lines:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write("\n".join(lines) + "\n")
+                except Exception as e:
+                    logger.error(f"Failed to write traces to {self.path}: {str(e)}")
+            # None is queued by close()
+            if None in batch:
+                return
+
+    def close(self) -> None:
+        """Write the queued traces and stop the writer thread."""
+        self._queue.put(None)
+        self._writer_thread.join(timeout=5)
+
+class OpenTelemetrySpanExporter:
+    """Replays finished spans through the OpenTelemetry API.
+
+    Spans go to the globally configured tracer provider, e.g. an OTLP
+    exporter set up by ``opentelemetry-instrument``; without an SDK the API
+    discards them.
+    """
+
+    def __init__(self):
+        from opentelemetry import trace as otel_trace
+
+        self._otel_trace = otel_trace
+        self._tracer = otel_trace.get_tracer("mcp_server")
+
+    def export(self, trace: Trace) -> None:
+        """Emit the spans of a finished trace, parents before children."""
+        started = {}
+        for recorded in sorted(trace.spans, key=lambda recorded: recorded.start):
+            if recorded.end is None:
+                continue
+            parent = started.get(id(recorded.parent))
+            context = self._otel_trace.set_span_in_context(parent) if parent is not None else None
+            otel_span = self._tracer.start_span(
+                recorded.name,
+                context=context,
+                start_time=trace.unix_nanos(recorded.start),
+                attributes={key: value if isinstance(value, (str, bool, int, float)) else str(value)
+                            for key, value in recorded.attributes.items()}
+            )
+            started[id(recorded)] = otel_span
+            otel_span.end(end_time=trace.unix_nanos(recorded.end))
+
+class Tracer:
+    """Starts, finishes and exports per-request traces.
+
+    A request is traced when it asks for a timing breakdown (debug flag) or
+    is sampled at ``sample_rate``; every other request only pays for the
+    no-op ``span`` checks.
+    """
+
+    def __init__(self, sample_rate: float = settings.TRACE_SAMPLE_RATE, exporter: Optional[Any] = None):
+        """
+        Initialize the tracer.
+
+        Args:
+            sample_rate: Share of requests traced without a debug flag, for profiling
+            exporter: Object with ``export(trace)`` receiving finished traces, or None
+        """
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    def begin(self, name: str, debug: bool = False, **attributes: Any) -> Optional[Trace]:
+        """
+        Start tracing the current request.
+
+        Args:
+            name: Name of the root span, e.g. ``"tools/call analyze_intent"``
+            debug: Whether the caller asked for a timing breakdown
+            **attributes: Attributes of the root span
+
+        Returns:
+            Optional[Trace]: The trace, or None if the request is not traced
+        """
+        if not debug and (not self.sample_rate or random.random() >= self.sample_rate):
+            return None
+        trace = Trace(name, attributes)
+        _trace.set(trace)
+        _current_span.set(None)
+        return trace
+
+    def finish(self, trace: Trace) -> None:
+        """Close the root span, stop recording and hand the trace to the exporter."""
+        trace.root.end = time.perf_counter()
+        trace.finished = True
+        _trace.set(None)
+        if self.exporter is None:
+            return
+        try:
+            self.exporter.export(trace)
+        except Exception as e:
+            logger.error(f"Failed to export trace: {str(e)}")
+
+    def close(self) -> None:
+        """Flush an exporter that buffers traces, e.g. on shutdown."""
+        close = getattr(self.exporter, "close", None)
+        if close is not None:
+            close()
+
+def _create_exporter() -> Optional[Any]:
+    """Create the span exporter configured in settings."""
+    if settings.TRACE_EXPORTER == "jsonl":
+        return JsonlSpanExporter(settings.TRACE_JSONL_PATH)
+    if settings.TRACE_EXPORTER == "otel":
+        try:
+            return OpenTelemetrySpanExporter()
+        except ImportError:
+            logger.warning("TRACE_EXPORTER=otel but opentelemetry-api is not installed, spans are not exported")
+    return None
+
+# Initialize tracer
+tracer = Tracer(exporter=_create_exporter())
@@ -1,5 +1,3 @@
-from langchain.prompts import PromptTemplate
-
 # Information extraction system prompt
 INFORMATION_EXTRACTION = """Bạn là chuyên gia trích xuất thông tin từ câu hỏi tài chính. Hãy xác định các dữ liệu quan trọng:
 1. Mã cổ phiếu: -> stock_codes
@@ -23,20 +21,52 @@ Trả về JSON:
     "company_names": ["Vinamilk", "FPT Corporation", ...],
     "financial_metrics": ["EPS", "ROE","P/E", "P/B", "doanh thu", "lợi nhuận", ...],
     "quarter": ["1", "2", "3", "4", "5", ...],
-    "year": ["2024", "2025", ...]
-    "search_live_query": ["giá", "tăng", "giảm", "mua", "bán", "tín hiệu", ...]
-    "search_rag_query": ["báo cáo tài chính của VNM", "bảng cân đối kế toán của VNM", "lợi nhuận cả năm của VNM", "doanh thu của VNM", ...]
+    "year": ["2024", "2025", ...],
+    "search_live_query": ["giá", "tăng", "giảm", "mua", "bán", "tín hiệu", ...],
+    "search_rag_query": ["báo cáo tài chính của VNM", "bảng cân đối kế toán của VNM", "lợi nhuận cả năm của VNM", "doanh thu của VNM", ...],
     "search_news_query": ["tin tức của VNM mới nhất", "sự kiện của VNM gần đây", "thông báo của VNM", ...]
 }
 Hãy đảm bảo rằng bạn chỉ trả về JSON hợp lệ, không thêm bất kỳ văn bản giải thích hoặc kí tự nào khác."""
 
 # Information extraction prompt template
-info_prompt_template = PromptTemplate(
-    input_variables=["query"],
-    template="""
+info_prompt_template = """
 Bạn là chuyên gia trích xuất thông tin từ câu hỏi tài chính. Trích xuất thông tin từ câu hỏi sau và trả về JSON:
 
 Câu hỏi: {query}
 
 Chỉ trả về JSON hợp lệ, không thêm văn bản khác."""
-)
\ No newline at end of file
+# Search query generation system prompt, used when the entities were pre-extracted locally
+SEARCH_QUERY_GENERATION = """Bạn là chuyên gia tạo câu tìm kiếm cho câu hỏi tài chính. Mã cổ phiếu và tên công ty đã được trích xuất sẵn, cùng chỉ số tài chính, quý và năm khi nhận diện được. Chỉ tạo:
+1. Các từ khóa tìm kiếm để sử dụng search api tìm kiếm thông tin: -> search_live_query
+2. Các câu tìm kiếm chính xác để tìm kiếm trong báo cáo tài chính: -> search_rag_query
+   - Mỗi câu phải có cấu trúc: [chỉ số tài chính] + [mã cổ phiếu] + [thời gian cụ thể]
+   - Tạo các câu riêng biệt cho từng chỉ số tài chính và từng khoảng thời gian
+   - Sử dụng các thuật ngữ chính xác: "thu nhập lãi thuần", "tổng thu nhập hoạt động", "doanh thu", "lợi nhuận"
+   - Đối với câu hỏi về doanh thu, tạo thêm câu tìm kiếm với từ khóa "tổng thu nhập hoạt động" (nếu công ty là ngân hàng)
+   - Quý 5 nghĩa là cả năm
+3. Các câu tìm kiếm để sử dụng API search truy xuất dữ liệu các website: -> search_news_query
+4. Chỉ khi thông tin đã trích xuất KHÔNG có chỉ số tài chính, hãy xác định chúng từ câu hỏi:
+   - Chỉ số tài chính: -> financial_metrics (ví dụ "doanh thu", "lợi nhuận sau thuế", "tỷ lệ nợ xấu"; để trống nếu câu hỏi không nhắc đến)
+5. Chỉ khi thông tin đã trích xuất KHÔNG có quý hoặc năm (không đề cập, hoặc dùng mốc tương đối như "năm nay", "năm ngoái", "quý trước", "cùng kỳ"), hãy xác định chúng từ câu hỏi:
+   - Quý: -> quarter (1, 2, 3, 4; dùng 5 nếu nói về cả năm hoặc không nhắc đến quý cụ thể)
+   - Năm: -> year (nếu không đề cập thì là 2024 và 2025, 2025 là năm hiện tại)
+
+Trả về JSON:
+{
+    "search_live_query": ["giá", "tăng", "giảm", "mua", "bán", "tín hiệu", ...],
+    "search_rag_query": ["báo cáo tài chính của VNM", "bảng cân đối kế toán của VNM", "lợi nhuận cả năm của VNM", "doanh thu của VNM", ...],
+    "search_news_query": ["tin tức của VNM mới nhất", "sự kiện của VNM gần đây", "thông báo của VNM", ...],
+    "financial_metrics": ["doanh thu"],
+    "quarter": ["5"],
+    "year": ["2024"]
+}
+Hãy đảm bảo rằng bạn chỉ trả về JSON hợp lệ, không thêm bất kỳ văn bản giải thích hoặc kí tự nào khác."""
+
+# Search query generation prompt template
+search_query_prompt_template = """
+Tạo các câu tìm kiếm cho câu hỏi tài chính sau và trả về JSON:
+
+Câu hỏi: {query}
+Thông tin đã trích xuất: {entities}
+
+Chỉ trả về JSON hợp lệ, không thêm văn bản khác."""
@@ -1,5 +1,3 @@
-from langchain.prompts import PromptTemplate
-
 # Intent analysis system prompt
 INTENT_ANALYSIS = """Bạn là một chuyên gia phân tích ý định trong lĩnh vực tài chính và chứng khoán. Hãy phân tích câu hỏi của người dùng và trả về kết quả dưới dạng JSON:
     Phân tích chi tiết:
@@ -27,18 +25,15 @@ INTENT_ANALYSIS = """Bạn là một chuyên gia phân tích ý định trong l
         "main_intent": "Mô tả ngắn gọn ý định của người dùng",
         "required_analysis": ["live", "rag", "news", "ta", "fa", "signal"],
         "question_type": "SIMPLE, COMPLEX, SENTIMENT",
-        "stock_codes": [],
+        "stock_codes": []
     }
 
 Hãy đảm bảo rằng bạn chỉ trả về định dạng JSON hợp lệ, không thêm bất kỳ văn bản giải thích hoặc kí tự nào khác."""
 
 # Intent analysis prompt template
-intent_prompt_template = PromptTemplate(
-    input_variables=["query"],
-    template="""
+intent_prompt_template = """
 Bạn là một chuyên gia phân tích ý định về tài chính và chứng khoán. Phân tích câu hỏi sau và trả về kết quả theo định dạng JSON:
 
 Câu hỏi: {query}
 
-Chỉ trả về JSON hợp lệ, không thêm văn bản khác."""
-)
\ No newline at end of file
+Chỉ trả về JSON hợp lệ, không thêm văn bản khác."""
\ No newline at end of file
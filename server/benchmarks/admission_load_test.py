@@ -0,0 +1,125 @@
+"""Overload the MCP endpoint with mixed-priority traffic, with and without admission control.
+
+The app runs in-process behind ``httpx.ASGITransport`` with ``FakeLLM``
+models, and LLM concurrency is capped at ``--capacity`` calls. An open-loop
+load of high-priority (``X-Client-Id: interactive``) and low-priority
+(``X-Client-Id: batch``) ``tools/call`` requests is offered above that
+capacity, first with admission control disabled and then enabled. For each
+lane the report shows successes, "server busy" rejections and p50/p95/p99
+latency of the successful calls, plus the admission counters.
+
+Usage (from the ``server`` directory):
+    python -m benchmarks.admission_load_test
+    python -m benchmarks.admission_load_test --high-rps 50 --low-rps 400 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+import httpx
+
+from app.api import routes
+from app.agent_services.llm import llm_limiter
+from app.agent_services.model_router import model_router
+from app.agent_services.intent.fast_path import intent_fast_path
+from app.core.admission import AdmissionController
+from benchmarks.fake_llm import FakeLLM
+from benchmarks.routing_replay import VALID_RESPONSE
+
+CLIENTS = {"high": "interactive", "low": "batch"}
+
+def percentile(samples: list, percent: float):
+    """Nearest-rank percentile of ``samples``, or None if empty."""
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * percent / 100), len(samples) - 1)]
+
+async def run_load(client: httpx.AsyncClient, rates: dict, duration: float, label: str) -> dict:
+    """Offer ``rates`` requests per second per lane for ``duration`` seconds and collect outcomes."""
+    results = {lane: {"latencies": [], "busy": 0, "errors": 0} for lane in rates}
+
+    async def one(lane: str, i: int):
+        body = {
+            "jsonrpc": "2.0", "id": i, "method": "tools/call",
+            "params": {"name": "analyze_intent", "arguments": {"query": f"Phân tích cổ phiếu VNM {label} {lane} {i}"}}
+        }
+        start = time.perf_counter()
+        response = await client.post("/", json=body, headers={"X-Client-Id": CLIENTS[lane]})
+        elapsed = time.perf_counter() - start
+        if response.status_code == 429:
+            results[lane]["busy"] += 1
+        elif response.status_code != 200 or response.json().get("result", {}).get("isError"):
+            results[lane]["errors"] += 1
+        else:
+            results[lane]["latencies"].append(elapsed)
+
+    async def lane_load(lane: str, rate: float):
+        tasks = []
+        start = time.perf_counter()
+        for i in range(int(rate * duration)):
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(one(lane, i)))
+        await asyncio.gather(*tasks)
+
+    await asyncio.gather(*(lane_load(lane, rate) for lane, rate in rates.items()))
+    return {
+        lane: {
+            "ok": len(outcome["latencies"]),
+            "busy": outcome["busy"],
+            "errors": outcome["errors"],
+            "p50_seconds": percentile(outcome["latencies"], 50),
+            "p95_seconds": percentile(outcome["latencies"], 95),
+            "p99_seconds": percentile(outcome["latencies"], 99),
+        }
+        for lane, outcome in results.items()
+    }
+
+async def run(args) -> dict:
+    transport = httpx.ASGITransport(app=routes.app)
+    report = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        rates = {"high": args.high_rps, "low": args.low_rps}
+
+        routes.admission_controller = AdmissionController(enabled=False)
+        report["without_admission"] = await run_load(client, rates, args.duration, "off")
+
+        controller = AdmissionController(
+            enabled=True,
+            max_concurrency=args.capacity,
+            max_queue=args.max_queue,
+            queue_timeout=args.queue_timeout,
+            client_priorities={CLIENTS["high"]: "high", CLIENTS["low"]: "low"},
+            tool_priorities={}
+        )
+        routes.admission_controller = controller
+        report["with_admission"] = await run_load(client, rates, args.duration, "on")
+        report["admission"] = controller.get_stats()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Admission control load test with fake LLMs")
+    parser.add_argument("--capacity", type=int, default=16, help="Concurrent LLM calls (and admission slots)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--high-rps", type=float, default=40, help="High-priority requests per second")
+    parser.add_argument("--low-rps", type=float, default=400, help="Low-priority requests per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of offered load per run")
+    parser.add_argument("--max-queue", type=int, default=32, help="Admission queue bound")
+    parser.add_argument("--queue-timeout", type=float, default=1.0, help="Seconds a call may wait for a slot")
+    args = parser.parse_args()
+
+    # Rejections are expected here; keep the log quiet
+    logging.getLogger("mcp_server").setLevel(logging.ERROR)
+    intent_fast_path.enabled = False
+    fake = FakeLLM([VALID_RESPONSE], latency=args.llm_latency)
+    model_router.tiers["small"] = model_router.tiers["large"] = fake
+    llm_limiter.max_concurrency = args.capacity
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
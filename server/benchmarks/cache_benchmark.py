@@ -0,0 +1,66 @@
+"""Micro-benchmark for QueryCache per-operation latency.
+
+Fills a cache to capacity and then measures the cost of hits, misses that
+trigger an LRU eviction, expiry sweeps and ``get_stats``. With the O(1) engine the per-op
+numbers should stay flat as the cache grows from 1k to 1M entries.
+
+Usage (from the ``server`` directory):
+    python -m benchmarks.cache_benchmark
+    python -m benchmarks.cache_benchmark --sizes 1000 10000 --ops 50000
+"""
+import argparse
+import random
+import time
+
+from app.agent_services.cache import QueryCache
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+TOOL_NAME = "analyze_intent"
+RESULT = {"is_finance_related": True, "stock_codes": ["VNM"], "question_type": "SIMPLE"}
+
+def bench_size(size: int, ops: int) -> dict:
+    """Measure per-op latency (microseconds) for a cache holding ``size`` entries."""
+    cache = QueryCache(ttl=3600, max_size=size, sweep_interval=0, max_bytes=0)
+    for i in range(size):
+        cache.set(TOOL_NAME, f"query {i}", RESULT)
+
+    # Hits on random resident keys
+    hit_keys = [f"query {random.randrange(size)}" for _ in range(ops)]
+    start = time.perf_counter()
+    for q in hit_keys:
+        cache.get(TOOL_NAME, q)
+    hit_us = (time.perf_counter() - start) / ops * 1e6
+
+    # Inserts of new keys; every one evicts the LRU entry
+    start = time.perf_counter()
+    for i in range(ops):
+        cache.set(TOOL_NAME, f"new query {i}", RESULT)
+    set_us = (time.perf_counter() - start) / ops * 1e6
+
+    # Sweep with nothing expired: should return after inspecting one entry
+    start = time.perf_counter()
+    for _ in range(1000):
+        cache.remove_expired()
+    sweep_us = (time.perf_counter() - start) / 1000 * 1e6
+
+    # Stats are kept incrementally, so this should not grow with the cache
+    start = time.perf_counter()
+    for _ in range(1000):
+        cache.get_stats()
+    stats_us = (time.perf_counter() - start) / 1000 * 1e6
+
+    return {"size": size, "get_us": hit_us, "set_evict_us": set_us, "sweep_us": sweep_us, "stats_us": stats_us}
+
+def main():
+    parser = argparse.ArgumentParser(description="QueryCache per-op latency benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--ops", type=int, default=100_000, help="Operations timed per size")
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'get (us)':>10} {'set+evict (us)':>15} {'sweep (us)':>11} {'stats (us)':>11}")
+    for size in args.sizes:
+        row = bench_size(size, args.ops)
+        print(f"{row['size']:>10} {row['get_us']:>10.2f} {row['set_evict_us']:>15.2f} {row['sweep_us']:>11.2f} {row['stats_us']:>11.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List, Optional, Union
+
+class FakeResponse:
+    """Minimal stand-in for a LangChain ``AIMessage``."""
+
+    def __init__(self, content: str):
+        self.content = content
+
+class FakeLLM:
+    """Deterministic local stand-in for a chat model, for the benchmarks.
+
+    Implements the ``invoke``/``ainvoke`` subset the agent services use.
+    Responses come from ``respond(messages)`` if given, otherwise from the
+    ``responses`` list in turn (the last one repeats). ``latency`` seconds are
+    slept per call to simulate the model, and a seeded ``failure_rate`` share
+    of calls raise ``RuntimeError`` to simulate provider errors.
+    """
+
+    def __init__(
+        self,
+        responses: Optional[List[str]] = None,
+        respond: Optional[Callable[[List[Dict[str, str]]], str]] = None,
+        latency: Union[float, Callable[[List[Dict[str, str]]], float]] = 0.0,
+        name: str = "fake",
+        failure_rate: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Initialize the fake model.
+
+        Args:
+            responses: Canned response texts returned in order
+            respond: Function computing the response text from the messages
+            latency: Seconds per call, or a function of the messages returning them
+            name: Label used in logs and statistics
+            failure_rate: Share of calls that raise instead of responding
+            seed: Seed of the failure sequence, so runs are reproducible
+        """
+        self.responses = list(responses or ["{}"])
+        self.respond = respond
+        self.latency = latency
+        self.name = name
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _next(self, messages: List[Dict[str, str]]) -> str:
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+            failed = self.failure_rate and self._random.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+        if failed:
+            raise RuntimeError(f"Simulated failure of {self.name}")
+        if self.respond is not None:
+            return self.respond(messages)
+        return self.responses[min(index, len(self.responses) - 1)]
+
+    def _delay(self, messages: List[Dict[str, str]]) -> float:
+        return self.latency(messages) if callable(self.latency) else self.latency
+
+    def invoke(self, messages: List[Dict[str, str]], **kwargs: Any) -> FakeResponse:
+        """Return the next response after sleeping ``latency``."""
+        delay = self._delay(messages)
+        if delay:
+            time.sleep(delay)
+        return FakeResponse(self._next(messages))
+
+    async def ainvoke(self, messages: List[Dict[str, str]], **kwargs: Any) -> FakeResponse:
+        """Async counterpart of ``invoke``."""
+        delay = self._delay(messages)
+        if delay:
+            await asyncio.sleep(delay)
+        return FakeResponse(self._next(messages))
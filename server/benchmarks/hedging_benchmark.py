@@ -0,0 +1,123 @@
+"""Tail latency with and without hedged requests, against local stub LLM servers.
+
+Two OpenAI-compatible stub servers are started on localhost. The primary
+has a heavy latency tail (and optionally returns errors); the secondary is
+steady. The same request stream is sent through ``ChatOpenAI`` clients once
+to the primary alone and once through ``HedgedLLM``, and p50/p95/p99 are
+reported for both, together with the hedging and circuit-breaker counters.
+
+Usage (from the ``server`` directory):
+    python -m benchmarks.hedging_benchmark
+    python -m benchmarks.hedging_benchmark --requests 500 --tail-rate 0.1 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_openai import ChatOpenAI
+
+from app.agent_services.llm_backends import HedgedLLM, LatencyTracker
+
+def start_stub_server(base_latency: float, tail_latency: float, tail_rate: float, error_rate: float, seed: int):
+    """Start an OpenAI-compatible chat completions stub; returns ``(server, base_url)``."""
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with rng_lock:
+                roll = rng.random()
+                delay = tail_latency if rng.random() < tail_rate else base_latency
+            time.sleep(delay)
+
+            # The client may have cancelled a losing hedged request already
+            try:
+                if roll < error_rate:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                self._send_completion()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _send_completion(self):
+            body = json.dumps({
+                "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": "stub",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "{}"}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+def stub_client(base_url: str) -> ChatOpenAI:
+    """``ChatOpenAI`` pointed at a stub server, without client-side retries."""
+    return ChatOpenAI(model="stub", api_key="stub", base_url=base_url, max_retries=0, temperature=0)
+
+async def run(client, requests: int, concurrency: int) -> dict:
+    """Send ``requests`` calls with bounded concurrency and return latency percentiles."""
+    tracker = LatencyTracker(window=requests)
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await client.ainvoke([{"role": "user", "content": f"request {i}"}])
+                tracker.record(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return {**tracker.get_stats(), "errors": errors}
+
+def main():
+    parser = argparse.ArgumentParser(description="Hedged LLM request benchmark against local stubs")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--base-latency", type=float, default=0.02, help="Typical stub latency in seconds")
+    parser.add_argument("--tail-latency", type=float, default=0.5, help="Primary's slow-response latency")
+    parser.add_argument("--tail-rate", type=float, default=0.05, help="Share of slow primary responses")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of primary 503 responses")
+    args = parser.parse_args()
+
+    primary_server, primary_url = start_stub_server(args.base_latency, args.tail_latency, args.tail_rate, args.error_rate, seed=1)
+    secondary_server, secondary_url = start_stub_server(args.base_latency * 1.5, args.base_latency * 1.5, 0.0, 0.0, seed=2)
+
+    baseline = asyncio.run(run(stub_client(primary_url), args.requests, args.concurrency))
+    hedged_llm = HedgedLLM(
+        [("primary", stub_client(primary_url)), ("secondary", stub_client(secondary_url))],
+        hedging=True,
+        initial_delay=args.base_latency * 3,
+        min_delay=args.base_latency
+    )
+    hedged = asyncio.run(run(hedged_llm, args.requests, args.concurrency))
+
+    primary_server.shutdown()
+    secondary_server.shutdown()
+
+    print(json.dumps({
+        "primary_only": baseline,
+        "hedged": hedged,
+        "hedged_llm": hedged_llm.get_stats(),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""HTTP load test of the MCP server with a deterministic fake LLM.
+
+Starts the FastAPI app under uvicorn in a separate process, with both model
+tiers replaced by a ``FakeLLM`` of configurable latency and failure rate. A
+seeded mix of ``initialize``, ``tools/list`` and ``tools/call`` requests
+(queries drawn from a skewed pool, so some repeat and hit the cache) is then
+sent at each concurrency level by that many closed-loop keep-alive
+connections. Every level uses its own queries, so each starts with a cold
+cache.
+
+For every level the JSON report gives throughput, p50/p95/p99 overall and
+per method/tool, error counts, the cache hit rate and the LLM calls made,
+the last two read from the server's ``/metrics``. The report can be stored
+and compared between builds.
+
+The client is a minimal HTTP/1.1 implementation on asyncio streams: on small
+machines a full client library costs more CPU per request than the server
+and would dominate the measurement at high concurrency.
+
+Usage (from the ``server`` directory):
+    python -m benchmarks.http_load_test
+    python -m benchmarks.http_load_test --concurrency 1 16 64 --requests 2000 --llm-latency 0.2 --failure-rate 0.02
+    python -m benchmarks.http_load_test --output load_test.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import random
+import re
+import socket
+import time
+
+from benchmarks.admission_load_test import percentile
+from benchmarks.preextraction_benchmark import SAMPLE_QUERIES
+from benchmarks.routing_replay import EXTRA_QUERIES
+
+# One response that validates against every tool's schema
+FAKE_RESPONSE = json.dumps({
+    "is_finance_related": True,
+    "needs_clarification": False,
+    "main_intent": "load test",
+    "required_analysis": ["rag"],
+    "question_type": "SIMPLE",
+    "stock_codes": ["VNM"],
+    "company_names": [],
+    "financial_metrics": [],
+    "quarter": ["1"],
+    "year": ["2024"],
+    "search_live_query": ["VNM"],
+    "search_rag_query": ["VNM"],
+    "search_news_query": ["VNM"]
+})
+
+# Share of each request kind in the generated mix
+REQUEST_MIX = (
+    ("initialize", None, 0.05),
+    ("tools/list", None, 0.05),
+    ("tools/call", "analyze_intent", 0.4),
+    ("tools/call", "extract_information", 0.35),
+    ("tools/call", "analyze_and_extract", 0.15),
+)
+
+_SAMPLE_PATTERN = re.compile(r"^(\w+)(?:\{(.*)\})? (\S+)$")
+
+def free_port() -> int:
+    """Pick an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def serve(port: int, llm_latency: float, failure_rate: float, seed: int) -> None:
+    """Server process: the app under uvicorn with fake LLM tiers."""
+    import uvicorn
+
+    from app.api.routes import app
+    from app.agent_services.model_router import model_router
+    from benchmarks.fake_llm import FakeLLM
+
+    logging.getLogger("mcp_server").setLevel(logging.CRITICAL)
+    fake = FakeLLM([FAKE_RESPONSE], latency=llm_latency, failure_rate=failure_rate, seed=seed)
+    model_router.tiers["small"] = model_router.tiers["large"] = fake
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+class HttpConnection:
+    """One keep-alive HTTP/1.1 connection sending requests sequentially."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> tuple:
+        """Send a request and return ``(status, body)``."""
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self._writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        head = await self._reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ", 2)[1])
+        headers = dict(line.split(":", 1) for line in lines[1:] if ":" in line)
+        length = next((int(value) for name, value in headers.items() if name.lower() == "content-length"), 0)
+        return status, await self._reader.readexactly(length)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+async def wait_until_ready(port: int, timeout: float = 60.0) -> None:
+    """Poll ``/health`` until the server answers."""
+    deadline = time.monotonic() + timeout
+    while True:
+        connection = HttpConnection("127.0.0.1", port)
+        try:
+            status, _ = await connection.request("GET", "/health")
+            if status == 200:
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+        finally:
+            connection.close()
+
+async def scrape(port: int) -> dict:
+    """Sum the server's ``/metrics`` samples by metric name and ``result``/``status`` label."""
+    connection = HttpConnection("127.0.0.1", port)
+    try:
+        _, body = await connection.request("GET", "/metrics")
+    finally:
+        connection.close()
+    totals = {}
+    for line in body.decode().splitlines():
+        match = _SAMPLE_PATTERN.match(line)
+        if match is None:
+            continue
+        name, labels, value = match.groups()
+        label = re.search(r'(?:result|status)="(\w+)"', labels or "")
+        key = f"{name}:{label.group(1)}" if label else name
+        totals[key] = totals.get(key, 0.0) + float(value)
+    return totals
+
+def build_requests(count: int, query_pool: int, seed: int, tag: str) -> list:
+    """Generate a reproducible request mix; returns ``(label, body)`` pairs."""
+    rng = random.Random(seed)
+    base_queries = SAMPLE_QUERIES + EXTRA_QUERIES
+    queries = [f"{base_queries[i % len(base_queries)]} {tag}-{i}" for i in range(query_pool)]
+    kinds = [(method, tool_name) for method, tool_name, _ in REQUEST_MIX]
+    weights = [weight for _, _, weight in REQUEST_MIX]
+
+    requests = []
+    for i in range(count):
+        method, tool_name = rng.choices(kinds, weights)[0]
+        params = {"capabilities": {}} if method == "initialize" else {}
+        if method == "tools/call":
+            # Skewed towards the first queries of the pool, like real repeat traffic
+            query = queries[min(int(rng.paretovariate(1.2)) - 1, query_pool - 1)]
+            params = {"name": tool_name, "arguments": {"query": query}}
+        body = {"jsonrpc": "2.0", "method": method, "id": i, "params": params}
+        requests.append((tool_name or method, json.dumps(body, ensure_ascii=False).encode()))
+    return requests
+
+def summarize(latencies: list) -> dict:
+    """Count and p50/p95/p99 of a list of latencies in seconds."""
+    return {
+        "count": len(latencies),
+        "p50_seconds": percentile(latencies, 50),
+        "p95_seconds": percentile(latencies, 95),
+        "p99_seconds": percentile(latencies, 99),
+    }
+
+async def run_level(port: int, requests: list, concurrency: int) -> dict:
+    """Send ``requests`` over ``concurrency`` connections and collect latencies and server counters."""
+    latencies = {}
+    errors = {"http": 0, "jsonrpc": 0, "tool": 0}
+    queue = iter(requests)
+
+    async def worker():
+        connection = HttpConnection("127.0.0.1", port)
+        try:
+            for label, body in queue:
+                start = time.perf_counter()
+                status, content = await connection.request("POST", "/", body)
+                latencies.setdefault(label, []).append(time.perf_counter() - start)
+                if status != 200:
+                    errors["http"] += 1
+                    continue
+                data = json.loads(content)
+                if "error" in data:
+                    errors["jsonrpc"] += 1
+                elif data["result"].get("isError"):
+                    errors["tool"] += 1
+        finally:
+            connection.close()
+
+    before = await scrape(port)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    after = await scrape(port)
+
+    def delta(key: str) -> float:
+        return after.get(key, 0.0) - before.get(key, 0.0)
+
+    hits, misses = delta("mcp_cache_lookups_total:hits"), delta("mcp_cache_lookups_total:misses")
+    all_latencies = [latency for samples in latencies.values() for latency in samples]
+    return {
+        "concurrency": concurrency,
+        "requests": len(all_latencies),
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(all_latencies) / elapsed if elapsed else 0.0,
+        "latency": summarize(all_latencies),
+        "by_method": {label: summarize(samples) for label, samples in sorted(latencies.items())},
+        "errors": errors,
+        "cache_hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "llm_calls": int(delta("mcp_llm_calls_total")),
+        "llm_errors": int(delta("mcp_llm_errors_total")),
+    }
+
+async def run(args, port: int) -> list:
+    await wait_until_ready(port)
+    levels = []
+    for concurrency in args.concurrency:
+        requests = build_requests(args.requests, args.query_pool, args.seed, tag=f"c{concurrency}")
+        levels.append(await run_level(port, requests, concurrency))
+    return levels
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test with a fake LLM")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64], help="Client concurrency levels")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per concurrency level")
+    parser.add_argument("--query-pool", type=int, default=200, help="Distinct queries the calls draw from")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of fake LLM calls that raise")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = multiprocessing.get_context("spawn").Process(
+        target=serve, args=(port, args.llm_latency, args.failure_rate, args.seed), daemon=True
+    )
+    server.start()
+    try:
+        levels = asyncio.run(run(args, port))
+    finally:
+        server.terminate()
+        server.join()
+
+    report = {
+        "config": {
+            "requests": args.requests,
+            "query_pool": args.query_pool,
+            "llm_latency_seconds": args.llm_latency,
+            "llm_failure_rate": args.failure_rate,
+            "seed": args.seed,
+        },
+        "levels": levels,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Replay a query log to measure the cache hit-rate gain from key normalization.
+
+Every query is looked up and, on a miss, stored -- the same pattern the
+perform_* functions follow -- once with the legacy lowercase + strip keys and
+once with ``QueryNormalizer`` keys.
+
+The log is either plain text (one query per line) or JSONL with a ``query``
+field.
+
+Usage (from the ``server`` directory):
+    python -m benchmarks.key_normalization_replay queries.txt
+    python -m benchmarks.key_normalization_replay queries.jsonl --fold-diacritics
+"""
+import argparse
+import json
+
+from app.agent_services.cache import QueryCache
+from app.agent_services.query_normalizer import QueryNormalizer
+
+TOOL_NAME = "analyze_intent"
+
+def load_queries(path: str) -> list:
+    """Read queries from a text or JSONL log."""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                line = json.loads(line).get("query", "")
+            queries.append(line)
+    return queries
+
+def replay(queries: list, normalizer=None) -> dict:
+    """Replay queries through a fresh cache and return its hit-rate counters."""
+    cache = QueryCache(ttl=10**9, max_size=max(len(queries), 1), sweep_interval=0, normalizer=normalizer)
+    for query in queries:
+        if cache.get(TOOL_NAME, query) is None:
+            cache.set(TOOL_NAME, query, {"query": query})
+    return cache.get_stats()["hit_rate"]["overall"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache key normalization hit-rate replay")
+    parser.add_argument("log", help="Query log (text or JSONL)")
+    parser.add_argument("--fold-diacritics", action="store_true", help="Also strip Vietnamese accents")
+    args = parser.parse_args()
+
+    queries = load_queries(args.log)
+    legacy = replay(queries)
+    normalized = replay(queries, QueryNormalizer(fold_accents=args.fold_diacritics))
+
+    print(json.dumps({
+        "queries": len(queries),
+        "legacy_hit_rate": legacy["hit_rate"],
+        "normalized_hit_rate": normalized["hit_rate"],
+        "normalized_hits": normalized["normalized_hits"],
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
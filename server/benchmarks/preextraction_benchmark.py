@@ -0,0 +1,110 @@
+"""Compare full-schema information extraction with entity pre-extraction.
+
+With pre-extraction the LLM no longer emits stock_codes and company_names,
+nor financial_metrics, quarter and year when they were recognized locally;
+it mainly writes the three search query lists. Offline, the saving is estimated from the JSON those fields take in
+the output (about 4 characters per token) and a per-token decode time. With
+``--live`` both prompts are sent to the configured LLM and timed.
+
+Usage (from the ``server`` directory):
+    python -m benchmarks.preextraction_benchmark
+    python -m benchmarks.preextraction_benchmark queries.txt --ms-per-token 25
+    python -m benchmarks.preextraction_benchmark --live
+"""
+import argparse
+import json
+import time
+
+from app.agent_services.intent.entity_extractor import entity_extractor
+from app.agent_services.prompt_cache import strip_cache_points
+from app.agent_services.intent.intent_analysis import _extraction_messages, _extraction_request
+from app.core.settings import settings
+from benchmarks.key_normalization_replay import load_queries
+
+SAMPLE_QUERIES = [
+    "Doanh thu VNM quý 1 2024",
+    "Lợi nhuận sau thuế của Vinamilk năm 2023",
+    "So sánh ROE của VCB và BID quý 2/2024",
+    "EPS và P/E của FPT cả năm 2024",
+    "Thu nhập lãi thuần của Techcombank Q3 2024",
+    "Tin tức mới nhất về Hòa Phát",
+    "Giá cổ phiếu MWG hôm nay",
+    "Biên lợi nhuận của GAS năm 2022 và 2023",
+    "Thị trường chứng khoán hôm nay thế nào",
+    "Có nên mua SSI không",
+]
+
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a string."""
+    return max(len(text) // CHARS_PER_TOKEN, 1)
+
+def prompt_tokens(messages: list) -> int:
+    """Rough token count of a chat prompt."""
+    return sum(estimate_tokens(message["content"]) for message in strip_cache_points(messages))
+
+def time_extractor(queries: list, rounds: int = 200) -> float:
+    """Average microseconds spent in ``entity_extractor.extract`` per query."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            entity_extractor.extract(query)
+    return (time.perf_counter() - start) / (rounds * len(queries)) * 1e6
+
+def time_llm(messages: list) -> float:
+    """Seconds taken by one call to the configured LLM."""
+    from app.agent_services.llm import llm
+
+    start = time.perf_counter()
+    llm.invoke(messages)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Entity pre-extraction token and latency benchmark")
+    parser.add_argument("log", nargs="?", help="Query log (text or JSONL), defaults to built-in samples")
+    parser.add_argument("--ms-per-token", type=float, default=20.0, help="Simulated output decode time")
+    parser.add_argument("--live", action="store_true", help="Time both prompts against the real LLM")
+    args = parser.parse_args()
+
+    queries = load_queries(args.log) if args.log else SAMPLE_QUERIES
+    # Pre-extraction is opt-in on the server; the comparison needs it on
+    settings.INFO_PREEXTRACT_ENABLED = True
+
+    prefilled_count = 0
+    full_prompt = trimmed_prompt = 0
+    saved_output = 0
+    live_full = live_trimmed = 0.0
+    for query in queries:
+        full_messages = _extraction_messages(query)
+        messages, prefilled = _extraction_request(query)
+        full_prompt += prompt_tokens(full_messages)
+        trimmed_prompt += prompt_tokens(messages)
+        if prefilled is None:
+            continue
+
+        prefilled_count += 1
+        # Output tokens the LLM no longer has to generate
+        saved_output += estimate_tokens(json.dumps(prefilled, ensure_ascii=False, indent=4))
+        if args.live:
+            live_full += time_llm(full_messages)
+            live_trimmed += time_llm(messages)
+
+    report = {
+        "queries": len(queries),
+        "prefilled": prefilled_count,
+        "prefilled_fraction": prefilled_count / len(queries) if queries else 0.0,
+        "avg_prompt_tokens_full": full_prompt / len(queries) if queries else 0.0,
+        "avg_prompt_tokens_preextracted": trimmed_prompt / len(queries) if queries else 0.0,
+        "avg_output_tokens_saved": saved_output / prefilled_count if prefilled_count else 0.0,
+        "simulated_latency_saved_ms": saved_output / prefilled_count * args.ms_per_token if prefilled_count else 0.0,
+        "extractor_microseconds": time_extractor(queries),
+    }
+    if args.live and prefilled_count:
+        report["live_avg_seconds_full"] = live_full / prefilled_count
+        report["live_avg_seconds_preextracted"] = live_trimmed / prefilled_count
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
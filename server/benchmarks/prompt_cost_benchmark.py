@@ -0,0 +1,241 @@
+"""Token cost, parse failures and simulated latency of prompt versions.
+
+Replays a query corpus through ``perform_intent_analysis``,
+``perform_information_extraction`` and ``perform_analysis_and_extraction``
+with both model tiers replaced by a stub, once for the current prompts and
+once per ``--variant``. A variant is a directory holding any of
+``INTENT_ANALYSIS.txt``, ``INFORMATION_EXTRACTION.txt``,
+``SEARCH_QUERY_GENERATION.txt`` and ``ANALYZE_AND_EXTRACT.txt``; each file
+replaces that system prompt for the run.
+
+The stub answers from a recorded responses file (JSONL with ``variant``,
+``tool``, ``query`` and ``response``) when it has an entry, and with a
+schema-valid synthetic answer otherwise. ``--record`` fills the file from
+the configured live LLM instead, so parse failures of a prompt version can
+be replayed offline afterwards.
+
+For each version and tool the report gives prompt (system + user) and
+output tokens per LLM call, parse outcomes and failure rate, retries, and a
+simulated latency of ``base + input tokens * ms_per_input_token + output
+tokens * ms_per_output_token``. Tokens are counted with tiktoken when its
+encoding is available locally, otherwise estimated at 4 characters per
+token.
+
+Usage (from the ``server`` directory):
+    python -m benchmarks.prompt_cost_benchmark
+    python -m benchmarks.prompt_cost_benchmark queries.txt --variant short=prompts/short
+    python -m benchmarks.prompt_cost_benchmark queries.txt --variant short=prompts/short --responses responses.jsonl --record
+"""
+import argparse
+import json
+import os
+import time
+
+from app.agent_services.cache import QueryCache
+from app.agent_services.model_router import model_router
+from app.agent_services.prompt_cache import strip_cache_points
+from app.agent_services.response_parser import response_parser
+from app.agent_services.intent import intent_analysis
+from app.agent_services.intent.fast_path import intent_fast_path
+from benchmarks.admission_load_test import percentile
+from benchmarks.fake_llm import FakeResponse
+from benchmarks.http_load_test import FAKE_RESPONSE
+from benchmarks.key_normalization_replay import load_queries
+from benchmarks.preextraction_benchmark import SAMPLE_QUERIES, estimate_tokens
+from benchmarks.routing_replay import EXTRA_QUERIES
+
+# System prompts a variant may replace, with the tool whose calls they start
+PROMPTS = {
+    "INTENT_ANALYSIS": "analyze_intent",
+    "INFORMATION_EXTRACTION": "extract_information",
+    "SEARCH_QUERY_GENERATION": "extract_information",
+    "ANALYZE_AND_EXTRACT": "analyze_and_extract",
+}
+
+TOOLS = {
+    "analyze_intent": intent_analysis.perform_intent_analysis,
+    "extract_information": intent_analysis.perform_information_extraction,
+    "analyze_and_extract": intent_analysis.perform_analysis_and_extraction,
+}
+
+def make_token_counter():
+    """Return ``(count_tokens, tokenizer_name)``, preferring tiktoken when its encoding is available."""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("o200k_base")
+        return (lambda text: len(encoding.encode(text))), "tiktoken/o200k_base"
+    except Exception:
+        return estimate_tokens, "estimate/4-chars-per-token"
+
+def load_variant(path: str) -> dict:
+    """Read the prompt overrides of a variant directory."""
+    prompts = {}
+    for name in PROMPTS:
+        file_path = os.path.join(path, f"{name}.txt")
+        if os.path.exists(file_path):
+            with open(file_path, encoding="utf-8") as f:
+                prompts[name] = f.read()
+    return prompts
+
+class StubLLM:
+    """Answers prompt-benchmark calls from recordings or synthetically, metering tokens per call."""
+
+    def __init__(self, count_tokens, recorded: dict, live_llm=None):
+        """
+        Initialize the stub.
+
+        Args:
+            count_tokens: Function returning the token count of a string
+            recorded: ``(variant, tool, query) -> response`` recordings
+            live_llm: Model called (and recorded) instead of replaying, or None
+        """
+        self.count_tokens = count_tokens
+        self.recorded = recorded
+        self.live_llm = live_llm
+        self.variant = None
+        self.prompts = {}
+        self.query = None
+        self.calls = []
+
+    def _tool(self, system_text: str) -> str:
+        for name, tool_name in PROMPTS.items():
+            if system_text == self.prompts[name]:
+                return tool_name
+        return "unknown"
+
+    def invoke(self, messages, **kwargs):
+        messages = strip_cache_points(messages)
+        system_text = next((m["content"] for m in messages if m["role"] == "system"), "")
+        tool_name = self._tool(system_text)
+        key = (self.variant, tool_name, self.query)
+
+        if self.live_llm is not None:
+            content = self.live_llm.invoke(messages).content
+            self.recorded[key] = content
+        else:
+            content = self.recorded.get(key, FAKE_RESPONSE)
+
+        self.calls.append({
+            "tool": tool_name,
+            "system_tokens": self.count_tokens(system_text),
+            "prompt_tokens": sum(self.count_tokens(m["content"]) for m in messages),
+            "output_tokens": self.count_tokens(content),
+        })
+        return FakeResponse(content)
+
+def parse_counts() -> dict:
+    """Current per-tool parse counters."""
+    return {tool_name: dict(stats) for tool_name, stats in response_parser.get_stats()["tools"].items()}
+
+def run_variant(stub: StubLLM, variant: str, prompts: dict, queries: list, args) -> dict:
+    """Replay ``queries`` with one prompt version and summarize its calls."""
+    original = {name: getattr(intent_analysis, name) for name in PROMPTS}
+    stub.variant = variant
+    stub.prompts = {**original, **prompts}
+    stub.calls = []
+    for name, text in prompts.items():
+        setattr(intent_analysis, name, text)
+
+    before = parse_counts()
+    try:
+        for query in queries:
+            stub.query = query
+            for tool_name in args.tools:
+                intent_analysis.query_cache.clear()
+                TOOLS[tool_name](query)
+    finally:
+        for name, text in original.items():
+            setattr(intent_analysis, name, text)
+    after = parse_counts()
+
+    tools = {}
+    for tool_name in args.tools:
+        calls = [call for call in stub.calls if call["tool"] == tool_name]
+        counts = {
+            counter: after.get(tool_name, {}).get(counter, 0) - before.get(tool_name, {}).get(counter, 0)
+            for counter in ("clean", "repaired", "failed", "retries")
+        }
+        parses = counts["clean"] + counts["repaired"] + counts["failed"]
+        latencies = [
+            args.base_ms + call["prompt_tokens"] * args.ms_per_input_token + call["output_tokens"] * args.ms_per_output_token
+            for call in calls
+        ]
+        tools[tool_name] = {
+            "llm_calls": len(calls),
+            "avg_system_tokens": sum(call["system_tokens"] for call in calls) / len(calls) if calls else 0.0,
+            "avg_prompt_tokens": sum(call["prompt_tokens"] for call in calls) / len(calls) if calls else 0.0,
+            "avg_output_tokens": sum(call["output_tokens"] for call in calls) / len(calls) if calls else 0.0,
+            "parse": counts,
+            "parse_failure_rate": counts["failed"] / parses if parses else 0.0,
+            "simulated_latency_ms": {
+                "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+                "p95": percentile(latencies, 95),
+            },
+        }
+    return {
+        "system_prompt_tokens": {name: stub.count_tokens(text) for name, text in stub.prompts.items()},
+        "tools": tools,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt token cost and latency benchmark")
+    parser.add_argument("log", nargs="?", help="Query corpus (text or JSONL), defaults to built-in samples")
+    parser.add_argument("--variant", action="append", default=[], metavar="NAME=DIR",
+                        help="Prompt version: directory with <PROMPT_NAME>.txt overrides (repeatable)")
+    parser.add_argument("--tools", nargs="+", default=list(TOOLS), choices=list(TOOLS))
+    parser.add_argument("--responses", help="Recorded responses (JSONL) replayed by the stub")
+    parser.add_argument("--record", action="store_true", help="Call the live LLM and write its responses to --responses")
+    parser.add_argument("--base-ms", type=float, default=300.0, help="Simulated fixed cost per LLM call")
+    parser.add_argument("--ms-per-input-token", type=float, default=0.2, help="Simulated prefill time per prompt token")
+    parser.add_argument("--ms-per-output-token", type=float, default=20.0, help="Simulated decode time per output token")
+    args = parser.parse_args()
+    if args.record and not args.responses:
+        parser.error("--record needs --responses")
+
+    queries = load_queries(args.log) if args.log else SAMPLE_QUERIES + EXTRA_QUERIES
+    variants = [("current", {})]
+    for spec in args.variant:
+        name, _, path = spec.partition("=")
+        variants.append((name, load_variant(path)))
+
+    recorded = {}
+    if args.responses and not args.record and os.path.exists(args.responses):
+        with open(args.responses, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    recorded[(entry["variant"], entry["tool"], entry["query"])] = entry["response"]
+
+    live_llm = None
+    if args.record:
+        from app.agent_services.llm import llm as live_llm
+
+    count_tokens, tokenizer = make_token_counter()
+    stub = StubLLM(count_tokens, recorded, live_llm)
+    model_router.tiers["small"] = model_router.tiers["large"] = stub
+    # Every query should reach the prompts: no fast path, no semantic hits, and a
+    # private in-memory cache so clearing it never touches a configured SQLite tier
+    intent_fast_path.enabled = False
+    intent_analysis.semantic_cache.enabled = False
+    intent_analysis.query_cache = QueryCache(sweep_interval=0)
+
+    start = time.perf_counter()
+    report = {
+        "queries": len(queries),
+        "tokenizer": tokenizer,
+        "recorded_responses": len(recorded),
+        "variants": {name: run_variant(stub, name, prompts, queries, args) for name, prompts in variants},
+    }
+    report["elapsed_seconds"] = time.perf_counter() - start
+
+    if args.record:
+        with open(args.responses, "w", encoding="utf-8") as f:
+            for (variant, tool_name, query), response in stub.recorded.items():
+                f.write(json.dumps({"variant": variant, "tool": tool_name, "query": query, "response": response},
+                                   ensure_ascii=False) + "\n")
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
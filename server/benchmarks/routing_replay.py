@@ -0,0 +1,79 @@
+"""Replay queries through ``ModelRouter`` with fake small and large models.
+
+Shows how traffic splits between the tiers, how often the small model's
+output is escalated, and the simulated mean latency compared with sending
+everything to the large model. Both tiers are ``FakeLLM`` instances, so no
+model is called; the small tier returns unparseable output on every Nth call
+to exercise escalation.
+
+Usage (from the ``server`` directory):
+    python -m benchmarks.routing_replay
+    python -m benchmarks.routing_replay queries.txt --small-latency 0.4 --large-latency 2.5 --fail-every 10
+"""
+import argparse
+import json
+import time
+from functools import partial
+
+from app.agent_services.model_router import ModelRouter
+from app.agent_services.response_parser import response_parser
+from app.agent_services.intent.schemas import IntentResult
+from benchmarks.fake_llm import FakeLLM
+from benchmarks.key_normalization_replay import load_queries
+from benchmarks.preextraction_benchmark import SAMPLE_QUERIES
+
+VALID_RESPONSE = json.dumps({
+    "is_finance_related": True,
+    "needs_clarification": False,
+    "main_intent": "benchmark",
+    "required_analysis": ["live"],
+    "question_type": "SIMPLE",
+    "stock_codes": []
+})
+
+EXTRA_QUERIES = [
+    "So sánh lợi nhuận của VCB, BID và CTG trong 3 năm gần đây",
+    "Tại sao cổ phiếu HPG giảm mạnh tuần qua và triển vọng năm 2025 thế nào",
+    "Phân tích kỹ thuật VNM",
+    "Đánh giá rủi ro khi đầu tư vào nhóm ngân hàng năm nay",
+]
+
+def main():
+    parser = argparse.ArgumentParser(description="Model routing replay with fake LLM tiers")
+    parser.add_argument("log", nargs="?", help="Query log (text or JSONL), defaults to built-in samples")
+    parser.add_argument("--small-latency", type=float, default=0.004, help="Seconds per small-model call")
+    parser.add_argument("--large-latency", type=float, default=0.02, help="Seconds per large-model call")
+    parser.add_argument("--fail-every", type=int, default=5, help="Every Nth small-model response is invalid, 0 disables")
+    args = parser.parse_args()
+
+    queries = load_queries(args.log) if args.log else SAMPLE_QUERIES + EXTRA_QUERIES
+
+    small_calls = [0]
+
+    def small_respond(messages):
+        small_calls[0] += 1
+        if args.fail_every and small_calls[0] % args.fail_every == 0:
+            return "Xin lỗi, tôi không chắc."
+        return VALID_RESPONSE
+
+    router = ModelRouter(
+        small=FakeLLM(respond=small_respond, latency=args.small_latency, name="small"),
+        large=FakeLLM([VALID_RESPONSE], latency=args.large_latency, name="large")
+    )
+    parse = partial(response_parser.parse, "routing_replay", schema=IntentResult)
+
+    start = time.perf_counter()
+    for query in queries:
+        router.invoke(query, [{"role": "user", "content": query}], parse)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "queries": len(queries),
+        "mean_latency_seconds": elapsed / len(queries) if queries else 0.0,
+        "all_large_latency_seconds": args.large_latency,
+        "scores": {query: round(router.score(query), 2) for query in queries[:20]},
+        "router": router.get_stats(),
+    }, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
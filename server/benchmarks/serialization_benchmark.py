@@ -0,0 +1,93 @@
+"""Encoding cost of a cached tools/call response, before and after the JSON fast path.
+
+Builds the ``tools/call`` response for a cached ``extract_information``
+result of configurable size and times, per response:
+
+- ``fastapi_default``: ``jsonable_encoder`` plus stdlib ``json`` (returning a dict)
+- ``fast_response``: ``FastJSONResponse`` with the result as a plain dict
+- ``fast_response_cached``: ``FastJSONResponse`` with the result as stored by
+  the cache, i.e. embedded from its pre-serialized bytes
+
+It also times parsing the request body with ``json.loads`` and
+``json_codec.loads``. The fast path only differs from the stdlib when
+orjson is installed and ``FAST_JSON_ENABLED`` is on; the report says which.
+
+Usage (from the ``server`` directory):
+    python -m benchmarks.serialization_benchmark
+    python -m benchmarks.serialization_benchmark --queries 50 --number 2000
+"""
+import argparse
+import json
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.responses import FastJSONResponse
+from app.core.json_codec import FAST_JSON, loads, pre_serialize
+
+def build_result(queries: int) -> dict:
+    """An extract_information result with ``queries`` entries per search query list."""
+    return {
+        "stock_codes": ["VNM", "FPT", "HPG"],
+        "company_names": ["Công ty Cổ phần Sữa Việt Nam", "Công ty Cổ phần FPT", "Tập đoàn Hòa Phát"],
+        "financial_metrics": ["doanh thu", "lợi nhuận sau thuế", "biên lợi nhuận gộp"],
+        "quarter": ["1", "2", "3", "4"],
+        "year": ["2023", "2024"],
+        "search_live_query": [f"giá cổ phiếu VNM phiên {i}" for i in range(queries)],
+        "search_rag_query": [f"doanh thu thuần của VNM quý {i % 4 + 1} năm {2020 + i % 5}" for i in range(queries)],
+        "search_news_query": [f"tin tức mới nhất về VNM số {i}" for i in range(queries)],
+    }
+
+def build_response(result: dict) -> dict:
+    """The JSON-RPC response the MCP endpoint returns for a tools/call."""
+    return {
+        "jsonrpc": "2.0",
+        "result": {
+            "content": [
+                {"type": "text", "text": "Đã trích xuất thông tin cho câu hỏi: Doanh thu VNM, FPT, HPG"},
+                {"type": "json", "json": result}
+            ],
+            "isError": False
+        },
+        "id": 1
+    }
+
+def fastapi_default(response: dict) -> bytes:
+    # What FastAPI does with a returned dict: jsonable_encoder, then JSONResponse.render
+    return json.dumps(jsonable_encoder(response), ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization fast path benchmark")
+    parser.add_argument("--queries", type=int, default=30, help="Entries per search query list in the result")
+    parser.add_argument("--number", type=int, default=5000, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    result = build_result(args.queries)
+    plain = build_response(result)
+    cached = build_response(pre_serialize(result))
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                       "params": {"name": "extract_information", "arguments": {"query": "Doanh thu VNM quý 1 2024"}}},
+                      ensure_ascii=False).encode("utf-8")
+    assert json.loads(FastJSONResponse(cached).body) == json.loads(fastapi_default(plain))
+
+    def per_call_us(func) -> float:
+        return min(timeit.repeat(func, number=args.number, repeat=3)) / args.number * 1e6
+
+    report = {
+        "fast_json": FAST_JSON,
+        "response_bytes": len(fastapi_default(plain)),
+        "encode_us": {
+            "fastapi_default": per_call_us(lambda: fastapi_default(plain)),
+            "fast_response": per_call_us(lambda: FastJSONResponse(plain)),
+            "fast_response_cached": per_call_us(lambda: FastJSONResponse(cached)),
+        },
+        "parse_us": {
+            "stdlib": per_call_us(lambda: json.loads(body)),
+            "fast": per_call_us(lambda: loads(body)),
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Cold-start time of the MCP server.
+
+Imports the server's entry module in fresh interpreters under
+``python -X importtime`` and reports the median total import time, the
+slowest modules by cumulative import time and the time of every ``app.*``
+module. With ``--serve`` it also starts ``main.py`` on a free port and
+measures the time until ``/health`` answers and, with ``LLM_WARM_UP``, until
+the background LLM build has finished.
+
+``--budget`` makes the script exit with status 1 when the median import
+time exceeds the given number of seconds, so it can guard cold-start
+regressions in CI.
+
+Usage (from the ``server`` directory):
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --runs 5 --top 15 --serve
+    python -m benchmarks.startup_benchmark --budget 1.0
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_times(module: str) -> dict:
+    """
+    Import ``module`` in a fresh interpreter.
+
+    Returns:
+        dict: ``module -> (self_us, cumulative_us)`` from ``-X importtime``
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVER_DIR, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def free_port() -> int:
+    """Pick an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def get_health(port: int):
+    """``/health`` body, or None while the server is not answering."""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+            return json.loads(response.read())
+    except OSError:
+        return None
+
+def time_serve(timeout: float) -> dict:
+    """Start ``main.py`` and time readiness and the LLM warm-up."""
+    port = free_port()
+    env = {**os.environ, "HOST": "127.0.0.1", "PORT": str(port)}
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "main.py"], cwd=SERVER_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result = {"ready_seconds": None, "llm_warm_seconds": None, "llm": None}
+    try:
+        while time.perf_counter() - start < timeout and server.poll() is None:
+            health = get_health(port)
+            if health is not None:
+                if result["ready_seconds"] is None:
+                    result["ready_seconds"] = time.perf_counter() - start
+                result["llm"] = health.get("llm", {})
+                if all(tier["state"] != "pending" for tier in result["llm"].values()):
+                    result["llm_warm_seconds"] = time.perf_counter() - start
+                    break
+            time.sleep(0.05)
+    finally:
+        server.terminate()
+        server.wait()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Server import and startup time")
+    parser.add_argument("--module", default="app.api.routes", help="Module imported by the server entry point")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to import in")
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules listed")
+    parser.add_argument("--serve", action="store_true", help="Also time main.py until /health answers")
+    parser.add_argument("--serve-timeout", type=float, default=60.0)
+    parser.add_argument("--budget", type=float, help="Fail if the median import time exceeds this many seconds")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+
+    def median_ms(name: str, index: int) -> float:
+        return statistics.median(run[name][index] for run in runs if name in run) / 1000
+
+    total_seconds = median_ms(args.module, 1) / 1000
+    slowest = sorted(runs[0], key=lambda name: runs[0][name][1], reverse=True)[:args.top]
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "import_seconds": total_seconds,
+        "slowest_modules_ms": {name: median_ms(name, 1) for name in slowest},
+        "app_modules_ms": {
+            name: {"cumulative": median_ms(name, 1), "self": median_ms(name, 0)}
+            for name in sorted(runs[0]) if name == "app" or name.startswith("app.")
+        },
+    }
+    if args.serve:
+        report["serve"] = time_serve(args.serve_timeout)
+    if args.budget is not None:
+        report["budget_seconds"] = args.budget
+        report["within_budget"] = total_seconds <= args.budget
+
+    print(json.dumps(report, indent=2))
+    if args.budget is not None and total_seconds > args.budget:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""CircuitBreaker and HedgedLLM against the local stub LLM servers of the hedging benchmark."""
+import asyncio
+import time
+
+import pytest
+
+from app.agent_services.llm_backends import CircuitBreaker, HedgedLLM
+from benchmarks.hedging_benchmark import start_stub_server, stub_client
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+@pytest.fixture(scope="module")
+def fast_url():
+    server, url = start_stub_server(0.01, 0.01, 0.0, 0.0, seed=1)
+    yield url
+    server.shutdown()
+
+@pytest.fixture(scope="module")
+def slow_url():
+    server, url = start_stub_server(1.0, 1.0, 0.0, 0.0, seed=2)
+    yield url
+    server.shutdown()
+
+@pytest.fixture(scope="module")
+def failing_url():
+    server, url = start_stub_server(0.01, 0.01, 0.0, 1.0, seed=3)
+    yield url
+    server.shutdown()
+
+def hedged(primary_url: str, secondary_url: str, hedging: bool = True) -> HedgedLLM:
+    return HedgedLLM(
+        [("primary", stub_client(primary_url)), ("secondary", stub_client(secondary_url))],
+        hedging=hedging,
+        initial_delay=0.1,
+        min_delay=0.05
+    )
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.get_stats()["times_opened"] == 1
+
+def test_breaker_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_breaker_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.get_stats()["times_opened"] == 2
+
+def test_breaker_cancelled_probe_frees_the_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_cancel()
+    assert breaker.allow()
+
+def test_no_hedge_when_disabled(slow_url, fast_url):
+    llm = hedged(slow_url, fast_url, hedging=False)
+    asyncio.run(llm.ainvoke(MESSAGES))
+
+    stats = llm.get_stats()
+    assert stats["hedges"] == 0
+    assert stats["backends"]["primary"]["wins"] == 1
+    assert stats["backends"]["secondary"]["calls"] == 0
+
+def test_async_hedge_fires_and_cancels_loser(slow_url, fast_url):
+    llm = hedged(slow_url, fast_url)
+
+    async def call():
+        start = time.perf_counter()
+        await llm.ainvoke(MESSAGES)
+        elapsed = time.perf_counter() - start
+        # Give the cancelled primary task a chance to unwind
+        await asyncio.sleep(0)
+        others = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        return elapsed, others
+
+    elapsed, others = asyncio.run(call())
+    stats = llm.get_stats()
+    assert elapsed < 1.0
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+    assert stats["backends"]["secondary"]["wins"] == 1
+    # The losing primary request was cancelled: it never finished and did not count as a failure
+    assert others and all(task.cancelled() for task in others)
+    assert stats["backends"]["primary"]["calls"] == 0
+    assert stats["backends"]["primary"]["circuit"]["consecutive_failures"] == 0
+
+def test_sync_hedge_fires(slow_url, fast_url):
+    llm = hedged(slow_url, fast_url)
+    start = time.perf_counter()
+    llm.invoke(MESSAGES)
+
+    stats = llm.get_stats()
+    assert time.perf_counter() - start < 1.0
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+def test_failed_primary_is_backed_up_immediately(failing_url, fast_url):
+    llm = hedged(failing_url, fast_url)
+    start = time.perf_counter()
+    asyncio.run(llm.ainvoke(MESSAGES))
+
+    stats = llm.get_stats()
+    # Well below the 0.1s hedge delay plus the secondary's latency
+    assert time.perf_counter() - start < 0.5
+    assert stats["backends"]["primary"]["errors"] == 1
+    assert stats["backends"]["secondary"]["wins"] == 1
+
+def test_open_circuit_skips_primary(failing_url, fast_url):
+    llm = hedged(failing_url, fast_url)
+    primary = llm.backends[0]
+    primary.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+    for _ in range(2):
+        asyncio.run(llm.ainvoke(MESSAGES))
+    assert primary.breaker.state == CircuitBreaker.OPEN
+
+    asyncio.run(llm.ainvoke(MESSAGES))
+    stats = llm.get_stats()
+    assert stats["backends"]["primary"]["calls"] == 2
+    assert stats["backends"]["secondary"]["wins"] == 3
+    # Only the two backed-up failures count as hedges; the third call went straight to the secondary
+    assert stats["hedges"] == 2
+
+def test_all_circuits_open_raises(failing_url):
+    llm = HedgedLLM([("primary", stub_client(failing_url))])
+    llm.backends[0].breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+    with pytest.raises(Exception):
+        llm.invoke(MESSAGES)
+    with pytest.raises(RuntimeError, match="circuit open"):
+        llm.invoke(MESSAGES)
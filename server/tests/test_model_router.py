@@ -0,0 +1,106 @@
+"""Small/large routing, escalation and the parse retry path, with FakeLLM tiers."""
+import asyncio
+import json
+from functools import partial
+
+import pytest
+
+from app.agent_services.cache import QueryCache
+from app.agent_services.model_router import ModelRouter, model_router, LARGE, SMALL
+from app.agent_services.response_parser import response_parser, ResponseParseError
+from app.agent_services.intent import intent_analysis
+from app.agent_services.intent.schemas import IntentResult
+from benchmarks.fake_llm import FakeLLM
+from benchmarks.routing_replay import VALID_RESPONSE
+
+SIMPLE_QUERY = "Giá VNM hôm nay"
+COMPLEX_QUERY = "So sánh lợi nhuận của VCB, BID và CTG trong 3 năm gần đây"
+# Valid JSON that does not match IntentResult
+SCHEMA_INVALID = json.dumps({"answer": "VNM"})
+
+parse = partial(response_parser.parse, "test_model_router", schema=IntentResult)
+
+def messages(query: str) -> list:
+    return [{"role": "user", "content": query}]
+
+def test_simple_query_stays_on_small_tier():
+    small, large = FakeLLM([VALID_RESPONSE]), FakeLLM([VALID_RESPONSE])
+    router = ModelRouter(small, large, threshold=1.0)
+
+    assert router.route(SIMPLE_QUERY) == SMALL
+    assert router.invoke(SIMPLE_QUERY, messages(SIMPLE_QUERY), parse) == json.loads(VALID_RESPONSE)
+    assert (small.calls, large.calls) == (1, 0)
+    assert router.get_stats()["escalations"] == 0
+
+def test_complex_query_goes_to_large_tier():
+    small, large = FakeLLM([VALID_RESPONSE]), FakeLLM([VALID_RESPONSE])
+    router = ModelRouter(small, large, threshold=1.0)
+
+    router.invoke(COMPLEX_QUERY, messages(COMPLEX_QUERY), parse)
+    assert (small.calls, large.calls) == (0, 1)
+
+def test_schema_invalid_small_answer_escalates():
+    small, large = FakeLLM([SCHEMA_INVALID]), FakeLLM([VALID_RESPONSE])
+    router = ModelRouter(small, large, threshold=1.0)
+
+    assert router.invoke(SIMPLE_QUERY, messages(SIMPLE_QUERY), parse) == json.loads(VALID_RESPONSE)
+    assert (small.calls, large.calls) == (1, 1)
+    assert router.get_stats()["escalations"] == 1
+
+def test_schema_invalid_small_answer_escalates_async():
+    small, large = FakeLLM([SCHEMA_INVALID]), FakeLLM([VALID_RESPONSE])
+    router = ModelRouter(small, large, threshold=1.0)
+
+    result = asyncio.run(router.ainvoke(SIMPLE_QUERY, messages(SIMPLE_QUERY), parse))
+    assert result == json.loads(VALID_RESPONSE)
+    assert (small.calls, large.calls) == (1, 1)
+    assert router.get_stats()["escalations"] == 1
+
+def test_failing_small_tier_escalates():
+    small, large = FakeLLM([VALID_RESPONSE], failure_rate=1.0), FakeLLM([VALID_RESPONSE])
+    router = ModelRouter(small, large, threshold=1.0)
+
+    router.invoke(SIMPLE_QUERY, messages(SIMPLE_QUERY), parse)
+    assert router.get_stats()["escalations"] == 1
+    assert router.get_stats()["tiers"][SMALL]["errors"] == 1
+
+def test_invalid_large_answer_is_not_escalated_again():
+    small, large = FakeLLM([SCHEMA_INVALID]), FakeLLM([SCHEMA_INVALID])
+    router = ModelRouter(small, large, threshold=1.0)
+
+    with pytest.raises(ResponseParseError):
+        router.invoke(SIMPLE_QUERY, messages(SIMPLE_QUERY), parse)
+    assert (small.calls, large.calls) == (1, 1)
+
+@pytest.fixture
+def fake_tiers(monkeypatch):
+    """Replace the shared router's tiers: the small tier never validates, the large one on its second call."""
+    small = FakeLLM([SCHEMA_INVALID], name="small")
+    large = FakeLLM([SCHEMA_INVALID, VALID_RESPONSE], name="large")
+    monkeypatch.setitem(model_router.tiers, SMALL, small)
+    monkeypatch.setitem(model_router.tiers, LARGE, large)
+    monkeypatch.setattr(intent_analysis, "query_cache", QueryCache(sweep_interval=0))
+    monkeypatch.setattr(model_router, "threshold", 1.0)
+    return small, large
+
+def test_retry_uses_large_tier(fake_tiers):
+    small, large = fake_tiers
+
+    result = intent_analysis._call_llm("analyze_intent", SIMPLE_QUERY)
+    assert result["main_intent"] == "benchmark"
+    # Small answer escalated, large answer unparseable, retry on large
+    assert (small.calls, large.calls) == (1, 2)
+
+def test_retry_uses_large_tier_async(fake_tiers):
+    small, large = fake_tiers
+
+    result = asyncio.run(intent_analysis._call_llm_async("analyze_intent", SIMPLE_QUERY))
+    assert result["main_intent"] == "benchmark"
+    assert (small.calls, large.calls) == (1, 2)
+
+def test_retry_of_large_routed_query_skips_small_tier(fake_tiers):
+    small, large = fake_tiers
+
+    result = intent_analysis._call_llm("analyze_intent", COMPLEX_QUERY)
+    assert result["main_intent"] == "benchmark"
+    assert (small.calls, large.calls) == (0, 2)
@@ -0,0 +1,56 @@
+"""SemanticCache hit guards and per-tool expiry."""
+import time
+
+import pytest
+
+from app.agent_services.semantic_cache import SemanticCache
+
+pytest.importorskip("numpy")
+
+TOOL = "analyze_intent"
+RESULT = {"main_intent": "investment_advice"}
+
+def semantic_cache(**kwargs) -> SemanticCache:
+    # Low enough that the negated and opposite-direction pairs below clear it on n-grams alone
+    cache = SemanticCache(threshold=0.6, **kwargs)
+    cache.enabled = True
+    return cache
+
+def test_paraphrase_hits():
+    cache = semantic_cache()
+    cache.add(TOOL, "VNM có nên mua không", RESULT)
+
+    hit = cache.get(TOOL, "vnm co nen mua khong?")
+    assert hit is not None and hit[0] == RESULT
+
+def test_negation_does_not_match():
+    cache = semantic_cache()
+    cache.add(TOOL, "VNM có nên mua", RESULT)
+
+    assert cache.get(TOOL, "VNM không nên mua") is None
+    assert cache.get_stats()["entity_mismatches"] == 1
+
+def test_opposite_direction_does_not_match():
+    cache = semantic_cache()
+    cache.add(TOOL, "Có nên mua VNM lúc này", RESULT)
+
+    assert cache.get(TOOL, "Có nên bán VNM lúc này") is None
+    assert cache.get_stats()["entity_mismatches"] == 1
+
+def test_other_ticker_does_not_match():
+    cache = semantic_cache()
+    cache.add(TOOL, "Có nên mua VNM lúc này", RESULT)
+
+    assert cache.get(TOOL, "Có nên mua FPT lúc này") is None
+
+def test_entries_expire_with_the_tool_ttl():
+    cache = semantic_cache(ttl=3600, tool_ttls={TOOL: 0.05})
+    cache.add(TOOL, "Giá VNM hôm nay", RESULT)
+    cache.add("extract_information", "Giá VNM hôm nay", RESULT)
+
+    hit = cache.get(TOOL, "Giá VNM hôm nay?")
+    assert hit is not None and hit[1] <= time.time() + 0.05
+
+    time.sleep(0.06)
+    assert cache.get(TOOL, "Giá VNM hôm nay?") is None
+    assert cache.get("extract_information", "Giá VNM hôm nay?") is not None